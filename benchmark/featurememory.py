@@ -0,0 +1,57 @@
+"""
+Memory benchmark. Measures the number of bytes allocated per feature object.
+Run with: python -m benchmark.featurememory
+(c) 2023 tsm
+"""
+import gc
+import tracemalloc
+from typing import Callable, Dict, List
+
+import f3atur3s as ft
+
+NUMBER_OF_FEATURES = 10_000
+
+
+def _bytes_per_feature(create: Callable[[int], List[ft.Feature]], n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    features = create(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del features
+    return (after - before) / n
+
+
+def _sources(n: int) -> List[ft.Feature]:
+    return [ft.FeatureSource(f'source-{i}', ft.FEATURE_TYPE_FLOAT) for i in range(n)]
+
+
+def _normalizers(n: int) -> List[ft.Feature]:
+    fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    return [ft.FeatureNormalizeScale(f'scale-{i}', ft.FEATURE_TYPE_FLOAT, fs) for i in range(n)]
+
+
+def _expanded(n: int) -> List[ft.Feature]:
+    fs = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fs)
+    oh.expand_names = [f'country-oh__{i}' for i in range(n)]
+    # Expand twice, as executors typically do. The names should be shared, not copied.
+    return oh.expand() + oh.expand()
+
+
+def run() -> Dict[str, float]:
+    return {
+        'FeatureSource': _bytes_per_feature(_sources, NUMBER_OF_FEATURES),
+        'FeatureNormalizeScale': _bytes_per_feature(_normalizers, NUMBER_OF_FEATURES),
+        'FeatureVirtual (expand x2)': _bytes_per_feature(_expanded, NUMBER_OF_FEATURES) / 2
+    }
+
+
+def main():
+    for k, v in run().items():
+        print(f'{k:<30} {v:8.1f} bytes/feature')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Small timing harness for the benchmarks. Times a function a number of times and stores the results as JSON, together
+with the commit and versions they were measured on, so runs of different commits can be compared.
+(c) 2023 tsm
+"""
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def measure(name: str, fn: Callable[[Any], Any], repeat: int = 5, setup: Optional[Callable[[], Any]] = None,
+            **params: Any) -> Dict[str, Any]:
+    """
+    Time a function. The function is called `repeat` times, if a setup function is given it is called before each
+    call, outside the timing, and its result is passed to the function.
+
+    Args:
+        name: The name of the benchmark.
+        fn: The function to time. It takes one argument, the result of setup (or None).
+        repeat: The number of times to call the function.
+        setup: (Optional) A function that prepares the argument for each call.
+        params: The parameters of the benchmark, for instance the number of features or rows. Stored in the result.
+
+    Returns:
+        A dictionary with the name, the params and the min, median, mean and max time in seconds.
+    """
+    times: List[float] = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    return {
+        'name': name,
+        'params': params,
+        'repeat': repeat,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'max': max(times)
+    }
+
+
+def key(result: Dict[str, Any]) -> str:
+    """
+    The key of a result, the name and the params. Used to match results of different runs.
+    """
+    return result['name'] + ''.join(f' {k}={v}' for k, v in sorted(result['params'].items()))
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results: List[Dict[str, Any]], file: str):
+    """
+    Save results as JSON.
+
+    Args:
+        results: A list of results as returned by `measure`.
+        file: The name of the file to write.
+    """
+    run = {
+        'commit': _commit(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results
+    }
+    with open(file, 'w') as f:
+        json.dump(run, f, indent=4)
+
+
+def load(file: str) -> Dict[str, Any]:
+    with open(file, 'r') as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare two runs. Only benchmarks present in both are compared.
+
+    Args:
+        baseline: A run as returned by `load`.
+        current: A run as returned by `load`.
+
+    Returns:
+        A list with per benchmark the key, the median of both runs and the ratio current / baseline. A ratio above 1
+        means the current run is slower.
+    """
+    base = {key(r): r for r in baseline['results']}
+    r = []
+    for c in current['results']:
+        b = base.get(key(c), None)
+        if b is None:
+            continue
+        ratio = c['median'] / b['median'] if b['median'] > 0 else float('inf')
+        r.append({'key': key(c), 'baseline': b['median'], 'current': c['median'], 'ratio': ratio})
+    return r
@@ -0,0 +1,64 @@
+"""
+Latency benchmark. Measures the time to build a TensorDefinition for a single record, with the RowExecutor and with
+the BatchExecutor on a batch of 1 row.
+Run with: python -m benchmark.rowlatency
+(c) 2023 tsm
+"""
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import f3atur3s as ft
+
+NUMBER_OF_RECORDS = 5_000
+
+RECORD = {'amount': 12.5, 'count': 3, 'merchant': 'm7', 'country': 'FR', 'date': '2023-03-15 13:45:00'}
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d %H:%M:%S')
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, '10', 1.0, 0.0, 3.0)
+    fr = ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = [f'country__{c}' for c in ('BE', 'DE', 'FR', 'NL', 'UK')]
+    fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_16, fm)
+    fi.dictionary = {f'm{i}': i + 1 for i in range(100)}
+    fb = ft.FeatureBin('amount-bin', ft.FEATURE_TYPE_INT_16, fa, 10)
+    fb.bins = [float(i * 10) for i in range(11)]
+    fw = ft.FeatureDateTimeWave('date-wave', ft.FEATURE_TYPE_FLOAT, fd, '%H', 24, 3)
+    fu = ft.FeatureDateTimeFormat('date-dow', ft.FEATURE_TYPE_INT_8, fd, '%u')
+    return ft.TensorDefinition('latency', [fs, fr, oh, fi, fb, fw, fu])
+
+
+def _latencies(call: Callable[[], object], n: int) -> np.ndarray:
+    r = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        start = time.perf_counter_ns()
+        call()
+        r[i] = time.perf_counter_ns() - start
+    return r
+
+
+def run() -> Dict[str, np.ndarray]:
+    td = _definition()
+    row, batch = ft.RowExecutor(td), ft.BatchExecutor(td)
+    inputs = {k: np.array([v]) for k, v in RECORD.items()}
+    return {
+        'RowExecutor': _latencies(lambda: row.execute(RECORD), NUMBER_OF_RECORDS),
+        'BatchExecutor (1 row)': _latencies(lambda: batch.execute(inputs), NUMBER_OF_RECORDS)
+    }
+
+
+def main():
+    for k, v in run().items():
+        p50, p99 = np.percentile(v, [50, 99]) / 1000
+        print(f'{k:<30} p50 {p50:8.1f} us   p99 {p99:8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
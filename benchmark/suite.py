@@ -0,0 +1,159 @@
+"""
+Performance benchmark suite. Measures definition construction, plan compilation, fitting, transform per feature class,
+batch execution, save and load on synthetic definitions and data of configurable size.
+Run with: python -m benchmark.suite --output results.json
+Compare two runs with: python -m benchmark.suite --compare baseline.json results.json
+(c) 2023 tsm
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import numpy as np
+
+import f3atur3s as ft
+
+from . import harness
+from .synthetic import wide_definition, deep_definition, synthetic_data, fit
+
+DEFAULT_FEATURES = [10, 100, 1000]
+DEFAULT_DEPTHS = [10, 100]
+DEFAULT_ROWS = [1_000, 100_000]
+DEFAULT_DATA_FEATURES = 100
+DEFAULT_VOCABULARIES = [1_000, 10_000, 100_000]
+
+
+def bench_definition(features: List[int], depths: List[int], repeat: int) -> List[Dict[str, Any]]:
+    r = []
+    for n in features:
+        r.append(harness.measure('construct-wide', lambda _: wide_definition(n), repeat, features=n))
+        td = wide_definition(n)
+        r.append(harness.measure('plan-wide', lambda _: ft.TensorDefinitionPlan(td), repeat, features=n))
+    for d in depths:
+        r.append(harness.measure('construct-deep', lambda _: deep_definition(d), repeat, depth=d))
+        td = deep_definition(d)
+        r.append(harness.measure('plan-deep', lambda _: ft.TensorDefinitionPlan(td), repeat, depth=d))
+    return r
+
+
+def bench_save_load(features: List[int], repeat: int) -> List[Dict[str, Any]]:
+    r = []
+    root = tempfile.mkdtemp()
+    try:
+        for n in features:
+            td = wide_definition(n)
+            fit(td, synthetic_data(td, 1_000))
+            count = iter(range(repeat + 1))
+            r.append(harness.measure(
+                'save', lambda p: ft.TensorDefinitionSaver.save(td, p), repeat,
+                setup=lambda: os.path.join(root, f'save-{n}-{next(count)}'), features=n
+            ))
+            path = os.path.join(root, f'save-{n}-0')
+            r.append(harness.measure('load', lambda _: ft.TensorDefinitionLoader.load(path), repeat, features=n))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return r
+
+
+def bench_data(features: int, rows: List[int], repeat: int) -> List[Dict[str, Any]]:
+    r = []
+    for n in rows:
+        td = wide_definition(features)
+        inputs = synthetic_data(td, n)
+        r.append(harness.measure('fit', lambda _: fit(td, inputs), repeat, features=features, rows=n))
+        executor = ft.BatchExecutor(td)
+        out = executor.allocate(n)
+        r.append(harness.measure(
+            'execute', lambda _: executor.execute(inputs, out), repeat, features=features, rows=n
+        ))
+        r.extend(_bench_transform(executor.plan, inputs, repeat, features, n))
+    return r
+
+
+def bench_vocabulary(vocabularies: List[int], repeat: int) -> List[Dict[str, Any]]:
+    # Incremental fit of a FeatureIndex with a large vocabulary, each window only has values not seen before.
+    r = []
+    for n in vocabularies:
+        fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+        td = ft.TensorDefinition('vocabulary', [ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_32, fm)])
+        windows = [{'merchant': np.array([f'm{i}' for i in range(w * n, (w + 1) * n)])} for w in range(2)]
+
+        def update(fitter: ft.TensorDefinitionFitter):
+            for w in windows:
+                fitter.update(w)
+
+        r.append(harness.measure(
+            'fitter-vocabulary', update, repeat, setup=lambda: ft.TensorDefinitionFitter(td), vocabulary=n
+        ))
+    return r
+
+
+def _bench_transform(plan: ft.TensorDefinitionPlan, inputs: Dict[str, np.ndarray], repeat: int,
+                     features: int, rows: int) -> List[Dict[str, Any]]:
+    # Build all values once, then time the transform of each feature class on its (already built) inputs. Sources
+    # replace their raw input with the parsed values, so they are timed on the raw inputs.
+    values: Dict[str, np.ndarray] = dict(inputs)
+    by_class: Dict[str, List[ft.Feature]] = defaultdict(list)
+    for step in plan.steps:
+        f = step.feature
+        values[f.name] = values[step.alias_of.name] if step.is_alias else f.transform(values)
+        if not step.is_alias:
+            by_class[f.__class__.__name__].append(f)
+
+    def transform_all(fs: List[ft.Feature]):
+        for f in fs:
+            f.transform(inputs if isinstance(f, ft.FeatureSource) else values)
+
+    return [
+        harness.measure(
+            f'transform-{name}', lambda _, fs=fs: transform_all(fs), repeat, features=features, rows=rows
+        ) for name, fs in sorted(by_class.items())
+    ]
+
+
+def run(features: List[int], depths: List[int], rows: List[int], data_features: int, vocabularies: List[int],
+        repeat: int) -> List[Dict[str, Any]]:
+    return bench_definition(features, depths, repeat) + bench_save_load(features, repeat) + \
+        bench_data(data_features, rows, repeat) + bench_vocabulary(vocabularies, repeat)
+
+
+def _print_results(results: List[Dict[str, Any]]):
+    for r in results:
+        print(f'{harness.key(r):<60} median {r["median"] * 1000:10.3f} ms   min {r["min"] * 1000:10.3f} ms')
+
+
+def _print_compare(comparison: List[Dict[str, Any]]):
+    for c in comparison:
+        print(f'{c["key"]:<60} {c["baseline"] * 1000:10.3f} ms -> {c["current"] * 1000:10.3f} ms  x{c["ratio"]:.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='f3atur3s benchmark suite')
+    parser.add_argument('--features', type=int, nargs='+', default=DEFAULT_FEATURES,
+                        help='Sizes of the wide definitions')
+    parser.add_argument('--depths', type=int, nargs='+', default=DEFAULT_DEPTHS, help='Depths of the deep definitions')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help='Number of rows of the data')
+    parser.add_argument('--data-features', type=int, default=DEFAULT_DATA_FEATURES,
+                        help='Size of the definition used for the fit, execute and transform benchmarks')
+    parser.add_argument('--vocabularies', type=int, nargs='+', default=DEFAULT_VOCABULARIES,
+                        help='Vocabulary sizes of the incremental fitter benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of times each benchmark is run')
+    parser.add_argument('--output', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, nargs=2, default=None, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two result files instead of running the benchmarks')
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        _print_compare(harness.compare(harness.load(args.compare[0]), harness.load(args.compare[1])))
+        return
+    results = run(args.features, args.depths, args.rows, args.data_features, args.vocabularies, args.repeat)
+    _print_results(results)
+    if args.output is not None:
+        harness.save(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
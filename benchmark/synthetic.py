@@ -0,0 +1,133 @@
+"""
+Synthetic TensorDefinitions and data for the benchmarks. The definitions are generated for a given number of features,
+either wide (many independent sources with a shallow set of derived features each) or deep (a long chain of features
+each built from the previous one).
+(c) 2023 tsm
+"""
+from typing import Dict, List
+
+import numpy as np
+
+import f3atur3s as ft
+
+# Number of distinct values of the synthetic string sources.
+CARDINALITY = 50
+NUMBER_OF_BINS = 10
+
+
+def wide_definition(number_of_features: int) -> ft.TensorDefinition:
+    """
+    A wide definition. Features are created in groups of 10, built from 4 sources. Each group has one source and 9
+    derived features of different classes. The result has (about) `number_of_features` features in total.
+
+    Args:
+        number_of_features: The (approximate) number of features to create, the minimum is one group of 10.
+
+    Returns:
+        A TensorDefinition that is not ready for inference. Use `fit` to set the inference attributes.
+    """
+    features: List[ft.Feature] = []
+    for g in range(max(1, number_of_features // 10)):
+        fa = ft.FeatureSource(f'amount-{g}', ft.FEATURE_TYPE_FLOAT)
+        fc = ft.FeatureSource(f'country-{g}', ft.FEATURE_TYPE_STRING)
+        fm = ft.FeatureSource(f'merchant-{g}', ft.FEATURE_TYPE_STRING)
+        fd = ft.FeatureSource(f'date-{g}', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d %H:%M:%S')
+        features.extend([
+            fa,
+            ft.FeatureNormalizeScale(f'amount-scale-{g}', ft.FEATURE_TYPE_FLOAT_32, fa),
+            ft.FeatureNormalizeStandard(f'amount-std-{g}', ft.FEATURE_TYPE_FLOAT_32, fa, 'e', 1.0),
+            ft.FeatureBin(f'amount-bin-{g}', ft.FEATURE_TYPE_INT_16, fa, NUMBER_OF_BINS),
+            ft.FeatureIndex(f'merchant-ix-{g}', ft.FEATURE_TYPE_INT_16, fm),
+            ft.FeatureOneHot(f'country-oh-{g}', ft.FEATURE_TYPE_INT_8, fc),
+            ft.FeatureDateTimeFormat(f'date-dow-{g}', ft.FEATURE_TYPE_INT_8, fd, '%u'),
+            ft.FeatureDateTimeWave(f'date-hour-{g}', ft.FEATURE_TYPE_FLOAT_32, fd, '%H', 24, 2),
+            ft.FeatureExpression(
+                f'amount-x-{g}', ft.FEATURE_TYPE_FLOAT, ft.Expression(f'log1p(abs(`amount-{g}`)) * 2'), [fa]
+            ),
+            ft.FeatureConcat(f'country-date-{g}', ft.FEATURE_TYPE_STRING, fc,
+                             ft.FeatureDateTimeFormat(f'date-ym-{g}', ft.FEATURE_TYPE_STRING, fd, '%Y-%m'))
+        ])
+    return ft.TensorDefinition(f'wide-{number_of_features}', features)
+
+
+def deep_definition(depth: int) -> ft.TensorDefinition:
+    """
+    A deep definition. A chain of `depth` expression features where each feature is built from the previous one.
+
+    Args:
+        depth: The length of the chain.
+
+    Returns:
+        A TensorDefinition with only the last feature of the chain as feature.
+    """
+    f: ft.Feature = ft.FeatureSource('amount-0', ft.FEATURE_TYPE_FLOAT)
+    for i in range(1, depth):
+        f = ft.FeatureExpression(
+            f'amount-{i}', ft.FEATURE_TYPE_FLOAT, ft.Expression(f'`{f.name}` * 0.5 + 1'), [f]
+        )
+    return ft.TensorDefinition(f'deep-{depth}', [f])
+
+
+def synthetic_data(td: ft.TensorDefinition, rows: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """
+    Generate random input data for the source features of a TensorDefinition.
+
+    Args:
+        td: The TensorDefinition.
+        rows: The number of rows.
+        seed: Seed of the random generator.
+
+    Returns:
+        A dictionary with the name of each source feature as key and a Numpy array with the raw values as value.
+    """
+    rng = np.random.default_rng(seed)
+    inputs: Dict[str, np.ndarray] = {}
+    for f in td.embedded_features:
+        if not isinstance(f, ft.FeatureSource):
+            continue
+        if isinstance(f.type, ft.FeatureTypeTimeBased):
+            seconds = rng.integers(1_600_000_000, 1_700_000_000, rows).astype('datetime64[s]')
+            inputs[f.name] = np.datetime_as_string(seconds).astype('S')
+            inputs[f.name] = np.char.replace(inputs[f.name], b'T', b' ')
+        elif isinstance(f.type, ft.FeatureTypeString):
+            inputs[f.name] = np.array([f'v{i}' for i in range(CARDINALITY)])[rng.integers(0, CARDINALITY, rows)]
+        elif isinstance(f.type, ft.FeatureTypeInteger):
+            inputs[f.name] = rng.integers(0, 1000, rows).astype(f.type.numpy_type)
+        else:
+            inputs[f.name] = rng.lognormal(3.0, 1.0, rows).astype(f.type.numpy_type)
+    return inputs
+
+
+def fit(td: ft.TensorDefinition, inputs: Dict[str, np.ndarray]):
+    """
+    Set the inference attributes of all features of a TensorDefinition from data. The features are visited in plan
+    order, each feature is fitted on the values of its base feature and then built, so later features can use it.
+
+    Args:
+        td: The TensorDefinition to fit.
+        inputs: The raw data, for instance from `synthetic_data`.
+    """
+    values: Dict[str, np.ndarray] = dict(inputs)
+    for step in ft.TensorDefinitionPlan(td).steps:
+        f = step.feature
+        if isinstance(f, ft.FeatureNormalizeScale):
+            v = _log(f, values[f.base_feature.name])
+            f.minimum, f.maximum = float(np.min(v)), float(np.max(v))
+        elif isinstance(f, ft.FeatureNormalizeStandard):
+            v = _log(f, values[f.base_feature.name])
+            f.mean, f.stddev = float(np.mean(v)), float(np.std(v))
+        elif isinstance(f, ft.FeatureBin):
+            v = values[f.base_feature.name]
+            f.bins = [float(b) for b in np.quantile(v[~np.isnan(v)], np.linspace(0, 1, f.number_of_bins)[:-1])]
+        elif isinstance(f, ft.FeatureIndex):
+            f.dictionary = {str(u): i + 1 for i, u in enumerate(np.unique(values[f.base_feature.name]))}
+        elif isinstance(f, ft.FeatureOneHot):
+            f.expand_names = [f'{f.base_feature.name}{f.delimiter}{u}' for u in np.unique(values[f.base_feature.name])]
+        values[f.name] = values[step.alias_of.name] if step.is_alias else f.transform(values)
+
+
+def _log(f: ft.FeatureNormalizeLogBase, values: np.ndarray) -> np.ndarray:
+    # The normalization parameters are calculated on the logarithm of the values if the feature has a log base.
+    if f.log_base is None:
+        return values
+    return ft.NormalizeKernel.normalize(values, [0.0], [1.0], [f.log_base], [f.delta])
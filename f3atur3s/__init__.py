@@ -17,6 +17,7 @@ from .common.learningcategory import LearningCategory, LEARNING_CATEGORY_CATEGOR
 from .common.learningcategory import LEARNING_CATEGORY_CONTINUOUS, LEARNING_CATEGORY_LABEL, LEARNING_CATEGORIES_MODEL
 from .common.learningcategory import LEARNING_CATEGORY_NONE
 from .common.feature import Feature, FeatureExpander, FeatureCategorical
+from .common.expression import Expression
 from .features.featuresource import FeatureSource
 from .features.featureindex import FeatureIndex
 from .features.featurebin import FeatureBin
@@ -28,7 +29,7 @@ from .features.featureexpression import FeatureExpression
 from .features.featureexpression import FeatureExpressionSeries
 from .features.featurefilter import FeatureFilter
 from .common.feature import FeatureLabel
-from .features.featurelabelbinary import FeatureLabelBinary
+from .features.featurelabelbinary import FeatureLabelBinary, BinaryLabelCounts
 from .common.feature import FeatureNormalizeLogBase
 from .features.featurenormalizescale import FeatureNormalizeScale
 from .features.featurenormalizestandard import FeatureNormalizeStandard
@@ -43,3 +44,24 @@ from .features.featureseriesstacked import FeatureSeriesStacked
 from .tensor.featurehelper import FeatureHelper
 from .tensor.tensordefinition import TensorDefinition, TensorDefinitionException
 from .tensor.tensordefinitionsaverloader import TensorDefinitionSaver, TensorDefinitionLoader
+from .tensor.featurefingerprint import FeatureFingerprint
+from .executor.featurecache import FeatureCache, FeatureCacheStats
+from .tensor.tensorplan import TensorDefinitionPlan, PlanStep
+from .executor.partitioned import PartitionedExpressionExecutor
+from .kernels.datetimeparse import DateTimeParser
+from .kernels.datetimecomponent import DateTimeComponent
+from .kernels.wave import WaveKernel
+from .kernels.ratio import RatioKernel
+from .kernels.concat import ConcatKernel
+from .kernels.normalize import NormalizeKernel
+from .executor.batch import BatchExecutor
+from .executor.row import RowExecutor
+from .executor.coalescer import BatchCoalescer, CoalescerMetrics
+from .executor.profile import FeatureProfiler, FeatureProfile
+from .tensor.tensoranalysis import TensorDefinitionAnalysis, OutputCost
+from .reader.sourcereader import SourceReader
+from .tensor.dtypepolicy import DtypePolicy, DtypePolicyCompact, DTYPE_POLICY_DEFAULT, DTYPE_POLICY_COMPACT
+from .tensor.dtypepolicy import DTYPE_POLICIES
+from .executor.memmap import MemmapExecutor
+from .executor.arrow import ArrowExecutor, ArrowBatch, ARROW_ALIGNMENT
+from .tensor.tensorfitter import TensorDefinitionFitter
@@ -0,0 +1,52 @@
+"""
+Module to add __slots__ to dataclasses.
+(c) 2023 tsm
+"""
+from dataclasses import fields, MISSING
+from functools import wraps
+
+
+def add_slots(cls):
+    """
+    Class decorator that re-creates a dataclass with __slots__, so its instances do not have a __dict__. Must be
+    the outermost decorator, on top of @dataclass and @enforce_types.
+
+    Unlike `dataclass(slots=True)` in Python 3.10, only the fields that are not already a slot of a base class get
+    a slot. In 3.10 every dataclass in a hierarchy re-declares the slots of its bases, each level adds one unused
+    pointer per inherited field to every instance.
+
+    As the class is re-created, methods of the class can not use the zero-argument form of super(). Fields with
+    `init=False` and a default are set before the dataclass __init__ runs, as that __init__ reads their default from
+    the class attribute, which is replaced by the slot.
+
+    Args:
+        cls: The dataclass.
+
+    Returns:
+        A new class with the same name, bases and attributes plus __slots__.
+    """
+    inherited = set(s for b in cls.__mro__[1:] for s in b.__dict__.get('__slots__', ()))
+    names = tuple(f.name for f in fields(cls) if f.name not in inherited)
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = names
+    # The defaults of the fields are class attributes, they would clash with the slots. The dataclass __init__ has
+    # its own copy of the defaults of the init fields.
+    for name in names:
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    defaults = tuple((f.name, f.default) for f in fields(cls) if not f.init and f.default is not MISSING)
+    if len(defaults) > 0 and '__init__' in cls_dict:
+        cls_dict['__init__'] = _init_defaults(cls_dict['__init__'], defaults)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+    return new_cls
+
+
+def _init_defaults(init, defaults):
+    @wraps(init)
+    def __init__(self, *args, **kwargs):
+        for name, value in defaults:
+            object.__setattr__(self, name, value)
+        init(self, *args, **kwargs)
+    return __init__
@@ -0,0 +1,225 @@
+"""
+Definition of the Expression class. A small arithmetic/boolean expression language that can be used instead of a
+Python function in a FeatureExpression or FeatureFilter. It is parsed once and compiled into vectorized Numpy
+operations. Because it is plain text it can be saved in the feature JSON and does not need to be pickled.
+(c) 2023 tsm
+"""
+import ast
+import re
+from functools import reduce
+from typing import Callable, Dict, List, Any
+
+import numpy as np
+
+from .exception import FeatureDefinitionException, FeatureRunTimeException
+
+# Compiled nodes take a dictionary of named input arrays and return an array (or a scalar for constants).
+_Node = Callable[[Dict[str, np.ndarray]], Any]
+
+_BIN_OPS: Dict[type, Callable] = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide,
+    ast.Mod: np.mod,
+    ast.Pow: np.power
+}
+
+_UNARY_OPS: Dict[type, Callable] = {
+    ast.USub: np.negative,
+    ast.UAdd: np.positive,
+    ast.Not: np.logical_not
+}
+
+_BOOL_OPS: Dict[type, Callable] = {
+    ast.And: np.logical_and,
+    ast.Or: np.logical_or
+}
+
+_COMPARE_OPS: Dict[type, Callable] = {
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.In: lambda a, b: np.isin(a, b),
+    ast.NotIn: lambda a, b: np.isin(a, b, invert=True)
+}
+
+# Functions that can be called in an expression, with their number of arguments.
+_FUNCTIONS: Dict[str, Any] = {
+    'abs': (np.abs, 1),
+    'sqrt': (np.sqrt, 1),
+    'exp': (np.exp, 1),
+    'log': (np.log, 1),
+    'log2': (np.log2, 1),
+    'log10': (np.log10, 1),
+    'log1p': (np.log1p, 1),
+    'floor': (np.floor, 1),
+    'ceil': (np.ceil, 1),
+    'round': (np.round, 1),
+    'isnan': (np.isnan, 1),
+    'min': (np.minimum, 2),
+    'max': (np.maximum, 2),
+    'where': (np.where, 3),
+    'clip': (np.clip, 3)
+}
+
+# Feature names that are not valid Python identifiers can be quoted with back-ticks. For instance `amount-eur` * 2
+_QUOTED_NAME = re.compile(r'`([^`]+)`')
+
+
+class Expression:
+    """
+    An expression in a small arithmetic/boolean language. For instance "amount / (count + 1)" or
+    "country == 'DE' and amount > 100". Names in the expression refer to parameter features, names that are not
+    valid Python identifiers can be quoted with back-ticks.
+
+    Supported are the arithmetic operators + - * / // % **, the comparisons == != < <= > >= 'in' and 'not in'
+    (with a list of constants), 'and', 'or', 'not', 'x if condition else y' and the functions abs, sqrt, exp, log,
+    log2, log10, log1p, floor, ceil, round, isnan, min, max, where and clip.
+
+    Args:
+        text: The text of the expression.
+    """
+    def __init__(self, text: str):
+        self._text = text
+        self._names: List[str] = []
+        quoted: Dict[str, str] = {}
+
+        def _quote(m):
+            return quoted.setdefault(m.group(1), f'__quoted_{len(quoted)}__')
+
+        try:
+            tree = ast.parse(_QUOTED_NAME.sub(_quote, text).strip(), mode='eval')
+        except SyntaxError as e:
+            raise FeatureDefinitionException(f'Could not parse expression <{text}>. Error <{e.msg}>')
+        self._unquoted = {v: k for k, v in quoted.items()}
+        self._canonical = ast.dump(tree)
+        self._compiled = self._compile(tree.body)
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Evaluate the expression.
+
+        Args:
+            inputs: A dictionary with the names of the referenced features as key and Numpy arrays as values.
+
+        Returns:
+            A Numpy array with the result of the expression.
+        """
+        missing = [n for n in self._names if n not in inputs]
+        if len(missing) > 0:
+            raise FeatureRunTimeException(f'Expression <{self._text}> is missing inputs for {missing}')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._compiled(inputs)
+
+    def __eq__(self, other):
+        return isinstance(other, Expression) and self._canonical == other._canonical
+
+    def __hash__(self):
+        return hash(self._canonical)
+
+    def __repr__(self):
+        return f'Expression({self._text!r})'
+
+    def __reduce__(self):
+        # The compiled nodes can not be pickled, re-parse from the text.
+        return Expression, (self._text,)
+
+    @property
+    def text(self) -> str:
+        """
+        The text of the expression, as it was defined.
+
+        Returns:
+            A string.
+        """
+        return self._text
+
+    @property
+    def canonical(self) -> str:
+        """
+        A canonical representation of the parsed expression. Expressions that only differ in formatting have the same
+        canonical representation.
+
+        Returns:
+            A string.
+        """
+        return self._canonical
+
+    @property
+    def names(self) -> List[str]:
+        """
+        The names of the features referenced in this expression, in the order they first appear.
+
+        Returns:
+            A list of feature names.
+        """
+        return self._names
+
+    def _error(self, node: ast.AST, reason: str) -> FeatureDefinitionException:
+        return FeatureDefinitionException(
+            f'{reason} in expression <{self._text}>. At <{ast.dump(node)}>'
+        )
+
+    def _compile(self, node: ast.AST) -> _Node:
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool)):
+                raise self._error(node, f'Unsupported constant {node.value!r}')
+            value = node.value
+            return lambda inputs: value
+        elif isinstance(node, ast.Name):
+            name = self._unquoted.get(node.id, node.id)
+            if name not in self._names:
+                self._names.append(name)
+            return lambda inputs: inputs[name]
+        elif isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            op, left, right = _BIN_OPS[type(node.op)], self._compile(node.left), self._compile(node.right)
+            return lambda inputs: op(left(inputs), right(inputs))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            op, operand = _UNARY_OPS[type(node.op)], self._compile(node.operand)
+            return lambda inputs: op(operand(inputs))
+        elif isinstance(node, ast.BoolOp) and type(node.op) in _BOOL_OPS:
+            op, values = _BOOL_OPS[type(node.op)], [self._compile(v) for v in node.values]
+            return lambda inputs: reduce(op, [v(inputs) for v in values])
+        elif isinstance(node, ast.Compare):
+            return self._compile_compare(node)
+        elif isinstance(node, ast.IfExp):
+            test, body, orelse = self._compile(node.test), self._compile(node.body), self._compile(node.orelse)
+            return lambda inputs: np.where(test(inputs), body(inputs), orelse(inputs))
+        elif isinstance(node, ast.Call):
+            return self._compile_call(node)
+        else:
+            raise self._error(node, f'Unsupported construct <{node.__class__.__name__}>')
+
+    def _compile_compare(self, node: ast.Compare) -> _Node:
+        # Chained comparisons like 'a < b < c' are translated to 'a < b and b < c'
+        operands = [node.left] + node.comparators
+        pairs = []
+        for op, left, right in zip(node.ops, operands[:-1], operands[1:]):
+            if type(op) not in _COMPARE_OPS:
+                raise self._error(node, f'Unsupported comparison <{op.__class__.__name__}>')
+            if isinstance(op, (ast.In, ast.NotIn)):
+                pairs.append((_COMPARE_OPS[type(op)], self._compile(left), self._compile_constant_list(right)))
+            else:
+                pairs.append((_COMPARE_OPS[type(op)], self._compile(left), self._compile(right)))
+        return lambda inputs: reduce(np.logical_and, [op(lf(inputs), rf(inputs)) for op, lf, rf in pairs])
+
+    def _compile_constant_list(self, node: ast.AST) -> _Node:
+        if not isinstance(node, (ast.List, ast.Tuple, ast.Set)) or \
+                not all(isinstance(e, ast.Constant) for e in node.elts):
+            raise self._error(node, f'The right side of "in" must be a list of constants')
+        values = np.array([e.value for e in node.elts])
+        return lambda inputs: values
+
+    def _compile_call(self, node: ast.Call) -> _Node:
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+            raise self._error(node, f'Unsupported function. Supported are {list(_FUNCTIONS.keys())}')
+        func, arity = _FUNCTIONS[node.func.id]
+        if len(node.keywords) > 0 or len(node.args) != arity:
+            raise self._error(node, f'Function <{node.func.id}> takes {arity} positional argument(s)')
+        args = [self._compile(a) for a in node.args]
+        return lambda inputs: func(*[a(inputs) for a in args])
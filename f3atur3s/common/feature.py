@@ -3,30 +3,50 @@ Definition of the base features types. These are all helper or abstract classes
 (c) 2023 tsm
 """
 from dataclasses import dataclass, field, asdict
-from typing import List, Type, Optional, Dict, Any, Tuple
+from typing import List, Type, Optional, Dict, Any, Tuple, Mapping
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 from .typechecking import enforce_types
+from .dataclassslots import add_slots
 from .learningcategory import LearningCategory, LEARNING_CATEGORY_CATEGORICAL, LEARNING_CATEGORY_LABEL
 from .learningcategory import LEARNING_CATEGORY_CONTINUOUS, LEARNING_CATEGORY_NONE
 from .featuretype import FeatureType, FeatureTypeInteger, FeatureTypeFloat, FeatureTypeString
 from .featuretype import FeatureTypeBool, FeatureTypeNumerical, FeatureTypeTimeBased
 from .featuretype import FeatureTypeHelper
-from .exception import FeatureDefinitionException, not_implemented
+from .exception import FeatureDefinitionException, FeatureRunTimeException, not_implemented
+from ..kernels.normalize import NormalizeKernel
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class Feature(ABC):
     """
     Base Feature class. All features will inherit from this class.
     It is an abstract-ish class that only defines the name and type
+
+    Features are slotted dataclasses (see `add_slots`), they do not have an instance __dict__. The embedded features
+    are kept in an immutable tuple, so definitions with many (expanded) features stay compact in memory.
     """
     name: str
     type: FeatureType
-    embedded_features: List['Feature'] = field(default_factory=list, init=False, hash=False, repr=False)
+    embedded_features: Tuple['Feature', ...] = field(default=(), init=False, hash=False, repr=False)
 
-    def __dict__(self) -> Dict[str, Any]:
+    def __setattr__(self, key: str, value: Any):
+        # Store the embedded features as a de-duplicated tuple, keeping the order.
+        if key == 'embedded_features' and not isinstance(value, tuple):
+            value = tuple(dict.fromkeys(value))
+        object.__setattr__(self, key, value)
+
+    def as_json(self) -> Dict[str, Any]:
+        """
+        Create a JSON serializable dictionary of the feature. It is used to save the feature.
+
+        Returns:
+            A dictionary with the fields of the feature. Embedded features are replaced by their name.
+        """
         json = asdict(self)
         # We don't need the full embedded features, just the names.
         json['embedded_features'] = [e['name'] for e in json['embedded_features']]
@@ -49,6 +69,23 @@ class Feature(ABC):
                 f'The FeatureType of a {self.__class__.__name__} must be {f_type.__name__}. Got <{self.type.name}>'
             )
 
+    def val_inference_ready(self, operation: str) -> None:
+        """
+        Validation method to check if the feature is ready for inference. Will throw a FeatureRunTimeException if the
+        inference attributes of the feature are not set.
+
+        Args:
+            operation: A description of what needed the inference attributes. Used in the error message.
+
+        Returns:
+            None
+        """
+        if not self.inference_ready:
+            raise FeatureRunTimeException(
+                f'Can not {operation} feature <{self.name}>, it is not ready for inference. Please perform an ' +
+                f'inference run first'
+            )
+
     def val_int_type(self) -> None:
         """
         Validation method to check if the feature is integer based. Will throw a FeatureDefinitionException
@@ -113,6 +150,52 @@ class Feature(ABC):
         """
         return not_implemented(self)
 
+    @property
+    def transform_width(self) -> int:
+        """
+        The number of columns `transform` writes.
+
+        Returns:
+            An int, 1 for all features except expanders, which write one column per expanded feature.
+        """
+        return 1
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculate the values of this feature for a batch of rows. Features that support batch processing override
+        this method.
+
+        Args:
+            inputs: A mapping with the feature names as keys and Numpy arrays as values. It must contain the values
+                of the features this feature is built from. For a FeatureSource the raw values.
+            out: (Optional) Array to write the result to. 1-D of length rows, or (rows, transform_width) for
+                expanders. It can be a column (slice) of a bigger array, so a feature can be written in place.
+                If not provided a new array is returned.
+
+        Returns:
+            A Numpy array with the values of the feature. `out` if it was provided.
+
+        Raises:
+            FeatureRunTimeException if the feature does not support batch transforms.
+        """
+        raise FeatureRunTimeException(
+            f'Feature <{self.name}> of class <{self.__class__.__name__}> does not support batch transforms'
+        )
+
+    @staticmethod
+    def _transform_input(inputs: Mapping[str, np.ndarray], feature: 'Feature') -> np.ndarray:
+        values = inputs.get(feature.name, None)
+        if values is None:
+            raise FeatureRunTimeException(f'No input values for feature <{feature.name}>')
+        return values
+
+    @staticmethod
+    def _transform_output(result: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        if out is None:
+            return result
+        out[...] = result
+        return out
+
     @classmethod
     @abstractmethod
     def create_from_save(cls, fields: Dict[str, Any], embedded_features: List['Feature'], pkl: Any) -> 'Feature':
@@ -130,6 +213,8 @@ class FeatureCategorical(Feature, ABC):
     Placeholder for features that are categorical in nature. They implement an additional __len__ method which
     will be used in embedding layers.
     """
+    __slots__ = ()
+
     @abstractmethod
     def __len__(self):
         """
@@ -157,6 +242,7 @@ class FeatureCategorical(Feature, ABC):
         return LEARNING_CATEGORY_CATEGORICAL
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureWithBaseFeature(Feature, ABC):
@@ -166,8 +252,8 @@ class FeatureWithBaseFeature(Feature, ABC):
     """
     base_feature: Feature
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = Feature.as_json(self)
         # Just need to keep the name of the base_features
         json['base_feature'] = json['base_feature']['name']
         return json
@@ -265,9 +351,10 @@ class FeatureWithBaseFeature(Feature, ABC):
         Returns:
             A list of features.
         """
-        return list(set([self.base_feature] + self.base_feature.embedded_features))
+        return list(dict.fromkeys((self.base_feature,) + self.base_feature.embedded_features))
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureExpander(FeatureWithBaseFeature, ABC):
@@ -288,6 +375,10 @@ class FeatureExpander(FeatureWithBaseFeature, ABC):
         """
         return not_implemented(self)
 
+    @property
+    def transform_width(self) -> int:
+        return len(self.expand_names) if self.expand_names is not None else 0
+
     @property
     @abstractmethod
     def delimiter(self) -> str:
@@ -302,6 +393,7 @@ class FeatureExpander(FeatureWithBaseFeature, ABC):
         pass
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureLabel(FeatureWithBaseFeature, ABC):
@@ -318,6 +410,7 @@ class FeatureLabel(FeatureWithBaseFeature, ABC):
         return LEARNING_CATEGORY_LABEL
 
 
+@add_slots
 @enforce_types
 @dataclass
 class FeatureNormalize(FeatureWithBaseFeature, ABC):
@@ -333,6 +426,7 @@ class FeatureNormalize(FeatureWithBaseFeature, ABC):
         return LEARNING_CATEGORY_CONTINUOUS
 
 
+@add_slots
 @enforce_types
 @dataclass
 class FeatureNormalizeLogBase(FeatureNormalize, ABC):
@@ -357,7 +451,34 @@ class FeatureNormalizeLogBase(FeatureNormalize, ABC):
     def valid_bases() -> List[str]:
         return ['e', '10', '2']
 
+    def normalize_parameters(self) -> Tuple[float, float]:
+        """
+        The parameters of the normalization. Normalized values are calculated as (x - offset) / spread, where x is
+        the value of the base feature after the optional logarithm.
+
+        Returns:
+            A tuple (offset, spread).
+        """
+        return not_implemented(self)
+
+    def normalize(self, values: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Normalize an array of base feature values. The feature must be inference ready.
+
+        Args:
+            values: A 1-D Numpy array with the values of the base feature.
+            out: (Optional) Array to write to, for instance a column of a bigger array. Can be `values` itself.
+
+        Returns:
+            A Numpy array with the normalized values.
+        """
+        return NormalizeKernel.normalize_features([self], values, out)
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.normalize(self._transform_input(inputs, self.base_feature), out)
+
 
+@add_slots
 @enforce_types
 @dataclass
 class FeatureSeriesBased(Feature, ABC):
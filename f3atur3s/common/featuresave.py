@@ -9,6 +9,8 @@ from .feature import Feature
 
 
 class FeatureWithPickle(Feature, ABC):
+    __slots__ = ()
+
     @abstractmethod
     def get_pickle(self) -> Any:
         pass
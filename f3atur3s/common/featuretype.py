@@ -5,6 +5,8 @@ Definition of the FeatureTypes categories
 from dataclasses import dataclass, field
 from typing import Dict
 
+import numpy as np
+
 from .typechecking import enforce_types
 from .exception import FeatureDefinitionException
 from .learningcategory import LearningCategory, LEARNING_CATEGORY_NONE, LEARNING_CATEGORY_CATEGORICAL
@@ -50,6 +52,16 @@ class FeatureType:
         except KeyError:
             raise FeatureDefinitionException(f'Could not find  FeatureType with key <{key}>')
 
+    @property
+    def numpy_type(self) -> np.dtype:
+        """
+        The Numpy dtype that is used to hold values of this FeatureType in vectorized operations.
+
+        Returns:
+            A Numpy dtype.
+        """
+        return NUMPY_TYPES[self.key]
+
 
 class FeatureTypeString(FeatureType):
     pass
@@ -105,6 +117,20 @@ ALL_FEATURE_TYPES: Dict[int, FeatureType] = {
     FEATURE_TYPE_BOOL.key: FEATURE_TYPE_BOOL
 }
 
+NUMPY_TYPES: Dict[int, np.dtype] = {
+    FEATURE_TYPE_STRING.key: np.dtype(np.str_),
+    FEATURE_TYPE_CATEGORICAL.key: np.dtype(np.str_),
+    FEATURE_TYPE_FLOAT.key: np.dtype(np.float64),
+    FEATURE_TYPE_FLOAT_32.key: np.dtype(np.float32),
+    FEATURE_TYPE_DATE.key: np.dtype('datetime64[D]'),
+    FEATURE_TYPE_DATE_TIME.key: np.dtype('datetime64[s]'),
+    FEATURE_TYPE_INTEGER.key: np.dtype(np.int32),
+    FEATURE_TYPE_INT_8.key: np.dtype(np.int8),
+    FEATURE_TYPE_INT_16.key: np.dtype(np.int16),
+    FEATURE_TYPE_INT_64.key: np.dtype(np.int64),
+    FEATURE_TYPE_BOOL.key: np.dtype(np.bool_)
+}
+
 
 class FeatureTypeHelper:
     @classmethod
@@ -0,0 +1,329 @@
+"""
+Arrow output. Builds a TensorDefinition into buffers with the Arrow columnar layout, so the output columns can be handed
+to Arrow consumers, as pyarrow RecordBatch or through the Arrow C Data Interface, without copying.
+(c) 2023 tsm
+"""
+import ctypes
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.feature import FeatureExpander
+from ..common.learningcategory import LearningCategory
+from ..tensor.dtypepolicy import DtypePolicy, DTYPE_POLICY_DEFAULT
+from ..tensor.tensordefinition import TensorDefinition
+from .batch import BatchExecutor
+from .profile import FeatureProfiler
+
+# Arrow recommends buffers that start at, and are padded to, a multiple of 64 bytes.
+ARROW_ALIGNMENT = 64
+
+# Format strings of the Arrow C Data Interface for the Numpy types an output column can have. Booleans are bit-packed
+# in Arrow, so numpy bool columns are exported as int8.
+_ARROW_FORMATS: Dict[np.dtype, str] = {
+    np.dtype(np.int8): 'c', np.dtype(np.uint8): 'C', np.dtype(np.int16): 's', np.dtype(np.uint16): 'S',
+    np.dtype(np.int32): 'i', np.dtype(np.uint32): 'I', np.dtype(np.int64): 'l', np.dtype(np.uint64): 'L',
+    np.dtype(np.float16): 'e', np.dtype(np.float32): 'f', np.dtype(np.float64): 'g'
+}
+_ARROW_FLAG_NULLABLE = 2
+
+
+def _aligned_empty(nbytes: int) -> np.ndarray:
+    # An uninitialized uint8 buffer that starts at a multiple of ARROW_ALIGNMENT.
+    raw = np.empty(nbytes + ARROW_ALIGNMENT, dtype=np.uint8)
+    offset = -raw.ctypes.data % ARROW_ALIGNMENT
+    return raw[offset:offset + nbytes]
+
+
+def _padded(n: int) -> int:
+    return -(-n // ARROW_ALIGNMENT) * ARROW_ALIGNMENT
+
+
+@dataclass
+class ArrowBatch:
+    """
+    The output of an ArrowExecutor for one batch of rows.
+
+    rows: The number of rows.
+    matrices: The output matrices per LearningCategory, as a BatchExecutor returns them. They are column-major views
+        on the same memory as the columns.
+    columns: One contiguous, 64-byte aligned, 1-D array per output column, with the expanded feature name as key.
+    validity: The Arrow validity bitmap of the columns that have null values, 64-byte aligned. Columns without nulls
+        have no bitmap.
+    null_counts: The number of null values per column.
+    """
+    rows: int
+    matrices: Dict[LearningCategory, np.ndarray]
+    columns: Dict[str, np.ndarray]
+    validity: Dict[str, np.ndarray] = field(default_factory=dict)
+    null_counts: Dict[str, int] = field(default_factory=dict)
+
+    def to_pyarrow(self) -> Any:
+        """
+        The columns as pyarrow RecordBatch. The Arrow arrays wrap the buffers of this batch, nothing is copied.
+        Requires pyarrow.
+
+        Returns:
+            A pyarrow.RecordBatch.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise FeatureRunTimeException(f'Converting to a RecordBatch requires pyarrow, it is not installed')
+        arrays = []
+        for name, c in self.columns.items():
+            v = self.validity.get(name, None)
+            arrays.append(pa.Array.from_buffers(
+                pa.from_numpy_dtype(c.dtype), self.rows, [None if v is None else pa.py_buffer(v), pa.py_buffer(c)],
+                null_count=self.null_counts.get(name, 0)
+            ))
+        return pa.RecordBatch.from_arrays(arrays, names=list(self.columns.keys()))
+
+    def export_to_c(self, array_address: int, schema_address: int):
+        """
+        Export the columns through the Arrow C Data Interface, as a struct array with one child per column. The
+        consumer allocates an ArrowArray and an ArrowSchema struct and passes their addresses, for instance
+        `pa.RecordBatch._import_from_c(array_address, schema_address)` after this call. The buffers of this batch are
+        exported, not copied. They are kept alive until the consumer calls the release callbacks. Does not require
+        pyarrow.
+
+        Args:
+            array_address: The address of an ArrowArray struct.
+            schema_address: The address of an ArrowSchema struct.
+        """
+        _CDataExport.export(self, array_address, schema_address)
+
+
+class ArrowExecutor:
+    """
+    Executor that builds a TensorDefinition into buffers with the Arrow columnar layout.
+
+    The features are built by a BatchExecutor, but the matrix of each LearningCategory is allocated column-major, with
+    each column starting at a 64-byte boundary and padded to a multiple of 64 bytes. So every output column is a
+    contiguous, aligned buffer that Arrow can use as data buffer of an array as is. The columns are keyed by the
+    expanded feature names, for instance the expand names of a FeatureOneHot.
+
+    If `nan_as_null` is set, NaN values in float columns are marked as null in an Arrow validity bitmap. Columns
+    without nulls get no bitmap, which Arrow reads as 'all valid'.
+
+    Args:
+        td: The TensorDefinition to build. It must be ready for inference and can not be series based.
+        profiler: (Optional) A FeatureProfiler to record the per-feature cost in.
+        dtype_policy: (Optional) The DtypePolicy of the output. Default is DTYPE_POLICY_DEFAULT.
+        nan_as_null: If True, NaN in float columns is exported as null. Default True.
+    """
+    def __init__(self, td: TensorDefinition, profiler: Optional[FeatureProfiler] = None,
+                 dtype_policy: DtypePolicy = DTYPE_POLICY_DEFAULT, nan_as_null: bool = True):
+        self._executor = BatchExecutor(td, profiler, dtype_policy)
+        self._nan_as_null = nan_as_null
+        self._names: Dict[LearningCategory, List[str]] = {}
+        for lc, fs in self._executor.layout.items():
+            if self._executor.dtypes[lc] != np.bool_ and self._executor.dtypes[lc] not in _ARROW_FORMATS:
+                raise FeatureRunTimeException(
+                    f'Can not build <{lc.name}> as Arrow. Type {self._executor.dtypes[lc]} is not supported'
+                )
+            self._names[lc] = [
+                n for f, _ in fs for n in (f.expand_names if isinstance(f, FeatureExpander) else [f.name])
+            ]
+
+    def __repr__(self):
+        return f'ArrowExecutor : {self._executor.plan.tensor_definition.name}'
+
+    @property
+    def executor(self) -> BatchExecutor:
+        return self._executor
+
+    @property
+    def names(self) -> List[str]:
+        """
+        The names of the output columns, the expanded feature names in the order of the BatchExecutor layout.
+        """
+        return [n for names in self._names.values() for n in names]
+
+    def allocate(self, rows: int) -> ArrowBatch:
+        """
+        Allocate the Arrow buffers for a number of rows.
+
+        Args:
+            rows: The number of rows.
+
+        Returns:
+            An ArrowBatch with uninitialized columns.
+        """
+        matrices, columns = {}, {}
+        for lc, names in self._names.items():
+            dtype = self._executor.dtypes[lc]
+            stride = _padded(rows * dtype.itemsize) // dtype.itemsize
+            buffer = _aligned_empty(len(names) * stride * dtype.itemsize).view(dtype).reshape(len(names), stride)
+            matrices[lc] = buffer[:, :rows].T
+            for i, n in enumerate(names):
+                columns[n] = buffer[i, :rows].view(np.int8) if dtype == np.bool_ else buffer[i, :rows]
+        return ArrowBatch(rows, matrices, columns)
+
+    def execute(self, inputs: Mapping[str, np.ndarray], out: Optional[ArrowBatch] = None) -> ArrowBatch:
+        """
+        Build the TensorDefinition for a batch of rows.
+
+        Args:
+            inputs: A mapping with the names of the source features as keys and 1-D Numpy arrays with the raw values
+                as values. All arrays must have the same length.
+            out: (Optional) An ArrowBatch as returned by `allocate`, to re-use the memory between batches. Batches that
+                were handed to a consumer should not be re-used while the consumer still reads them.
+
+        Returns:
+            An ArrowBatch.
+        """
+        rows = len(next(iter(inputs.values()), ()))
+        out = self.allocate(rows) if out is None else out
+        self._executor.execute(inputs, out.matrices)
+        out.validity, out.null_counts = {}, {}
+        if self._nan_as_null:
+            for name, c in out.columns.items():
+                if c.dtype.kind != 'f':
+                    continue
+                invalid = np.isnan(c)
+                nulls = int(np.count_nonzero(invalid))
+                if nulls > 0:
+                    packed = np.packbits(~invalid, bitorder='little')
+                    v = _aligned_empty(_padded(packed.shape[0]))
+                    v[:packed.shape[0]] = packed
+                    v[packed.shape[0]:] = 0
+                    out.validity[name], out.null_counts[name] = v, nulls
+        return out
+
+
+class _ArrowSchema(ctypes.Structure):
+    pass
+
+
+class _ArrowArray(ctypes.Structure):
+    pass
+
+
+_SchemaRelease = ctypes.CFUNCTYPE(None, ctypes.POINTER(_ArrowSchema))
+_ArrayRelease = ctypes.CFUNCTYPE(None, ctypes.POINTER(_ArrowArray))
+
+# Struct definitions from the Arrow C Data Interface specification.
+_ArrowSchema._fields_ = [
+    ('format', ctypes.c_char_p),
+    ('name', ctypes.c_char_p),
+    ('metadata', ctypes.c_char_p),
+    ('flags', ctypes.c_int64),
+    ('n_children', ctypes.c_int64),
+    ('children', ctypes.POINTER(ctypes.POINTER(_ArrowSchema))),
+    ('dictionary', ctypes.POINTER(_ArrowSchema)),
+    ('release', _SchemaRelease),
+    ('private_data', ctypes.c_void_p)
+]
+_ArrowArray._fields_ = [
+    ('length', ctypes.c_int64),
+    ('null_count', ctypes.c_int64),
+    ('offset', ctypes.c_int64),
+    ('n_buffers', ctypes.c_int64),
+    ('n_children', ctypes.c_int64),
+    ('buffers', ctypes.POINTER(ctypes.c_void_p)),
+    ('children', ctypes.POINTER(ctypes.POINTER(_ArrowArray))),
+    ('dictionary', ctypes.POINTER(_ArrowArray)),
+    ('release', _ArrayRelease),
+    ('private_data', ctypes.c_void_p)
+]
+
+
+class _CDataExport:
+    """
+    Export of an ArrowBatch through the Arrow C Data Interface with ctypes. Every exported struct, the parents and the
+    children, has a key in `_alive`, the private_data of the struct. The value keeps the Numpy buffers and the ctypes
+    objects the struct points to alive. Releasing a struct removes its key, releasing a parent also releases the
+    children that were not moved by the consumer. The memory is freed once all keys of an export are gone.
+    """
+    _keys = itertools.count(1)
+    _alive: Dict[int, Tuple[Any, ...]] = {}
+
+    @classmethod
+    def export(cls, batch: ArrowBatch, array_address: int, schema_address: int):
+        keep: List[Any] = [batch]
+        schemas = [cls._schema(_ARROW_FORMATS[c.dtype], n, _ARROW_FLAG_NULLABLE, [], keep)
+                   for n, c in batch.columns.items()]
+        arrays = []
+        for n, c in batch.columns.items():
+            v = batch.validity.get(n, None)
+            arrays.append(cls._array(batch.rows, batch.null_counts.get(n, 0), [v, c], [], keep))
+        cls._fill_schema(_ArrowSchema.from_address(schema_address), '+s', '', 0, schemas, keep)
+        cls._fill_array(_ArrowArray.from_address(array_address), batch.rows, 0, [None], arrays, keep)
+
+    @classmethod
+    def _key(cls, keep: List[Any]) -> int:
+        k = next(cls._keys)
+        cls._alive[k] = (keep,)
+        return k
+
+    @classmethod
+    def _schema(cls, fmt: str, name: str, flags: int, children: List[_ArrowSchema], keep: List[Any]) -> _ArrowSchema:
+        s = _ArrowSchema()
+        keep.append(s)
+        cls._fill_schema(s, fmt, name, flags, children, keep)
+        return s
+
+    @classmethod
+    def _fill_schema(cls, s: _ArrowSchema, fmt: str, name: str, flags: int, children: List[_ArrowSchema],
+                     keep: List[Any]):
+        fmt_b, name_b = ctypes.create_string_buffer(fmt.encode()), ctypes.create_string_buffer(name.encode())
+        pointers = (ctypes.POINTER(_ArrowSchema) * len(children))(*[ctypes.pointer(c) for c in children])
+        keep.extend([fmt_b, name_b, pointers])
+        s.format = ctypes.cast(fmt_b, ctypes.c_char_p)
+        s.name = ctypes.cast(name_b, ctypes.c_char_p)
+        s.metadata = None
+        s.flags = flags
+        s.n_children = len(children)
+        s.children = pointers
+        s.dictionary = None
+        s.release = _release_schema
+        s.private_data = cls._key(keep)
+
+    @classmethod
+    def _array(cls, length: int, null_count: int, buffers: List[Optional[np.ndarray]], children: List[_ArrowArray],
+               keep: List[Any]) -> _ArrowArray:
+        a = _ArrowArray()
+        keep.append(a)
+        cls._fill_array(a, length, null_count, buffers, children, keep)
+        return a
+
+    @classmethod
+    def _fill_array(cls, a: _ArrowArray, length: int, null_count: int, buffers: List[Optional[np.ndarray]],
+                    children: List[_ArrowArray], keep: List[Any]):
+        addresses = (ctypes.c_void_p * len(buffers))(*[None if b is None else b.ctypes.data for b in buffers])
+        pointers = (ctypes.POINTER(_ArrowArray) * len(children))(*[ctypes.pointer(c) for c in children])
+        keep.extend([addresses, pointers])
+        a.length = length
+        a.null_count = null_count
+        a.offset = 0
+        a.n_buffers = len(buffers)
+        a.n_children = len(children)
+        a.buffers = addresses
+        a.children = pointers
+        a.dictionary = None
+        a.release = _release_array
+        a.private_data = cls._key(keep)
+
+    @classmethod
+    def release(cls, s: Any):
+        # Works for both struct types. A released struct has a NULL release callback.
+        for i in range(s.n_children):
+            child = s.children[i].contents
+            if child.release:
+                child.release(s.children[i])
+        cls._alive.pop(s.private_data, None)
+        s.release = type(s.release)()
+
+
+@_SchemaRelease
+def _release_schema(schema):
+    _CDataExport.release(schema.contents)
+
+
+@_ArrayRelease
+def _release_array(array):
+    _CDataExport.release(array.contents)
@@ -0,0 +1,275 @@
+"""
+Batch executor. Builds all features of a TensorDefinition for a batch of rows with the feature transform methods,
+writing the output features in place into one pre-allocated matrix per LearningCategory.
+(c) 2023 tsm
+"""
+import threading
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.feature import Feature, FeatureExpander
+from ..common.learningcategory import LearningCategory
+from ..features.featurelabelbinary import FeatureLabelBinary, BinaryLabelCounts
+from ..features.featuresource import FeatureSource
+from ..tensor.dtypepolicy import DtypePolicy, DTYPE_POLICY_DEFAULT
+from ..tensor.tensordefinition import TensorDefinition
+from ..tensor.featurefingerprint import FeatureFingerprint
+from ..tensor.tensorplan import TensorDefinitionPlan
+from .featurecache import FeatureCache
+from .profile import FeatureProfiler
+
+
+class BatchExecutor:
+    """
+    Executor that builds a TensorDefinition with the `transform` method of the features.
+
+    The features of the TensorDefinition are grouped per LearningCategory. For each LearningCategory one matrix of
+    shape (rows, columns) is allocated, each feature gets a column, expander features get one column per expand name.
+    The features write their values directly into their column(s), there are no per-feature output arrays that need to
+    be concatenated. Intermediate (embedded) features are kept only as long as a later feature needs them.
+
+    The TensorDefinition must be ready for inference and can not be series based.
+
+    The dtype of the matrices is decided by the DtypePolicy. The default policy uses the types of the features, with
+    DTYPE_POLICY_COMPACT continuous features are float32 and binary and categorical features use the smallest integer
+    type that fits.
+
+    If a FeatureProfiler is set, the cost of each feature is recorded in it. Without profiler no timing calls are made.
+
+    FeatureLabelBinary features are validated while they are built and their class counts are added up over all
+    executed batches, see `label_counts`, so the class balance is known without scanning the labels again.
+
+    If a FeatureCache is set, the built values of the derived features are looked up in and added to the cache, keyed
+    by the fingerprint of the feature in the plan and of the source data of the batch. As with the aliases of the plan,
+    an executor must be re-created if a feature changes after it was created. Source features are read from the inputs
+    and labels are always built, so their counts are kept. The index of the cache is flushed at the end of each batch.
+
+    `execute` can be called from several threads at once, as the BatchCoalescer does when it runs on a thread pool.
+    The batches are not serialized, the features are built from local state only and Numpy releases the GIL for most
+    of the work. The state shared between batches, the label counts, the FeatureProfiler and the FeatureCache, is
+    updated under a lock.
+
+    Args:
+        td: The TensorDefinition to build.
+        profiler: (Optional) A FeatureProfiler to record the per-feature cost in.
+        dtype_policy: (Optional) The DtypePolicy of the output matrices. Default is DTYPE_POLICY_DEFAULT.
+        cache: (Optional) A FeatureCache to re-use built features from.
+    """
+    def __init__(self, td: TensorDefinition, profiler: Optional[FeatureProfiler] = None,
+                 dtype_policy: DtypePolicy = DTYPE_POLICY_DEFAULT, cache: Optional[FeatureCache] = None):
+        self._val_can_execute(td)
+        self._profiler = profiler
+        self._cache = cache
+        self._dtype_policy = dtype_policy
+        self._plan = TensorDefinitionPlan(td)
+        self._layout: Dict[LearningCategory, List[Tuple[Feature, slice]]] = {}
+        self._dtypes: Dict[LearningCategory, np.dtype] = {}
+        self._columns: Dict[str, Tuple[LearningCategory, slice]] = {}
+        for lc in td.learning_categories:
+            features, start = td.filter_features(lc), 0
+            self._layout[lc] = []
+            for f in features:
+                s = slice(start, start + f.transform_width)
+                self._layout[lc].append((f, s))
+                self._columns[f.name] = (lc, s)
+                start = s.stop
+            self._dtypes[lc] = dtype_policy.category_dtype(lc, features)
+        self._last_use = self._calculate_last_use(self._plan)
+        self._labels = set(
+            i for i, s in enumerate(self._plan.steps) if isinstance(s.feature, FeatureLabelBinary) and not s.is_alias
+        )
+        self._label_counts: Dict[str, BinaryLabelCounts] = {}
+        self._lock = threading.Lock()
+        self._cacheable = set(
+            i for i, s in enumerate(self._plan.steps)
+            if not s.is_alias and i not in self._labels and not isinstance(s.feature, FeatureSource)
+        )
+
+    def __repr__(self):
+        return f'BatchExecutor : {self._plan.tensor_definition.name}'
+
+    @property
+    def plan(self) -> TensorDefinitionPlan:
+        return self._plan
+
+    @property
+    def profiler(self) -> Optional[FeatureProfiler]:
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Optional[FeatureProfiler]):
+        self._profiler = profiler
+
+    @property
+    def cache(self) -> Optional[FeatureCache]:
+        return self._cache
+
+    @property
+    def layout(self) -> Dict[LearningCategory, List[Tuple[Feature, slice]]]:
+        """
+        The layout of the output matrices.
+
+        Returns:
+            A dictionary with the LearningCategory as key and a list of (feature, column slice) tuples as value.
+        """
+        return self._layout
+
+    @property
+    def dtype_policy(self) -> DtypePolicy:
+        return self._dtype_policy
+
+    @property
+    def dtypes(self) -> Dict[LearningCategory, np.dtype]:
+        """
+        The dtypes of the output matrices.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the Numpy dtype of its matrix as value.
+        """
+        return self._dtypes
+
+    @property
+    def row_bytes(self) -> int:
+        """
+        The number of bytes one row takes in all output matrices together.
+
+        Returns:
+            The size of a row in bytes.
+        """
+        return sum(fs[-1][1].stop * self._dtypes[lc].itemsize for lc, fs in self._layout.items() if len(fs) > 0)
+
+    @property
+    def label_counts(self) -> Dict[str, BinaryLabelCounts]:
+        """
+        The class counts of the FeatureLabelBinary features over all batches executed since the last reset.
+
+        Returns:
+            A dictionary with the name of the label feature as key and a BinaryLabelCounts object as value.
+        """
+        with self._lock:
+            return dict(self._label_counts)
+
+    def reset_label_counts(self):
+        with self._lock:
+            self._label_counts = {}
+
+    def allocate(self, rows: int) -> Dict[LearningCategory, np.ndarray]:
+        """
+        Allocate the output matrices for a number of rows.
+
+        Args:
+            rows: The number of rows.
+
+        Returns:
+            A dictionary with the LearningCategory as key and an uninitialized Numpy array as value.
+        """
+        return {
+            lc: np.empty((rows, fs[-1][1].stop if len(fs) > 0 else 0), dtype=self._dtypes[lc])
+            for lc, fs in self._layout.items()
+        }
+
+    def execute(self, inputs: Mapping[str, np.ndarray], out: Optional[Dict[LearningCategory, np.ndarray]] = None,
+                source_fingerprint: Optional[str] = None) -> Dict[LearningCategory, np.ndarray]:
+        """
+        Build the TensorDefinition for a batch of rows.
+
+        Args:
+            inputs: A mapping with the names of the source features as keys and 1-D Numpy arrays with the raw values
+                as values. All arrays must have the same length.
+            out: (Optional) Output matrices as returned by `allocate`. Can be used to re-use the memory between batches.
+            source_fingerprint: (Optional) The fingerprint of the source data of the batch, used as key in the cache,
+                see `FeatureFingerprint.source_file`. Only used if the executor has a cache. If not given, the
+                fingerprint is calculated from the inputs with `FeatureFingerprint.source_arrays`.
+
+        Returns:
+            A dictionary with the LearningCategory as key and a Numpy array of shape (rows, columns) as value.
+        """
+        rows = self._val_inputs(inputs)
+        out = self.allocate(rows) if out is None else out
+        self._val_out(out, rows)
+        values: Dict[str, np.ndarray] = dict(inputs)
+        profiler, cache = self._profiler, self._cache
+        if cache is not None and source_fingerprint is None:
+            source_fingerprint = FeatureFingerprint.source_arrays(dict(inputs))
+        for i, step in enumerate(self._plan.steps):
+            f = step.feature
+            target = self._target(f, out)
+            cacheable = cache is not None and i in self._cacheable
+            cached = cache.get(f, source_fingerprint, step.fingerprint) if cacheable else None
+            if step.is_alias or cached is not None:
+                r = values[step.alias_of.name] if step.is_alias else cached
+                if target is not None:
+                    target[...] = r
+                    r = target
+                if profiler is not None:
+                    profiler.hit(f, rows)
+            elif i in self._labels:
+                if profiler is None:
+                    r, counts = f.transform_counts(values, target)
+                else:
+                    r, counts = profiler.run(f, rows, f.transform_counts, values, target)
+                with self._lock:
+                    self._label_counts[f.name] = self._label_counts.get(f.name, BinaryLabelCounts()) + counts
+            else:
+                if profiler is None:
+                    r = f.transform(values, target)
+                else:
+                    r = profiler.run(f, rows, f.transform, values, target)
+                if cacheable:
+                    cache.put(f, source_fingerprint, r, step.fingerprint)
+            values[f.name] = r
+            for name in self._last_use.get(i, []):
+                values.pop(name, None)
+        if cache is not None:
+            cache.flush()
+        return out
+
+    def _target(self, feature: Feature, out: Dict[LearningCategory, np.ndarray]) -> Optional[np.ndarray]:
+        c = self._columns.get(feature.name, None)
+        if c is None:
+            return None
+        lc, s = c
+        # Expanders write a block of columns, other features a single column.
+        return out[lc][:, s] if isinstance(feature, FeatureExpander) else out[lc][:, s.start]
+
+    @staticmethod
+    def _calculate_last_use(plan: TensorDefinitionPlan) -> Dict[int, List[str]]:
+        # For each step, the features that are no longer needed after that step.
+        last: Dict[str, int] = {}
+        for i, step in enumerate(plan.steps):
+            for d in TensorDefinitionPlan.dependencies(step.feature):
+                last[d.name] = i
+            if step.is_alias:
+                last[step.alias_of.name] = i
+        r: Dict[int, List[str]] = {}
+        for name, i in last.items():
+            r.setdefault(i, []).append(name)
+        return r
+
+    @staticmethod
+    def _val_can_execute(td: TensorDefinition):
+        if td.is_series_based:
+            raise FeatureRunTimeException(f'Can not build series based TensorDefinition <{td.name}> in batches')
+        if not td.inference_ready:
+            raise FeatureRunTimeException(
+                f'TensorDefinition <{td.name}> is not ready for inference. Features not ready ' +
+                f'{[f.name for f in td.features_not_inference_ready()]}'
+            )
+
+    @staticmethod
+    def _val_inputs(inputs: Mapping[str, np.ndarray]) -> int:
+        lengths = set(v.shape[0] for v in inputs.values())
+        if len(lengths) != 1:
+            raise FeatureRunTimeException(f'All inputs should have the same number of rows. Got lengths {lengths}')
+        return lengths.pop()
+
+    def _val_out(self, out: Dict[LearningCategory, np.ndarray], rows: int):
+        for lc, fs in self._layout.items():
+            o = out.get(lc, None)
+            shape = (rows, fs[-1][1].stop if len(fs) > 0 else 0)
+            if o is None or o.shape != shape:
+                raise FeatureRunTimeException(
+                    f'Output for <{lc.name}> should have shape {shape}. Got {None if o is None else o.shape}'
+                )
@@ -0,0 +1,199 @@
+"""
+Micro-batching coalescer. Collects single records submitted from asyncio code into small batches and builds each batch
+with one vectorized BatchExecutor call.
+(c) 2023 tsm
+"""
+import asyncio
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.learningcategory import LearningCategory
+from ..features.featuresource import FeatureSource
+from .batch import BatchExecutor
+
+
+@dataclass
+class CoalescerMetrics:
+    """
+    Counters of a BatchCoalescer. `batch_sizes` holds the number of batches per batch size. A batch is flushed either
+    because it reached `max_records` (full) or because the oldest record waited `max_latency_us` (timed) or because
+    `flush` was called explicitly.
+    """
+    batches: int = 0
+    records: int = 0
+    full_flushes: int = 0
+    timed_flushes: int = 0
+    explicit_flushes: int = 0
+    failed_batches: int = 0
+    batch_sizes: Counter = field(default_factory=Counter)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.records / self.batches if self.batches > 0 else 0.0
+
+    def percentile(self, q: float) -> int:
+        """
+        Percentile of the batch size distribution.
+
+        Args:
+            q: The percentile, between 0 and 100.
+
+        Returns:
+            The smallest batch size so that at least q percent of the batches are that size or smaller. 0 if no
+            batches were run.
+        """
+        if self.batches == 0:
+            return 0
+        threshold, seen = q / 100 * self.batches, 0
+        for size in sorted(self.batch_sizes):
+            seen += self.batch_sizes[size]
+            if seen >= threshold:
+                return size
+        return max(self.batch_sizes)
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'full_flushes': self.full_flushes,
+            'timed_flushes': self.timed_flushes,
+            'explicit_flushes': self.explicit_flushes,
+            'failed_batches': self.failed_batches,
+            'mean_batch_size': self.mean_batch_size,
+            'batch_sizes': {str(k): v for k, v in sorted(self.batch_sizes.items())}
+        }
+
+
+class BatchCoalescer:
+    """
+    Coalesces records submitted one at a time into micro-batches for a BatchExecutor.
+
+    Callers `await submit(record)` from asyncio code. The record is queued, the batch is built as soon as either
+    `max_records` records are queued or the first queued record has waited `max_latency_us` microseconds. The
+    BatchExecutor then builds all queued records in one call and each caller gets its own row back. A record is never
+    held longer than `max_latency_us` (plus the time to build the batch it is in).
+
+    By default the batch is built on the event loop thread, which is the fastest option for small TensorDefinitions.
+    For expensive TensorDefinitions a `concurrent.futures.Executor` can be given, the batches are then built on that
+    executor and the event loop keeps accepting records while a batch runs. Several batches can then run at the same
+    time on the one BatchExecutor, its `execute` is safe to call from several threads.
+
+    Args:
+        executor: The BatchExecutor to build the batches with.
+        max_latency_us: The maximum time in microseconds a record waits for its batch to fill up.
+        max_records: The maximum number of records in a batch.
+        pool: (Optional) A concurrent.futures.Executor to build the batches on.
+    """
+    def __init__(self, executor: BatchExecutor, max_latency_us: int = 1000, max_records: int = 256,
+                 pool: Optional[Executor] = None):
+        if max_latency_us < 0:
+            raise FeatureRunTimeException(f'max_latency_us must be >= 0. Got {max_latency_us}')
+        if max_records < 1:
+            raise FeatureRunTimeException(f'max_records must be >= 1. Got {max_records}')
+        self._executor = executor
+        self._max_latency = max_latency_us / 1_000_000
+        self._max_records = max_records
+        self._pool = pool
+        self._sources: List[FeatureSource] = [
+            s.feature for s in executor.plan.steps if isinstance(s.feature, FeatureSource) and not s.is_alias
+        ]
+        self._pending: List[Tuple[Mapping[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: List[asyncio.Task] = []
+        self._metrics = CoalescerMetrics()
+
+    def __repr__(self):
+        return f'BatchCoalescer : max_latency_us={int(self._max_latency * 1_000_000)} max_records={self._max_records}'
+
+    @property
+    def metrics(self) -> CoalescerMetrics:
+        return self._metrics
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, record: Mapping[str, Any]) -> Dict[LearningCategory, np.ndarray]:
+        """
+        Submit a record and wait for it to be built.
+
+        Args:
+            record: A mapping with the names of the source features as keys and the raw values as values.
+
+        Returns:
+            A dictionary with the LearningCategory as key and a 1-D Numpy array, the row of this record, as value.
+        """
+        missing = [s.name for s in self._sources if s.name not in record]
+        if len(missing) > 0:
+            raise FeatureRunTimeException(f'No input value for features {missing} in record')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future))
+        if len(self._pending) >= self._max_records:
+            self._metrics.full_flushes += 1
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_latency, self._on_timer)
+        return await future
+
+    async def flush(self):
+        """
+        Build the queued records now, without waiting for the batch to fill up, and wait for all running batches.
+        """
+        if len(self._pending) > 0:
+            self._metrics.explicit_flushes += 1
+            self._dispatch()
+        if len(self._running) > 0:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _on_timer(self):
+        self._timer = None
+        if len(self._pending) > 0:
+            self._metrics.timed_flushes += 1
+            self._dispatch()
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        self._metrics.batches += 1
+        self._metrics.records += len(batch)
+        self._metrics.batch_sizes[len(batch)] += 1
+        if self._pool is None:
+            self._resolve(batch, *self._run(batch))
+        else:
+            task = asyncio.get_running_loop().create_task(self._run_in_pool(batch))
+            self._running.append(task)
+            task.add_done_callback(self._running.remove)
+
+    async def _run_in_pool(self, batch: List[Tuple[Mapping[str, Any], asyncio.Future]]):
+        result, error = await asyncio.get_running_loop().run_in_executor(self._pool, self._run, batch)
+        self._resolve(batch, result, error)
+
+    def _run(self, batch: List[Tuple[Mapping[str, Any], asyncio.Future]]) \
+            -> Tuple[Optional[Dict[LearningCategory, np.ndarray]], Optional[BaseException]]:
+        # Never raises, errors are handed to the futures of the batch.
+        try:
+            inputs = {s.name: np.array([r[s.name] for r, _ in batch]) for s in self._sources}
+            return self._executor.execute(inputs), None
+        except Exception as e:
+            return None, e
+
+    def _resolve(self, batch: List[Tuple[Mapping[str, Any], asyncio.Future]],
+                 result: Optional[Dict[LearningCategory, np.ndarray]], error: Optional[BaseException]):
+        if error is not None:
+            self._metrics.failed_batches += 1
+        for i, (_, future) in enumerate(batch):
+            # The caller may have been cancelled while waiting.
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result({lc: m[i] for lc, m in result.items()})
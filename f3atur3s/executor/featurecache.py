@@ -0,0 +1,296 @@
+"""
+On-disk cache of built feature columns. Columns are stored as Numpy .npy files and memory-mapped when read.
+(c) 2023 tsm
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Any
+
+import numpy as np
+
+from ..common.feature import Feature
+from ..common.exception import FeatureRunTimeException
+from ..tensor.tensordefinition import TensorDefinition
+from ..tensor.featurefingerprint import FeatureFingerprint
+
+CACHE_INDEX_FILE = 'index.json'
+
+
+@dataclass
+class FeatureCacheStats:
+    """
+    Hit/Miss statistics of a FeatureCache.
+    """
+    hits: int = 0
+    misses: int = 0
+    puts: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+class FeatureCache:
+    """
+    A local columnar cache of built features. There is one file per feature per source-data fingerprint. The key of
+    an entry is the fingerprint of the feature definition (See FeatureFingerprint) combined with the fingerprint of the
+    source data. Changing the definition of a feature changes its fingerprint and that of all its dependents, so
+    stale entries are never returned. They are aged out by the LRU eviction, or can be removed with `invalidate`.
+
+    Entries are evicted in least-recently-used order as soon as the total size of the cache exceeds `max_bytes`. The
+    access times are kept in memory and written to the index on disk when entries are evicted, on `flush` and on
+    `close`, so the order survives re-opening the cache in another process. The BatchExecutor flushes at the end of
+    each batch. New entries that were not flushed are not seen by other processes.
+
+    Features with a unique fingerprint, see `FeatureFingerprint.is_unique`, are never cached.
+
+    A cache can be shared by threads, the index and the files are only changed under a lock. It should not be opened
+    by several processes that write to it at the same time.
+
+    Args:
+        directory: The directory to store the cache in. Will be created if it does not exist.
+        max_bytes: The maximum size in bytes of all the files in the cache. Default is 10Gb
+    """
+    def _val_max_bytes(self):
+        if self._max_bytes <= 0:
+            raise FeatureRunTimeException(f'The max_bytes of a FeatureCache must be > 0. Got <{self._max_bytes}>')
+
+    def __init__(self, directory: str, max_bytes: int = 10 * 1024 ** 3):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._val_max_bytes()
+        self._stats = FeatureCacheStats()
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._read_index()
+        # True if the index was changed since it was last written.
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return f'FeatureCache : {self._directory}'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def stats(self) -> FeatureCacheStats:
+        """
+        Hit and miss statistics of this cache since it was created.
+
+        Returns:
+            A FeatureCacheStats object
+        """
+        return self._stats
+
+    @property
+    def size(self) -> int:
+        """
+        Total size in bytes of the entries in the cache
+
+        Returns:
+            The size of the cache in bytes.
+        """
+        with self._lock:
+            return sum(e['bytes'] for e in self._index.values())
+
+    @staticmethod
+    def key(feature: Feature, source_fingerprint: str, fingerprint: Optional[str] = None) -> str:
+        """
+        Create the cache key of a feature built from a specific source.
+
+        Args:
+            feature: The feature to build the key for.
+            source_fingerprint: A fingerprint of the source data, see `FeatureFingerprint.source_file` and
+                `FeatureFingerprint.source_arrays`.
+            fingerprint: (Optional) The fingerprint of the feature if it is already known, for instance from a
+                TensorDefinitionPlan. If not given, it is calculated with `FeatureFingerprint.feature`.
+
+        Returns:
+            A string key
+        """
+        fp = FeatureFingerprint.feature(feature) if fingerprint is None else fingerprint
+        return f'{fp}-{source_fingerprint}'
+
+    def get(self, feature: Feature, source_fingerprint: str, fingerprint: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Look up a feature in the cache. If found the values will be returned as a read-only memory-mapped array.
+
+        Args:
+            feature: The feature to look up
+            source_fingerprint: The fingerprint of the source data the feature was built from.
+            fingerprint: (Optional) The fingerprint of the feature, see `key`.
+
+        Returns:
+            A memory-mapped Numpy array or None if the feature is not in the cache.
+        """
+        k = self.key(feature, source_fingerprint, fingerprint)
+        with self._lock:
+            entry = self._index.get(k, None)
+            if entry is None or not os.path.exists(self._file(k)):
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            entry['last_access'] = time.time()
+            self._dirty = True
+            return np.load(self._file(k), mmap_mode='r')
+
+    def put(self, feature: Feature, source_fingerprint: str, values: np.ndarray,
+            fingerprint: Optional[str] = None) -> bool:
+        """
+        Add the values of a feature to the cache. Object arrays can not be memory-mapped and are not cached, neither
+        are features with a unique fingerprint. The index is only written if entries had to be evicted.
+
+        Args:
+            feature: The feature the values belong to.
+            source_fingerprint: The fingerprint of the source data the feature was built from.
+            values: A Numpy array with the values of the feature.
+            fingerprint: (Optional) The fingerprint of the feature, see `key`.
+
+        Returns:
+            True if the values were added to the cache, False if they were not.
+        """
+        if values.dtype == object:
+            return False
+        k = self.key(feature, source_fingerprint, fingerprint)
+        if FeatureFingerprint.is_unique(k):
+            return False
+        with self._lock:
+            tmp = self._file(k) + '.tmp.npy'
+            np.save(tmp, values, allow_pickle=False)
+            os.replace(tmp, self._file(k))
+            self._index[k] = {
+                'feature': feature.name,
+                'bytes': os.path.getsize(self._file(k)),
+                'last_access': time.time()
+            }
+            self._dirty = True
+            self._stats.puts += 1
+            if self._evict() > 0:
+                self.flush()
+        return True
+
+    def get_or_compute(self, feature: Feature, source_fingerprint: str,
+                       compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Consult the cache before computing a feature. If it is not found the `compute` function is called and the
+        result is added to the cache.
+
+        Args:
+            feature: The feature to get.
+            source_fingerprint: The fingerprint of the source data the feature is built from.
+            compute: A function without arguments that returns the values of the feature.
+
+        Returns:
+            The values of the feature as Numpy array
+        """
+        values = self.get(feature, source_fingerprint)
+        if values is None:
+            values = compute()
+            self.put(feature, source_fingerprint, values)
+        return values
+
+    def invalidate(self, feature: Feature, td: Optional[TensorDefinition] = None) -> int:
+        """
+        Remove all entries of a feature from the cache. If a TensorDefinition is given, the entries of all features
+        of that definition that depend on the feature are removed as well.
+
+        Args:
+            feature: The feature to remove.
+            td: (Optional) A TensorDefinition in which to look for features that depend on `feature`.
+
+        Returns:
+            The number of removed entries.
+        """
+        names = {feature.name}
+        if td is not None:
+            names.update(f.name for f in td.dependents(feature))
+        with self._lock:
+            to_remove = [k for k, e in self._index.items() if e['feature'] in names]
+            for k in to_remove:
+                self._remove(k)
+            self.flush()
+        return len(to_remove)
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for k in list(self._index.keys()):
+                self._remove(k)
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the index of the cache to disk, if it changed since it was last written. The index keeps the entries
+        and the access times used by the LRU eviction.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = os.path.join(self._directory, CACHE_INDEX_FILE + '.tmp')
+            with open(tmp, 'w') as j_file:
+                json.dump(self._index, j_file)
+            os.replace(tmp, os.path.join(self._directory, CACHE_INDEX_FILE))
+            self._dirty = False
+
+    def close(self) -> None:
+        """
+        Write the index to disk. The cache can still be used after it was closed.
+
+        Returns:
+            None
+        """
+        self.flush()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self._directory, f'{key}.npy')
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        file = os.path.join(self._directory, CACHE_INDEX_FILE)
+        if not os.path.exists(file):
+            return {}
+        with open(file) as j_file:
+            index = json.load(j_file)
+        # Drop entries of which the file has gone.
+        return {k: e for k, e in index.items() if os.path.exists(self._file(k))}
+
+    def _remove(self, key: str) -> None:
+        self._index.pop(key, None)
+        self._dirty = True
+        if os.path.exists(self._file(key)):
+            os.remove(self._file(key))
+
+    def _evict(self) -> int:
+        size, evicted = self.size, 0
+        if size <= self._max_bytes:
+            return evicted
+        for k in sorted(self._index.keys(), key=lambda x: self._index[x]['last_access']):
+            if size <= self._max_bytes:
+                break
+            size -= self._index[k]['bytes']
+            self._remove(k)
+            evicted += 1
+        self._stats.evictions += evicted
+        return evicted
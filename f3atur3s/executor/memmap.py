@@ -0,0 +1,173 @@
+"""
+Out-of-core executor. Builds a TensorDefinition chunk by chunk into memory-mapped .npy files, one per LearningCategory,
+so data sets that do not fit in memory can be built and then memory-mapped by a training loop.
+(c) 2023 tsm
+"""
+import os
+from typing import Dict, Iterable, Mapping, Optional, TextIO, Union
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.learningcategory import LearningCategory
+from ..reader.sourcereader import SourceReader
+from ..tensor.dtypepolicy import DtypePolicy, DTYPE_POLICY_DEFAULT
+from ..tensor.tensordefinition import TensorDefinition
+from .batch import BatchExecutor
+from .profile import FeatureProfiler
+
+# Suffix of the files while they are being written. They are renamed once all rows are written.
+_PARTIAL_SUFFIX = '.partial'
+
+
+class MemmapExecutor:
+    """
+    Executor that writes the output matrices of a TensorDefinition directly into memory-mapped .npy files.
+
+    For each LearningCategory a file `<category>.npy` (for instance 'continuous.npy') is pre-allocated with
+    `np.lib.format.open_memmap`. The shape is (rows, columns) with the columns of the BatchExecutor layout and the dtype
+    of the DtypePolicy. The source is processed in chunks, each chunk is built by a BatchExecutor that writes straight
+    into the rows of the mapped files, so the memory needed is bounded by the size of a chunk, not by the number of
+    rows. The files are regular .npy files, `np.load(file, mmap_mode='r')` maps them without copying.
+
+    Only the features needed for the output matrices are built, features outside the model LearningCategories and
+    the sources they need are skipped. While a build runs the files have a '.partial' suffix, they only get their final
+    name once all rows are written, so an interrupted build never leaves files that look complete.
+
+    Args:
+        td: The TensorDefinition to build. It must be ready for inference and can not be series based.
+        directory: The directory to write the files to. It is created if it does not exist.
+        dtype_policy: (Optional) The DtypePolicy of the output matrices. Default is DTYPE_POLICY_DEFAULT.
+        profiler: (Optional) A FeatureProfiler to record the per-feature cost in.
+    """
+    def __init__(self, td: TensorDefinition, directory: str, dtype_policy: DtypePolicy = DTYPE_POLICY_DEFAULT,
+                 profiler: Optional[FeatureProfiler] = None):
+        self._td = td
+        self._directory = directory
+        self._executor = BatchExecutor(td.subset(categories=td.learning_categories, name=td.name), profiler,
+                                       dtype_policy)
+
+    def __repr__(self):
+        return f'MemmapExecutor : {self._td.name} directory={self._directory}'
+
+    @property
+    def executor(self) -> BatchExecutor:
+        return self._executor
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def files(self) -> Dict[LearningCategory, str]:
+        """
+        The files the output matrices are written to.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the name of the .npy file as value.
+        """
+        return {lc: os.path.join(self._directory, f'{lc.name.lower()}.npy') for lc in self._executor.layout.keys()}
+
+    def build(self, batches: Iterable[Mapping[str, np.ndarray]], rows: int) -> Dict[LearningCategory, np.ndarray]:
+        """
+        Build the TensorDefinition for a source that is given in batches. The batches must add up to exactly `rows`
+        rows, the files are allocated up front and a .npy file can not grow.
+
+        Args:
+            batches: An iterable of batches, mappings with the names of the source features as keys and 1-D Numpy
+                arrays as values. For instance the batches of a SourceReader.
+            rows: The total number of rows of all batches together.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the written file, memory-mapped read-only, as value.
+
+        Raises:
+            FeatureRunTimeException if the batches do not add up to `rows` rows.
+        """
+        if rows < 0:
+            raise FeatureRunTimeException(f'rows must be >= 0. Got {rows}')
+        os.makedirs(self._directory, exist_ok=True)
+        files = self.files
+        out: Dict[LearningCategory, np.memmap] = {}
+        try:
+            for lc, fs in self._executor.layout.items():
+                out[lc] = np.lib.format.open_memmap(
+                    files[lc] + _PARTIAL_SUFFIX, mode='w+', dtype=self._executor.dtypes[lc],
+                    shape=(rows, fs[-1][1].stop)
+                )
+            start = 0
+            for b in batches:
+                n = len(next(iter(b.values()), ()))
+                if start + n > rows:
+                    raise FeatureRunTimeException(f'The batches have more than the expected {rows} rows')
+                self._executor.execute(b, {lc: o[start:start + n] for lc, o in out.items()})
+                start += n
+            if start != rows:
+                raise FeatureRunTimeException(f'The batches have {start} rows. Expected {rows}')
+            for o in out.values():
+                o.flush()
+        except BaseException:
+            out.clear()
+            for f in files.values():
+                if os.path.exists(f + _PARTIAL_SUFFIX):
+                    os.remove(f + _PARTIAL_SUFFIX)
+            raise
+        out.clear()
+        for f in files.values():
+            os.replace(f + _PARTIAL_SUFFIX, f)
+        return self.load()
+
+    def build_csv(self, file: Union[str, TextIO], rows: Optional[int] = None, batch_rows: int = 65536,
+                  delimiter: str = ',', quote_char: str = '"',
+                  encoding: str = 'utf-8') -> Dict[LearningCategory, np.ndarray]:
+        """
+        Build the TensorDefinition from a CSV file, reading `batch_rows` rows at a time with a SourceReader.
+
+        Args:
+            file: The name of the file or an open text file.
+            rows: (Optional) The number of data rows in the file. If not given the file is read once to count them, an
+                open file must then be seekable.
+            batch_rows: The number of rows per chunk.
+            delimiter: The field delimiter.
+            quote_char: The quote character.
+            encoding: The encoding of the file, if a name is given.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the written file, memory-mapped read-only, as value.
+        """
+        if rows is None:
+            rows = SourceReader.count_csv(file, delimiter, quote_char, encoding)
+        reader = SourceReader(self._executor.plan.tensor_definition, batch_rows)
+        return self.build(reader.read_csv(file, delimiter, quote_char, encoding), rows)
+
+    def build_parquet(self, file: str, batch_rows: int = 65536) -> Dict[LearningCategory, np.ndarray]:
+        """
+        Build the TensorDefinition from a Parquet file, reading `batch_rows` rows at a time with a SourceReader.
+        Requires pyarrow.
+
+        Args:
+            file: The name of the file.
+            batch_rows: The number of rows per chunk.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the written file, memory-mapped read-only, as value.
+        """
+        reader = SourceReader(self._executor.plan.tensor_definition, batch_rows)
+        return self.build(reader.read_parquet(file), SourceReader.count_parquet(file))
+
+    def load(self, mmap_mode: Optional[str] = 'r') -> Dict[LearningCategory, np.ndarray]:
+        """
+        Map the files of a previous build.
+
+        Args:
+            mmap_mode: The mode passed to `np.load`. Default 'r', read-only without copying. None reads the files into
+                memory.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the (memory-mapped) matrix as value.
+        """
+        files = self.files
+        missing = [f for f in files.values() if not os.path.exists(f)]
+        if len(missing) > 0:
+            raise FeatureRunTimeException(f'Can not find files {missing}. Has the TensorDefinition been built?')
+        return {lc: np.load(f, mmap_mode=mmap_mode) for lc, f in files.items()}
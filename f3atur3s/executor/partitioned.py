@@ -0,0 +1,249 @@
+"""
+Multi-process executor for expression features. It splits the rows into partitions and evaluates them in a pool of
+worker processes. Inputs and outputs are held in shared memory, so they are not copied to and from the workers.
+(c) 2023 tsm
+"""
+import itertools
+import multiprocessing
+import os
+import pickle
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple, Optional, Union
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.featuretype import FeatureTypeNumerical
+from ..features.featureexpression import FeatureExpression, FeatureExpressionSeries
+from ..features.featurevirtual import FeatureVirtual
+
+# Name, shape and dtype of an array in shared memory
+_SharedSpec = Tuple[str, Tuple[int, ...], str]
+# The expression and the input and output arrays of a call
+_Call = Tuple[Union[FeatureExpression, FeatureExpressionSeries], List[_SharedSpec], _SharedSpec]
+
+# Numbers the calls of all executors in a process. With the process id, it gives a unique name per call.
+_calls = itertools.count()
+
+# State of a worker process. The call the worker last ran a partition of.
+_worker_call: Optional[str] = None
+_worker_task: Optional[_Call] = None
+
+
+def _attach_segment(name: str) -> SharedMemory:
+    # The segment is owned, and unlinked, by the parent. It must not be registered with the resource tracker by the
+    # worker, the tracker would unlink it when a worker with its own tracker exits. With a tracker shared with the
+    # parent, unregistering after the attach is no option either, the parent's registration would be removed and a
+    # second worker's unregister would fail. Before 3.13 there is no 'track=False', so registration is switched off
+    # while attaching. Worker processes run one partition at a time, no other thread can be registering.
+    if sys.version_info >= (3, 13):
+        shm = SharedMemory(name=name, track=False)
+    else:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            shm = SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+    return shm
+
+
+def _attach(spec: _SharedSpec) -> Tuple[SharedMemory, np.ndarray]:
+    name, shape, dtype = spec
+    shm = _attach_segment(name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _pickle_feature(feature: Union[FeatureExpression, FeatureExpressionSeries]) -> bytes:
+    # Only the expression and what is needed to evaluate it is sent. The parameter features become virtual features.
+    vectorized = getattr(feature, 'vectorized', None)
+    params = [(pf.name, pf.type) for pf in feature.param_features]
+    return pickle.dumps((feature.__class__, feature.name, feature.type, feature.expression, params, vectorized))
+
+
+def _unpickle_feature(feature_pickle: bytes) -> Union[FeatureExpression, FeatureExpressionSeries]:
+    f_class, name, tp, expression, params, vectorized = pickle.loads(feature_pickle)
+    pf = [FeatureVirtual(n, t) for n, t in params]
+    return f_class(name, tp, expression, pf) if vectorized is None else f_class(name, tp, expression, pf, vectorized)
+
+
+def _read_call(call: str) -> _Call:
+    # The description of a call is in a shared segment named after the call.
+    shm = _attach_segment(call)
+    try:
+        feature_pickle, input_specs, output_spec = pickle.loads(shm.buf)
+    finally:
+        shm.close()
+    return _unpickle_feature(feature_pickle), input_specs, output_spec
+
+
+def _run_partition(call: str, start: int, end: int) -> int:
+    # The call is read and the expression un-pickled once per call in each worker, not once per partition.
+    global _worker_call, _worker_task
+    if _worker_call != call:
+        _worker_task, _worker_call = _read_call(call), call
+    feature, input_specs, output_spec = _worker_task
+    shms, arrays = zip(*[_attach(s) for s in input_specs + [output_spec]])
+    try:
+        arrays[-1][start:end] = feature.evaluate([a[start:end] for a in arrays[:-1]])
+    finally:
+        # The arrays must be gone before the segments can be closed.
+        del arrays
+        for shm in shms:
+            shm.close()
+    return end - start
+
+
+class PartitionedExpressionExecutor:
+    """
+    Executor that evaluates a FeatureExpression or FeatureExpressionSeries in a pool of processes. The rows are split
+    into partitions of `partition_size` rows. Input arrays are placed in shared memory and each worker writes its
+    partition of the output directly into a shared output array. The expression is pickled once per call and written,
+    with the names of the shared arrays, to a shared memory segment named after the call. A partition task only sends
+    the name of the call and its row range. A worker reads the call from shared memory and un-pickles the expression
+    the first time it runs a partition of the call, not once per partition.
+
+    The pool of worker processes is started on the first call to `execute` and kept for the lifetime of the executor,
+    so the workers are re-used between calls. Call `close` to stop the workers, or use the executor as a context
+    manager.
+
+    The expression must be picklable, i.e. it must be a function defined at module level, not a lambda. The output
+    type of the feature must be numerical and the inputs can not be Numpy object arrays.
+
+    Args:
+        workers: The number of worker processes. Defaults to the number of CPUs.
+        partition_size: The number of rows in a partition.
+        mp_context: (Optional) The multiprocessing start method. 'fork', 'spawn' or 'forkserver'.
+    """
+    def _val_workers(self):
+        if self._workers < 1 or self._partition_size < 1:
+            raise FeatureRunTimeException(
+                f'Workers and partition_size must be > 0. Got <{self._workers}> and <{self._partition_size}>'
+            )
+
+    def __init__(self, workers: Optional[int] = None, partition_size: int = 100_000,
+                 mp_context: Optional[str] = None):
+        self._workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._partition_size = partition_size
+        self._mp_context = multiprocessing.get_context(mp_context)
+        self._val_workers()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __repr__(self):
+        return f'PartitionedExpressionExecutor : workers={self._workers} partition_size={self._partition_size}'
+
+    def __enter__(self) -> 'PartitionedExpressionExecutor':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def partition_size(self) -> int:
+        return self._partition_size
+
+    def close(self):
+        """
+        Stop the worker processes. The executor can still be used, a next call to `execute` starts a new pool.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def partitions(self, rows: int) -> List[Tuple[int, int]]:
+        """
+        Split a number of rows into partitions.
+
+        Args:
+            rows: The total number of rows
+
+        Returns:
+            A list of (start, end) tuples.
+        """
+        return [(s, min(s + self._partition_size, rows)) for s in range(0, rows, self._partition_size)]
+
+    def execute(self, feature: Union[FeatureExpression, FeatureExpressionSeries],
+                params: List[np.ndarray]) -> np.ndarray:
+        """
+        Evaluate an expression feature.
+
+        Args:
+            feature: The FeatureExpression or FeatureExpressionSeries to evaluate.
+            params: A list of Numpy arrays. One per parameter feature, in the order of the param_features. All arrays
+                must have the same length along the first dimension.
+
+        Returns:
+            A Numpy array with the values of the feature.
+        """
+        self._val_can_execute(feature, params)
+        rows = params[0].shape[0]
+        dtype = feature.type.numpy_type
+        parts = self.partitions(rows)
+        shared: List[SharedMemory] = []
+        try:
+            input_specs = [self._share(p, shared) for p in params]
+            output_spec = self._share(np.empty(rows, dtype=dtype), shared, copy=False)
+            output = shared[-1]
+            call = f'f3x{os.getpid()}_{next(_calls)}'
+            description = pickle.dumps((_pickle_feature(feature), input_specs, output_spec))
+            shm = SharedMemory(name=call, create=True, size=len(description))
+            shared.append(shm)
+            shm.buf[:len(description)] = description
+            try:
+                tasks = self._get_pool().map(_run_partition, [call] * len(parts), *zip(*parts))
+                done = sum(tasks)
+            except BrokenProcessPool as e:
+                self._pool = None
+                raise FeatureRunTimeException(f'A worker died while executing <{feature.name}>. Error <{e}>')
+            if done != rows:
+                raise FeatureRunTimeException(f'Partitioned execution of <{feature.name}> processed {done}/{rows} rows')
+            return np.ndarray((rows,), dtype=dtype, buffer=output.buf).copy()
+        finally:
+            for shm in shared:
+                shm.close()
+                shm.unlink()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._workers, mp_context=self._mp_context)
+        return self._pool
+
+    @staticmethod
+    def _share(a: np.ndarray, shared: List[SharedMemory], copy: bool = True) -> _SharedSpec:
+        shm = SharedMemory(create=True, size=max(a.nbytes, 1))
+        shared.append(shm)
+        if copy:
+            np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf)[...] = a
+        return shm.name, a.shape, a.dtype.str
+
+    @staticmethod
+    def _val_can_execute(feature: Union[FeatureExpression, FeatureExpressionSeries], params: List[np.ndarray]):
+        if len(params) == 0 or len(params) != len(feature.param_features):
+            raise FeatureRunTimeException(
+                f'Expected {len(feature.param_features)} parameter arrays for <{feature.name}>. Got {len(params)}'
+            )
+        if feature.is_lambda:
+            raise FeatureRunTimeException(
+                f'Can not execute <{feature.name}> in multiple processes. Lambdas are not serializable.'
+            )
+        if not isinstance(feature.type, FeatureTypeNumerical):
+            raise FeatureRunTimeException(
+                f'Can only execute numerical features in multiple processes. <{feature.name}> has type ' +
+                f'<{feature.type.name}>'
+            )
+        if any(p.dtype == object for p in params):
+            raise FeatureRunTimeException(
+                f'Can not place object arrays in shared memory. Inputs of <{feature.name}> must have a fixed dtype'
+            )
+        if len(set(p.shape[0] for p in params)) > 1:
+            raise FeatureRunTimeException(
+                f'All inputs of <{feature.name}> must have the same number of rows. Got {[p.shape for p in params]}'
+            )
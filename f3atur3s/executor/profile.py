@@ -0,0 +1,253 @@
+"""
+Per-feature profiling of executed TensorDefinitions. Collects the time, rows and memory spent on each feature and
+exports them as a report, as JSON or as a Chrome trace-event file (chrome://tracing or https://ui.perfetto.dev).
+(c) 2023 tsm
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.feature import Feature
+
+
+@dataclass
+class FeatureProfile:
+    """
+    Aggregated cost of one feature over all the batches it was built for. Times are in nanoseconds. `calls` and `rows`
+    only count the batches where the feature was built and timed, so `wall_ns / rows` is the cost of building a row.
+    `bytes` is the sum of the peak memory allocated while the feature was built, it is only measured for the calls
+    that were sampled. `cache_hits` and `hit_rows` count the batches and rows where the values were not built but
+    re-used, for instance because a structurally identical feature was already built or the values were cached.
+    """
+    name: str
+    feature_class: str
+    calls: int = 0
+    rows: int = 0
+    wall_ns: int = 0
+    cpu_ns: int = 0
+    bytes: int = 0
+    memory_samples: int = 0
+    cache_hits: int = 0
+    hit_rows: int = 0
+
+    @property
+    def wall_ns_per_row(self) -> float:
+        return self.wall_ns / self.rows if self.rows > 0 else 0.0
+
+
+class FeatureProfiler:
+    """
+    Collects per-feature profiles. Pass a profiler to an executor, for instance `BatchExecutor(td, profiler=p)`, the
+    executor then reports every feature it builds. Executors without a profiler do not make any timing calls.
+
+    Memory is measured with tracemalloc, which slows down the build considerably. It is off by default, if
+    `memory_sample_every` is set, the allocations of one in every `memory_sample_every` calls of each feature are
+    traced.
+
+    A profiler can be shared by executors running in several threads, the profiles and events are updated under a
+    lock. The tracemalloc peak is process wide though, memory samples of features built concurrently include each
+    other's allocations.
+
+    With `trace`, an event is kept for every call and cache hit, so a Chrome trace can be written. Only the last
+    `max_events` events are kept, so a profiler left on a long-running executor does not keep growing. The profiles
+    themselves have a fixed size per feature.
+
+    Args:
+        memory_sample_every: (Optional) Trace the memory of every n-th call of a feature. None or 0 disables the
+            memory tracing.
+        trace: If True, keep an event for every call, so a Chrome trace can be written. Default False.
+        max_events: The maximum number of events kept if `trace` is True, older events are dropped. Default 100_000.
+    """
+    def __init__(self, memory_sample_every: Optional[int] = None, trace: bool = False, max_events: int = 100_000):
+        if memory_sample_every is not None and memory_sample_every < 0:
+            raise FeatureRunTimeException(f'memory_sample_every must be >= 0. Got {memory_sample_every}')
+        if max_events < 1:
+            raise FeatureRunTimeException(f'max_events must be > 0. Got {max_events}')
+        self._memory_every = memory_sample_every or 0
+        self._trace = trace
+        self._max_events = max_events
+        self._profiles: Dict[str, FeatureProfile] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._origin_ns = time.perf_counter_ns()
+        self._started_tracemalloc = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'FeatureProfiler : features={len(self._profiles)} events={len(self._events)}'
+
+    @property
+    def profiles(self) -> Dict[str, FeatureProfile]:
+        return self._profiles
+
+    def _profile(self, feature: Feature) -> FeatureProfile:
+        p = self._profiles.get(feature.name, None)
+        if p is None:
+            p = FeatureProfile(feature.name, feature.__class__.__name__)
+            self._profiles[feature.name] = p
+        return p
+
+    def run(self, feature: Feature, rows: int, fn: Callable[..., np.ndarray], *args: Any) -> np.ndarray:
+        """
+        Build a feature and record its cost.
+
+        Args:
+            feature: The feature being built.
+            rows: The number of rows being built.
+            fn: The function that builds the feature, typically `feature.transform`.
+            args: The arguments to pass to fn.
+
+        Returns:
+            The result of fn.
+        """
+        with self._lock:
+            p = self._profile(feature)
+            sample = self._memory_every > 0 and p.calls % self._memory_every == 0
+            before = self._start_memory() if sample else 0
+        start_cpu, start = time.thread_time_ns(), time.perf_counter_ns()
+        r = fn(*args)
+        wall, cpu = time.perf_counter_ns() - start, time.thread_time_ns() - start_cpu
+        allocated = self._stop_memory(before) if sample else 0
+        with self._lock:
+            p.calls += 1
+            p.rows += rows
+            p.wall_ns += wall
+            p.cpu_ns += cpu
+            if sample:
+                p.bytes += allocated
+                p.memory_samples += 1
+            if self._trace:
+                event_args = {'rows': rows, 'cpu_us': cpu / 1000, 'bytes': allocated if sample else None}
+                self._event(p, start, wall, event_args)
+        return r
+
+    def hit(self, feature: Feature, rows: int):
+        """
+        Record that the values of a feature were re-used rather than built. Hits are counted apart from the built
+        calls, they do not change the time per row.
+
+        Args:
+            feature: The feature.
+            rows: The number of rows.
+        """
+        with self._lock:
+            p = self._profile(feature)
+            p.cache_hits += 1
+            p.hit_rows += rows
+            if self._trace:
+                self._event(p, time.perf_counter_ns(), 0, {'rows': rows, 'cache_hit': True})
+
+    def _event(self, p: FeatureProfile, start: int, wall: int, args: Dict[str, Any]):
+        self._events.append({
+            'name': p.name,
+            'cat': p.feature_class,
+            'ph': 'X',
+            'ts': (start - self._origin_ns) / 1000,
+            'dur': wall / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args
+        })
+
+    def _start_memory(self) -> int:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    @staticmethod
+    def _stop_memory(before: int) -> int:
+        return max(0, tracemalloc.get_traced_memory()[1] - before)
+
+    def stop(self):
+        """
+        Stop the memory tracing, if this profiler started it.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def reset(self):
+        """
+        Remove all collected profiles and events.
+        """
+        with self._lock:
+            self._profiles = {}
+            self._events = deque(maxlen=self._max_events)
+            self._origin_ns = time.perf_counter_ns()
+
+    def report(self, sort_by: str = 'wall_ns') -> List[FeatureProfile]:
+        """
+        The profiles of all features, most expensive first.
+
+        Args:
+            sort_by: The FeatureProfile attribute to sort on. For instance 'wall_ns', 'cpu_ns', 'bytes' or
+                'wall_ns_per_row'.
+
+        Returns:
+            A list of FeatureProfile objects.
+        """
+        if not hasattr(FeatureProfile, sort_by) and sort_by not in FeatureProfile.__dataclass_fields__:
+            raise FeatureRunTimeException(f'Can not sort on unknown FeatureProfile attribute <{sort_by}>')
+        return sorted(self._profiles.values(), key=lambda p: getattr(p, sort_by), reverse=True)
+
+    def cost_per_row(self) -> Dict[str, float]:
+        """
+        The measured wall time per built row of each feature that was built at least once. Rows of cache hits are not
+        counted. Can be passed as `measured` costs to a TensorDefinitionAnalysis.
+
+        Returns:
+            A dictionary with the feature name as key and the nanoseconds per row as value.
+        """
+        return {p.name: p.wall_ns_per_row for p in self._profiles.values() if p.rows > 0}
+
+    def summary(self, top: int = 20, sort_by: str = 'wall_ns') -> str:
+        """
+        A printable table of the most expensive features.
+
+        Args:
+            top: The number of features to show.
+            sort_by: The attribute to sort on, see `report`.
+
+        Returns:
+            A string with one line per feature.
+        """
+        lines = [f'{"feature":<40} {"class":<28} {"calls":>6} {"rows":>10} {"wall ms":>10} {"cpu ms":>10} '
+                 f'{"KiB":>10} {"hits":>5} {"hit rows":>10}']
+        for p in self.report(sort_by)[:top]:
+            lines.append(
+                f'{p.name[:40]:<40} {p.feature_class[:28]:<28} {p.calls:>6} {p.rows:>10} {p.wall_ns / 1e6:>10.3f} '
+                f'{p.cpu_ns / 1e6:>10.3f} {p.bytes / 1024:>10.1f} {p.cache_hits:>5} {p.hit_rows:>10}'
+            )
+        return '\n'.join(lines)
+
+    def as_json(self, sort_by: str = 'wall_ns') -> Dict[str, Any]:
+        return {'features': [asdict(p) for p in self.report(sort_by)]}
+
+    def save_json(self, file: str, sort_by: str = 'wall_ns'):
+        with open(file, 'w') as f:
+            json.dump(self.as_json(sort_by), f, indent=4)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        The recorded calls in the Chrome trace-event format. Each call is a complete ('X') event, the category is the
+        feature class. Only the last `max_events` calls are included.
+
+        Returns:
+            A dictionary that can be written as JSON and opened in chrome://tracing or Perfetto.
+        """
+        if not self._trace:
+            raise FeatureRunTimeException(f'This profiler was created with trace=False, it has no events')
+        return {'traceEvents': list(self._events), 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, file: str):
+        with open(file, 'w') as f:
+            json.dump(self.chrome_trace(), f)
@@ -0,0 +1,342 @@
+"""
+Row executor. Builds a TensorDefinition for a single record with plain Python operations. It is meant for low latency,
+one record at a time, scoring where the per-call overhead of Numpy operations dominates.
+(c) 2023 tsm
+"""
+import bisect
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.expression import Expression
+from ..common.feature import Feature, FeatureExpander, FeatureNormalizeLogBase
+from ..common.featuretype import FeatureType, FeatureTypeTimeBased, FeatureTypeFloat, FeatureTypeInteger
+from ..common.featuretype import FeatureTypeString, FeatureTypeBool
+from ..common.learningcategory import LearningCategory
+from ..features.featurebin import FeatureBin
+from ..features.featureconcat import FeatureConcat
+from ..features.featuredatetimeformat import FeatureDateTimeFormat
+from ..features.featuredatetimewave import FeatureDateTimeWave
+from ..features.featureexpression import FeatureExpression
+from ..features.featureindex import FeatureIndex
+from ..features.featurelabelbinary import FeatureLabelBinary
+from ..features.featureonehot import FeatureOneHot
+from ..features.featureratio import FeatureRatio
+from ..features.featuresource import FeatureSource
+from ..features.featurevirtual import FeatureVirtual
+from ..kernels.datetimeparse import DateTimeParser
+from ..kernels.normalize import NormalizeKernel
+from ..tensor.dtypepolicy import DtypePolicy, DTYPE_POLICY_DEFAULT
+from ..tensor.tensordefinition import TensorDefinition
+from ..tensor.tensorplan import TensorDefinitionPlan
+
+# A compiled step takes the dictionary of values built so far and returns the value of one feature.
+_Step = Callable[[Dict[str, Any]], Any]
+
+# Date-time components as attributes of a Python datetime.
+_COMPONENTS: Dict[str, Callable[[datetime], int]] = {
+    '%Y': lambda d: d.year,
+    '%m': lambda d: d.month,
+    '%d': lambda d: d.day,
+    '%j': lambda d: d.timetuple().tm_yday,
+    '%w': lambda d: (d.weekday() + 1) % 7,
+    '%u': lambda d: d.isoweekday(),
+    '%V': lambda d: d.isocalendar()[1],
+    '%H': lambda d: d.hour,
+    '%M': lambda d: d.minute,
+    '%S': lambda d: d.second
+}
+
+
+class RowExecutor:
+    """
+    Executor that builds a TensorDefinition for one record at a time.
+
+    The TensorDefinition is compiled into a list of small closures in topological order, one per feature. The
+    inference attributes, for instance the index dictionaries, bin edges and normalization coefficients, are looked up
+    once at compile time. Running a record is a loop over the closures on a plain dictionary of values, no Numpy arrays
+    are created per feature. The result is one flat list of values per LearningCategory, in the same column order as
+    the BatchExecutor.
+
+    Date and date-time values are Python datetime objects in row mode, an empty or None date is None, the NaT of the
+    BatchExecutor. Vectorized expression functions are called with 1-element Numpy arrays, as they are written for
+    arrays. Each feature is calculated in the dtype its array has in the BatchExecutor with the same DtypePolicy, the
+    dtype of the output matrix for the features of the TensorDefinition, the dtype of the FeatureType for the others.
+    Float32 values are rounded to float32, normalize features and ratios use the precision of the batch kernels and
+    labels are validated. The output is the same as that of the BatchExecutor. The TensorDefinition must be ready for
+    inference and can not be series based.
+
+    Args:
+        td: The TensorDefinition to compile.
+        dtype_policy: (Optional) The DtypePolicy of the BatchExecutor to match. Default is DTYPE_POLICY_DEFAULT.
+    """
+    def __init__(self, td: TensorDefinition, dtype_policy: DtypePolicy = DTYPE_POLICY_DEFAULT):
+        if td.is_series_based:
+            raise FeatureRunTimeException(f'Can not build series based TensorDefinition <{td.name}> in row mode')
+        if not td.inference_ready:
+            raise FeatureRunTimeException(
+                f'TensorDefinition <{td.name}> is not ready for inference. Features not ready ' +
+                f'{[f.name for f in td.features_not_inference_ready()]}'
+            )
+        self._td = td
+        plan = TensorDefinitionPlan(td)
+        self._dtypes = self._array_dtypes(td, plan, dtype_policy)
+        self._steps: List[Tuple[str, _Step]] = [
+            (
+                s.feature.name,
+                self._round(
+                    self._compile_alias(s.alias_of) if s.is_alias else self._compile(s.feature),
+                    self._dtypes[s.feature.name]
+                )
+            )
+            for s in plan.steps
+        ]
+        self._outputs: List[Tuple[LearningCategory, List[Tuple[str, bool]]]] = [
+            (lc, [(f.name, isinstance(f, FeatureExpander)) for f in td.filter_features(lc)])
+            for lc in td.learning_categories
+        ]
+
+    def __repr__(self):
+        return f'RowExecutor : {self._td.name} steps={len(self._steps)}'
+
+    def __len__(self):
+        return len(self._steps)
+
+    def execute(self, record: Mapping[str, Any]) -> Dict[LearningCategory, List[Any]]:
+        """
+        Build the TensorDefinition for one record.
+
+        Args:
+            record: A mapping with the names of the source features as keys and the raw values as values.
+
+        Returns:
+            A dictionary with the LearningCategory as key and a list with the values of the features (and the
+            expanded values of the expander features) of that LearningCategory as value.
+        """
+        values = dict(record)
+        try:
+            for name, step in self._steps:
+                values[name] = step(values)
+        except KeyError as e:
+            raise FeatureRunTimeException(f'No input value for feature {e} in record')
+        out: Dict[LearningCategory, List[Any]] = {}
+        for lc, features in self._outputs:
+            vector = []
+            for name, expanded in features:
+                if expanded:
+                    vector.extend(values[name])
+                else:
+                    vector.append(values[name])
+            out[lc] = vector
+        return out
+
+    @staticmethod
+    def _array_dtypes(td: TensorDefinition, plan: TensorDefinitionPlan,
+                      dtype_policy: DtypePolicy) -> Dict[str, np.dtype]:
+        # The BatchExecutor writes the features of the TensorDefinition in the output matrices, the other features
+        # have the dtype of their type. Aliases are copies of the canonical feature.
+        matrix = dtype_policy.dtypes(td)
+        outputs = {f.name: matrix[lc] for lc in td.learning_categories for f in td.filter_features(lc)}
+        dtypes: Dict[str, np.dtype] = {}
+        for s in plan.steps:
+            name = s.feature.name
+            if name in outputs:
+                dtypes[name] = np.dtype(outputs[name])
+            elif s.is_alias:
+                dtypes[name] = dtypes[s.alias_of.name]
+            else:
+                dtypes[name] = np.dtype(s.feature.type.numpy_type)
+        return dtypes
+
+    @staticmethod
+    def _round(step: _Step, dtype: np.dtype) -> _Step:
+        # Float values of features with a float32 (or smaller) array are rounded as the batch arrays round them.
+        if dtype.kind != 'f' or dtype.itemsize >= 8:
+            return step
+        tp = dtype.type
+
+        def rounded(v: Dict[str, Any]) -> Any:
+            r = step(v)
+            if isinstance(r, float):
+                return float(tp(r))
+            if isinstance(r, list):
+                return [float(tp(x)) if isinstance(x, float) else x for x in r]
+            return r
+        return rounded
+
+    def _compile(self, f: Feature) -> _Step:
+        # FeatureFilter is a FeatureExpression, it is compiled the same way.
+        if isinstance(f, FeatureSource):
+            return self._compile_source(f)
+        elif isinstance(f, FeatureVirtual):
+            name = f.name
+            return lambda v: v[name]
+        elif isinstance(f, FeatureNormalizeLogBase):
+            return self._compile_normalize(f)
+        elif isinstance(f, FeatureRatio):
+            return self._compile_ratio(f)
+        elif isinstance(f, FeatureConcat):
+            b, c = f.base_feature.name, f.concat_feature.name
+            return lambda v: v[b] + v[c]
+        elif isinstance(f, FeatureDateTimeFormat):
+            return self._compile_format(f)
+        elif isinstance(f, FeatureDateTimeWave):
+            return self._compile_wave(f)
+        elif isinstance(f, FeatureIndex):
+            b, lookup = f.base_feature.name, dict(f.dictionary)
+            return lambda v: lookup.get(str(v[b]), 0)
+        elif isinstance(f, FeatureOneHot):
+            return self._compile_one_hot(f)
+        elif isinstance(f, FeatureBin):
+            b, bins = f.base_feature.name, [float(x) for x in f.bins]
+            return lambda v: 0 if v[b] != v[b] else bisect.bisect_right(bins, v[b])
+        elif isinstance(f, FeatureLabelBinary):
+            return self._compile_label(f)
+        elif isinstance(f, FeatureExpression):
+            return self._compile_expression(f)
+        raise FeatureRunTimeException(
+            f'Feature <{f.name}> of class <{f.__class__.__name__}> is not supported in row mode'
+        )
+
+    @staticmethod
+    def _compile_alias(canonical: Feature) -> _Step:
+        name = canonical.name
+        return lambda v: v[name]
+
+    @staticmethod
+    def _cast(tp: FeatureType) -> Callable[[Any], Any]:
+        if isinstance(tp, FeatureTypeBool):
+            return bool
+        elif isinstance(tp, FeatureTypeInteger):
+            return int
+        elif isinstance(tp, FeatureTypeFloat):
+            if tp.numpy_type == np.float32:
+                # A Python float holds a float32 exactly, round to float32 as the batch arrays do.
+                return lambda x: float(np.float32(x))
+            return float
+        return str
+
+    def _compile_source(self, f: FeatureSource) -> _Step:
+        name = f.name
+        if not isinstance(f.type, FeatureTypeTimeBased):
+            cast = self._cast(f.type)
+            return lambda v: cast(v[name])
+        parser = DateTimeParser.compile(f.format_code)
+        return lambda v: self._parse_date(parser, v[name])
+
+    @staticmethod
+    def _parse_date(parser: DateTimeParser, value: Any) -> Optional[datetime]:
+        if value is None or isinstance(value, datetime):
+            return value
+        if len(value) == 0:
+            return None
+        # Slice the fixed width fields, fall back to strptime if the value does not have the exact layout.
+        r = parser.parse_one(value)
+        return r if r is not None else datetime.strptime(value, parser.format_code)
+
+    def _compile_normalize(self, f: FeatureNormalizeLogBase) -> _Step:
+        # Same operations as the NormalizeKernel, x * scale + -offset * scale, in the dtype of the output array.
+        b, tp = f.base_feature.name, self._dtypes[f.name]
+        offset, scale = NormalizeKernel.coefficients(f)
+        if f.log_base is not None:
+            # The kernel's logarithm on 1 element, so the result does not depend on the log implementation.
+            args = [offset], [scale], [f.log_base], [f.delta]
+            return lambda v: float(NormalizeKernel.normalize(np.array([v[b]], dtype=np.float64), *args, dtype=tp)[0])
+        if tp == np.float32:
+            s, o = np.float32(scale), np.float32(-offset * scale)
+            return lambda v: float(np.float32(v[b]) * s + o)
+        o = -offset * scale
+        return lambda v: v[b] * scale + o
+
+    def _compile_ratio(self, f: FeatureRatio) -> _Step:
+        # Numpy picks the division loop from the input dtypes, float32 inputs are divided in float32. A float64
+        # division rounded to float32 gives the same result as the float32 division.
+        n, d = f.base_feature.name, f.denominator_feature.name
+        loop = np.true_divide(np.ones(1, self._dtypes[n]), np.ones(1, self._dtypes[d])).dtype
+        if loop.itemsize < 8:
+            tp = loop.type
+            return lambda v: float(tp(v[n] / v[d])) if v[d] != 0 else 0.0
+        return lambda v: v[n] / v[d] if v[d] != 0 else 0.0
+
+    @staticmethod
+    def _compile_label(f: FeatureLabelBinary) -> _Step:
+        b, name = f.base_feature.name, f.name
+
+        def label(v: Dict[str, Any]) -> int:
+            x = v[b]
+            if x != 0 and x != 1:
+                raise FeatureRunTimeException(f'Label <{name}> should only contain 0 and 1. Found <{x}>')
+            return int(x)
+        return label
+
+    def _compile_format(self, f: FeatureDateTimeFormat) -> _Step:
+        # Missing dates become an empty string or NaN, as in the BatchExecutor. Integer types can not hold them.
+        b, fmt, name = f.base_feature.name, f.format, f.name
+        if isinstance(f.type, FeatureTypeString):
+            return lambda v: '' if v[b] is None else v[b].strftime(fmt)
+        cast = self._cast(f.type)
+        component = _COMPONENTS.get(fmt, lambda d: d.strftime(fmt))
+        missing = math.nan if isinstance(f.type, FeatureTypeFloat) else None
+
+        def extract(v: Dict[str, Any]) -> Any:
+            d = v[b]
+            if d is not None:
+                return cast(component(d))
+            if missing is None:
+                raise FeatureRunTimeException(
+                    f'Feature <{name}> has type <{f.type.name}>, it can not hold the NaT values of the input'
+                )
+            return missing
+        return extract
+
+    @staticmethod
+    def _compile_wave(f: FeatureDateTimeWave) -> _Step:
+        b, fmt, frequencies = f.base_feature.name, f.format, f.frequencies
+        component = _COMPONENTS.get(fmt, lambda d: int(d.strftime(fmt)))
+        step = 2 * math.pi / f.period
+        missing = [math.nan] * (2 * frequencies)
+
+        def wave(v: Dict[str, Any]) -> List[float]:
+            if v[b] is None:
+                return list(missing)
+            a = component(v[b]) * step
+            s1, c1 = math.sin(a), math.cos(a)
+            s, c = s1, c1
+            r = [s1, c1]
+            for _ in range(1, frequencies):
+                s, c = s * c1 + c * s1, c * c1 - s * s1
+                r.append(s)
+                r.append(c)
+            return r
+        return wave
+
+    @staticmethod
+    def _compile_one_hot(f: FeatureOneHot) -> _Step:
+        b = f.base_feature.name
+        positions = {value: i for i, value in enumerate(f.expand_values)}
+        width = len(positions)
+
+        def one_hot(v: Dict[str, Any]) -> List[int]:
+            r = [0] * width
+            i = positions.get(str(v[b]), None)
+            if i is not None:
+                r[i] = 1
+            return r
+        return one_hot
+
+    def _compile_expression(self, f: FeatureExpression) -> _Step:
+        names = [p.name for p in f.param_features]
+        cast, call = self._cast(f.type), f.expression
+        dtypes = [self._dtypes[n] for n in names]
+        if isinstance(call, Expression):
+            # The Numpy operations of an Expression work on scalars as well as on arrays. Numerical values are passed
+            # as Numpy scalars, so the operations are done in the dtypes of the batch arrays.
+            scalars = [(n, d.type if d.kind in 'biuf' else None) for n, d in zip(names, dtypes)]
+            return lambda v: cast(call({n: v[n] if tp is None else tp(v[n]) for n, tp in scalars}))
+        if f.vectorized:
+            # Vectorized functions are written for arrays, call them with one row of the same dtype as in batch mode.
+            return lambda v: cast(call(*[np.array([v[n]], dtype=d) for n, d in zip(names, dtypes)])[0])
+        return lambda v: cast(call(*[v[n] for n in names]))
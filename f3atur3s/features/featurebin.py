@@ -3,13 +3,17 @@ Definition of the binning feature. It is a feature directly found in a source.
 (c) 2023 tsm
 """
 from dataclasses import dataclass, field
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Mapping, Optional
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.exception import FeatureRunTimeException
 from ..common.feature import Feature, FeatureWithBaseFeature, FeatureCategorical
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureBin(FeatureWithBaseFeature, FeatureCategorical):
@@ -49,6 +53,16 @@ class FeatureBin(FeatureWithBaseFeature, FeatureCategorical):
     def inference_ready(self) -> bool:
         return self.bins is not None
 
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Bin the values of the base feature. Values below the first bin edge and NaN values get the unknown bin 0.
+        """
+        self.val_inference_ready('transform')
+        values = self._transform_input(inputs, self.base_feature)
+        r = np.digitize(values, np.asarray(self.bins, dtype=np.float64))
+        r[np.isnan(values)] = 0
+        return self._transform_output(r.astype(self.type.numpy_type, copy=False), out)
+
     @classmethod
     def create_from_save(cls, fields: Dict[str, Any], embedded_features: List[Feature], pkl: Any) -> 'FeatureBin':
         name, tp, fb = FeatureWithBaseFeature.extract_dict(fields, embedded_features)
@@ -3,13 +3,18 @@ Definition of the concatenating feature. It is a feature directly that concatena
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, LearningCategory, FeatureTypeString
 from ..common.feature import FeatureDefinitionException, FeatureWithBaseFeature
+from ..kernels.concat import ConcatKernel
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True, order=True)
 class FeatureConcat(FeatureWithBaseFeature):
@@ -23,12 +28,13 @@ class FeatureConcat(FeatureWithBaseFeature):
         self.val_base_feature_is_string()
         self._val_concat_feature_is_string()
         # Add base and concat to the embedded features list
-        self.embedded_features = self.get_base_and_base_embedded_features()
-        self.embedded_features.append(self.concat_feature)
-        self.embedded_features.extend(self.concat_feature.embedded_features)
+        eb = self.get_base_and_base_embedded_features()
+        eb.append(self.concat_feature)
+        eb.extend(self.concat_feature.embedded_features)
+        self.embedded_features = eb
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = FeatureWithBaseFeature.as_json(self)
         # Need to keep the name only of the concat feature
         json['concat_feature'] = json['concat_feature']['name']
         return json
@@ -43,6 +49,23 @@ class FeatureConcat(FeatureWithBaseFeature):
         # A concat feature has no inference attributes
         return True
 
+    def compute(self, base: np.ndarray, concat: np.ndarray) -> np.ndarray:
+        """
+        Concatenate arrays of base and concat feature values.
+
+        Args:
+            base: A Numpy string array with the values of the base feature.
+            concat: A Numpy string array with the values of the concat feature.
+
+        Returns:
+            A fixed width Numpy string array.
+        """
+        return ConcatKernel.concat(base, concat)
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        base = self._transform_input(inputs, self.base_feature)
+        return self._transform_output(self.compute(base, self._transform_input(inputs, self.concat_feature)), out)
+
     def _val_concat_feature_is_string(self):
         if not isinstance(self.concat_feature.type, FeatureTypeString):
             raise FeatureDefinitionException(
@@ -3,13 +3,20 @@ Definition of the Time Formatter feature. It is a feature that can re-format a d
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Mapping, Optional
 
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.featuretype import FeatureTypeString, FeatureTypeFloat
 from ..common.learningcategory import LearningCategory
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, FeatureWithBaseFeature
+from ..kernels.datetimecomponent import DateTimeComponent
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True, order=True)
 class FeatureDateTimeFormat(FeatureWithBaseFeature):
@@ -23,6 +30,40 @@ class FeatureDateTimeFormat(FeatureWithBaseFeature):
         # By default; return set embedded features to be the base feature.
         self.embedded_features = self.get_base_and_base_embedded_features()
 
+    def extract(self, values: np.ndarray) -> np.ndarray:
+        """
+        Apply the format to an array of date-times. Single component formats (%d %w %u %m %H %M %S %j %Y %V) are
+        calculated arithmetically, formats made of those components and literal text are built vectorized. Other
+        formats fall back to strftime per value.
+
+        Args:
+            values: A 1-D Numpy datetime64 array with the values of the base feature.
+
+        Returns:
+            A Numpy array with the dtype of the FeatureType of this feature. For string types NaT becomes an empty
+            string, for float types NaN.
+
+        Raises:
+            FeatureRunTimeException if there are NaT values and the type is an integer type.
+        """
+        if isinstance(self.type, FeatureTypeString):
+            return DateTimeComponent.format(values, self.format)
+        nat = np.isnat(values)
+        if nat.any() and not isinstance(self.type, FeatureTypeFloat):
+            raise FeatureRunTimeException(
+                f'Feature <{self.name}> has type <{self.type.name}>, it can not hold the NaT values of the input'
+            )
+        if DateTimeComponent.supported(self.format):
+            r = DateTimeComponent.extract(values, self.format).astype(self.type.numpy_type)
+        else:
+            r = np.where(nat, 'nan', DateTimeComponent.format(values, self.format)).astype(self.type.numpy_type)
+        if nat.any():
+            r[nat] = np.nan
+        return r
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self._transform_output(self.extract(self._transform_input(inputs, self.base_feature)), out)
+
     @property
     def inference_ready(self) -> bool:
         # A DateTimeFormat feature is always ready for inference
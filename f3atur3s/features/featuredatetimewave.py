@@ -3,14 +3,20 @@ Definition of the Time wave feature. It encodes aspects of a date-time as sines/
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional, Mapping
+
+import numpy as np
 
 from ..common.learningcategory import LearningCategory
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, FeatureWithBaseFeature, FeatureExpander
+from ..kernels.datetimecomponent import DateTimeComponent
+from ..kernels.wave import WaveKernel
 from .featurevirtual import FeatureVirtual
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True, order=True)
 class FeatureDateTimeWave(FeatureExpander, FeatureWithBaseFeature):
@@ -38,6 +44,34 @@ class FeatureDateTimeWave(FeatureExpander, FeatureWithBaseFeature):
         else:
             return []
 
+    def encode(self, values: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculate the wave encoding of an array of date-times. The component defined by `format` is extracted
+        vectorized for the common numeric directives (%d %w %u %m %H %M %S %j %Y %V), other formats are calculated with
+        strftime.
+
+        Args:
+            values: A 1-D Numpy datetime64 array with the values of the base feature.
+            out: (Optional) Array of shape (rows, 2 * frequencies) to write to, for instance a slice of a bigger
+                array. The columns are in the order of the expand_names.
+
+        Returns:
+            An array with the sin/cos values of the feature. NaT dates give NaN values.
+        """
+        if DateTimeComponent.supported(self.format):
+            component = DateTimeComponent.extract(values, self.format)
+        else:
+            component = DateTimeComponent.strftime(values, self.format)
+            component = np.where(component == '', '0', component).astype(np.int64)
+        out = WaveKernel.encode(component, self.period, self.frequencies, out, self.type.numpy_type)
+        nat = np.isnat(values)
+        if nat.any():
+            out[nat] = np.nan
+        return out
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.encode(self._transform_input(inputs, self.base_feature), out)
+
     @property
     def inference_ready(self) -> bool:
         # A DateTimeFormat feature is always ready for inference
@@ -4,15 +4,21 @@ Definition of the concatenating feature. It is a feature directly that concatena
 """
 from dataclasses import dataclass, field
 from inspect import signature, isfunction
-from typing import Callable, List, Dict, Any
+from typing import Callable, List, Dict, Any, Type, Mapping, Optional
 from abc import ABC
 
+import numpy as np
+
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, LearningCategory
 from ..common.feature import FeatureDefinitionException
+from ..common.exception import FeatureRunTimeException
+from ..common.expression import Expression
 from ..common.featuresave import FeatureWithPickle
 
 
+@add_slots
 @dataclass(unsafe_hash=True)
 class _ExpressionBased(Feature, ABC):
     """
@@ -36,6 +42,14 @@ class _ExpressionBased(Feature, ABC):
 
     @staticmethod
     def _val_function_is_callable(expression: Callable, param_features: List[Feature]):
+        if isinstance(expression, Expression):
+            missing = [n for n in expression.names if n not in [pf.name for pf in param_features]]
+            if len(missing) > 0:
+                raise FeatureDefinitionException(
+                    f'Expression <{expression.text}> references {missing}, which are not in the param_features'
+                )
+            return
+
         if not isfunction(expression):
             raise FeatureDefinitionException(f' Expression parameter must be function')
 
@@ -46,6 +60,13 @@ class _ExpressionBased(Feature, ABC):
                 f'[{len(expression_signature.parameters)}]  [{len(param_features)}]'
             )
 
+    def _val_evaluate_params(self, params: List[np.ndarray]):
+        if len(params) != len(self.param_features) or len(params) == 0:
+            raise FeatureRunTimeException(
+                f'Can not evaluate expression of <{self.name}>. Expected {len(self.param_features)} parameter ' +
+                f'arrays, at least one. Got {len(params)}'
+            )
+
     def _val_expression_not_lambda(self):
         if self.is_lambda:
             raise FeatureDefinitionException(
@@ -66,14 +87,26 @@ class _ExpressionBased(Feature, ABC):
         Return:
              True if the expression is a Lambda.
         """
-        return self.expression.__name__ == '<lambda>'
+        return getattr(self.expression, '__name__', None) == '<lambda>'
 
     @property
     def learning_category(self) -> LearningCategory:
         # Should be the Learning category of the type of the Expression Feature.
         return self.type.learning_category
 
+    def _call_expression(self, params: List[Any]) -> Any:
+        # An Expression takes its inputs by name, a function takes them as positional arguments.
+        if isinstance(self.expression, Expression):
+            return self.expression({pf.name: p for pf, p in zip(self.param_features, params)})
+        else:
+            return self.expression(*params)
 
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        params = [self._transform_input(inputs, pf) for pf in self.param_features]
+        return self._transform_output(self.evaluate(params), out)
+
+
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureExpression(_ExpressionBased, FeatureWithPickle):
@@ -82,36 +115,97 @@ class FeatureExpression(_ExpressionBased, FeatureWithPickle):
     to perform all sorts of custom operations on other feature, such as adding, formatting, calculating ratio's etc...
 
     The function passed to as expression must be available in the main Python Context
+
+    If `vectorized` is True, the expression is called once with a Numpy array per parameter feature and must return
+    an array with a value for each row. If it is False the expression is called with scalar values, it will be
+    wrapped with 'np.frompyfunc' when it is evaluated on arrays.
+
+    The expression can also be an 'Expression' object, for instance Expression('amount / (count + 1)'). Those are
+    always vectorized, and are saved as text rather than pickled.
     """
+    vectorized: bool = False
+
     def __post_init__(self):
         # Run post init validation
         self._val_parameters_is_features_list(self.param_features)
         self._val_function_is_callable(self.expression, self.param_features)
+        if isinstance(self.expression, Expression):
+            self.vectorized = True
+        self._val_vectorized_expression()
         # The parameters needed to run the function are the embedded features
-        self.embedded_features.extend(self.param_features)
+        eb = list(self.param_features)
         for pf in self.param_features:
-            self.embedded_features.extend(pf.embedded_features)
-        self.embedded_features = list(set(self.embedded_features))
+            eb.extend(pf.embedded_features)
+        self.embedded_features = eb
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = Feature.as_json(self)
         # We only need the names of the parameter features
         json['param_features'] = [f['name'] for f in json['param_features']]
-        # Need to remove the expression, that will be pickled
+        # Need to remove the expression, that will be pickled. Unless it is an Expression, it is saved as text.
         del json['expression']
+        if isinstance(self.expression, Expression):
+            json['expression'] = self.expression.text
         return json
 
     def get_pickle(self) -> Any:
-        return self.expression
+        return None if isinstance(self.expression, Expression) else self.expression
+
+    def evaluate(self, params: List[np.ndarray]) -> np.ndarray:
+        """
+        Evaluate the expression on a set of rows. If the expression is not vectorized it is called row by row.
+
+        Args:
+            params: A list of Numpy arrays. One per parameter feature, in the order of the param_features.
+
+        Returns:
+            A Numpy array with the dtype of the FeatureType of this feature.
+        """
+        self._val_evaluate_params(params)
+        if self.vectorized:
+            r = self._call_expression(params)
+            self._val_vectorized_result(r, len(params[0]), FeatureRunTimeException)
+        else:
+            r = np.frompyfunc(self.expression, len(params), 1)(*params)
+        return np.asarray(r).astype(self.type.numpy_type, copy=False)
+
+    def _val_vectorized_expression(self):
+        # Validate a vectorized expression by calling it on a couple of dummy rows.
+        if not self.vectorized:
+            return
+        probe = [np.zeros(2, dtype=pf.type.numpy_type) for pf in self.param_features]
+        try:
+            with np.errstate(all='ignore'):
+                r = self._call_expression(probe)
+        except Exception as e:
+            raise FeatureDefinitionException(
+                f'Vectorized expression of <{self.name}> failed when called with arrays. Error <{e}>'
+            )
+        self._val_vectorized_result(r, 2, FeatureDefinitionException)
+
+    def _val_vectorized_result(self, result: Any, rows: int, exception: Type[Exception]):
+        if not isinstance(result, np.ndarray) or result.ndim != 1 or result.shape[0] != rows:
+            raise exception(
+                f'Vectorized expression of <{self.name}> must return a 1-D Numpy array with one value per row. ' +
+                f'Expected {rows} rows. Got <{type(result)}> ' +
+                f'with shape <{getattr(result, "shape", None)}>'
+            )
+        if not np.can_cast(result.dtype, self.type.numpy_type, casting='same_kind'):
+            raise exception(
+                f'Vectorized expression of <{self.name}> returned dtype <{result.dtype}>, which is not compatible ' +
+                f'with the FeatureType <{self.type.name}>. Expected <{self.type.numpy_type}>'
+            )
 
     @classmethod
     def create_from_save(
             cls, fields: Dict[str, Any], embedded_features: List['Feature'], pkl: Any) -> 'FeatureExpression':
         name, tp = Feature.extract_dict(fields, embedded_features)
         param = [eb for eb in embedded_features for f in fields['param_features'] if eb.name == f]
-        return FeatureExpression(name, tp, pkl, param)
+        expr = Expression(fields['expression']) if isinstance(fields.get('expression', None), str) else pkl
+        return cls(name, tp, expr, param, fields.get('vectorized', False))
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureExpressionSeries(_ExpressionBased, FeatureWithPickle):
@@ -121,13 +215,13 @@ class FeatureExpressionSeries(_ExpressionBased, FeatureWithPickle):
         self._val_parameters_is_features_list(self.param_features)
         self._val_function_is_callable(self.expression, self.param_features)
         # The parameters needed to run the function are the embedded features
-        self.embedded_features.extend(self.param_features)
+        eb = list(self.param_features)
         for pf in self.param_features:
-            self.embedded_features.extend(pf.embedded_features)
-        self.embedded_features = list(set(self.embedded_features))
+            eb.extend(pf.embedded_features)
+        self.embedded_features = eb
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = Feature.as_json(self)
         # We only need the names of the parameter features
         json['param_features'] = [f['name'] for f in json['param_features']]
         # Need to remove the expression, that will be pickled
@@ -137,6 +231,22 @@ class FeatureExpressionSeries(_ExpressionBased, FeatureWithPickle):
     def get_pickle(self) -> Any:
         return self.expression
 
+    def evaluate(self, params: List[np.ndarray]) -> np.ndarray:
+        """
+        Evaluate the series expression on a set of rows. The expression is called once per row with the series of
+        each parameter feature for that row.
+
+        Args:
+            params: A list of Numpy arrays. One per parameter feature, in the order of the param_features. The first
+                dimension is the row, each element is the series of that row.
+
+        Returns:
+            A Numpy array with one value per row, with the dtype of the FeatureType of this feature.
+        """
+        self._val_evaluate_params(params)
+        r = [self.expression(*[p[i] for p in params]) for i in range(len(params[0]))]
+        return np.asarray(r).astype(self.type.numpy_type, copy=False)
+
     @classmethod
     def create_from_save(cls, fields: Dict[str, Any], embedded_features: List['Feature'], pkl: Any) -> 'Feature':
         name, tp = Feature.extract_dict(fields, embedded_features)
@@ -5,9 +5,12 @@ Definition of the Filter feature. It is a feature that is a specialization of th
 from dataclasses import dataclass
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
+from ..common.expression import Expression
 from .featureexpression import FeatureExpression
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True, order=True)
 class FeatureFilter(FeatureExpression):
@@ -21,8 +24,11 @@ class FeatureFilter(FeatureExpression):
         self._val_parameters_is_features_list(self.param_features)
         self._val_expression_not_lambda()
         self._val_function_is_callable(self.expression, self.param_features)
+        if isinstance(self.expression, Expression):
+            self.vectorized = True
+        self._val_vectorized_expression()
         # The parameters needed to run the function are the embedded features
-        self.embedded_features.extend(self.param_features)
+        eb = list(self.param_features)
         for pf in self.param_features:
-            self.embedded_features.extend(pf.embedded_features)
-        self.embedded_features = list(set(self.embedded_features))
+            eb.extend(pf.embedded_features)
+        self.embedded_features = eb
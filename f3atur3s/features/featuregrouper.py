@@ -9,6 +9,7 @@ from datetime import timedelta, datetime
 from typing import Optional, Dict, Any, List
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.exception import FeatureDefinitionException
 from ..common.feature import Feature, FeatureWithBaseFeature
 from ..common.learningcategory import LearningCategory
@@ -150,6 +151,7 @@ class AggregatorHelper:
             raise FeatureDefinitionException(f'Could not find Aggregator with key <{key}>')
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True, order=True)
 class FeatureGrouper(FeatureWithBaseFeature):
@@ -169,10 +171,10 @@ class FeatureGrouper(FeatureWithBaseFeature):
         if self.filter_feature is not None:
             eb.append(self.filter_feature)
             eb.extend(self.filter_feature.embedded_features)
-        self.embedded_features = list(set(eb))
+        self.embedded_features = eb
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = FeatureWithBaseFeature.as_json(self)
         # Just need the name of the group_feature
         json['group_feature'] = json['group_feature']['name']
         # Just need the name of the filter_feature
@@ -3,13 +3,17 @@ Definition of the Indexing feature. It is a feature directly found in a source.
 (c) 2023 tsm
 """
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.exception import FeatureRunTimeException
 from ..common.feature import Feature, FeatureWithBaseFeature, FeatureCategorical
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureIndex(FeatureWithBaseFeature, FeatureCategorical):
@@ -23,8 +27,7 @@ class FeatureIndex(FeatureWithBaseFeature, FeatureCategorical):
         self.val_int_type()
         self.val_base_feature_is_string_or_integer()
         # By default, return set embedded features to be the base feature.
-        self.embedded_features.append(self.base_feature)
-        self.embedded_features.extend(self.base_feature.embedded_features)
+        self.embedded_features = self.get_base_and_base_embedded_features()
 
     def __len__(self):
         return len(self.dictionary)
@@ -43,6 +46,22 @@ class FeatureIndex(FeatureWithBaseFeature, FeatureCategorical):
                 f'inference. Please perform an inference run first.'
             )
 
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Look up the index of the values of the base feature. Values that are not in the dictionary get index 0.
+        """
+        self.val_inference_ready('transform')
+        values = self._transform_input(inputs, self.base_feature).astype(str)
+        r = np.zeros(values.shape, dtype=self.type.numpy_type)
+        if len(self.dictionary) > 0:
+            keys = np.array(list(self.dictionary.keys()), dtype=str)
+            order = np.argsort(keys)
+            keys, indexes = keys[order], np.array(list(self.dictionary.values()), dtype=np.int64)[order]
+            pos = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+            found = keys[pos] == values
+            r[found] = indexes[pos[found]]
+        return self._transform_output(r.astype(self.type.numpy_type, copy=False), out)
+
     @classmethod
     def create_from_save(cls, fields: Dict[str, Any], embedded_features: List[Feature], pkl: Any) -> 'FeatureIndex':
         name, tp, fb = FeatureWithBaseFeature.extract_dict(fields, embedded_features)
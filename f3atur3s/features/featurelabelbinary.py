@@ -3,12 +3,48 @@ Definition of the Binary Label feature. It is a feature directly found in a sour
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
+from ..common.exception import FeatureRunTimeException
 from ..common.feature import Feature, FeatureLabel, FeatureWithBaseFeature
 
 
+@dataclass
+class BinaryLabelCounts:
+    """
+    The number of rows per class of a binary label. Counts of several batches can be added together.
+    """
+    negatives: int = 0
+    positives: int = 0
+
+    def __add__(self, other: 'BinaryLabelCounts') -> 'BinaryLabelCounts':
+        return BinaryLabelCounts(self.negatives + other.negatives, self.positives + other.positives)
+
+    @property
+    def rows(self) -> int:
+        return self.negatives + self.positives
+
+    @property
+    def prevalence(self) -> float:
+        """
+        The fraction of positive rows. 0.0 if there are no rows.
+        """
+        return self.positives / self.rows if self.rows > 0 else 0.0
+
+    @property
+    def class_weights(self) -> Tuple[float, float]:
+        """
+        Balanced class weights, rows / (2 * count of the class), for the negative and the positive class. A class
+        without rows gets weight 0.0.
+        """
+        return tuple(self.rows / (2 * c) if c > 0 else 0.0 for c in (self.negatives, self.positives))
+
+
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureLabelBinary(FeatureLabel):
@@ -24,6 +60,66 @@ class FeatureLabelBinary(FeatureLabel):
         # By default, return set embedded features to be the base feature.
         self.embedded_features = self.get_base_and_base_embedded_features()
 
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        r, _ = self.transform_counts(inputs, out)
+        return r
+
+    def transform_counts(self, inputs: Mapping[str, np.ndarray],
+                         out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, BinaryLabelCounts]:
+        """
+        Validate and convert the values of the base feature, and count the rows per class in the same pass.
+
+        Integer and bool values with the same size as the type of this feature are returned as a view, without copy.
+
+        Args:
+            inputs: A mapping with the names of the features as key and their values as value.
+            out: (Optional) The array to write the labels to.
+
+        Returns:
+            A tuple with the labels and the BinaryLabelCounts.
+
+        Raises:
+            FeatureRunTimeException if the base feature has values other than 0 and 1.
+        """
+        values = self._transform_input(inputs, self.base_feature)
+        counts = self.count(values)
+        if counts.rows != values.shape[0]:
+            bad = np.unique(values[(values != 0) & (values != 1)])
+            raise FeatureRunTimeException(
+                f'Label <{self.name}> should only contain 0 and 1. Found {values.shape[0] - counts.rows} other ' +
+                f'values, for instance {bad[:10].tolist()}'
+            )
+        tp = self.type.numpy_type
+        if out is not None:
+            # The values are known to be 0 or 1, an unsafe cast does not lose anything.
+            np.copyto(out, values, casting='unsafe')
+            return out, counts
+        if values.dtype.kind in ('b', 'i', 'u') and values.dtype.itemsize == np.dtype(tp).itemsize:
+            return values.view(tp), counts
+        return values.astype(tp), counts
+
+    @staticmethod
+    def count(values: np.ndarray) -> BinaryLabelCounts:
+        """
+        Count the zeros and ones in an array. Integer and bool arrays are counted with a single bincount. Values that
+        are neither 0 nor 1 are not counted, so the counts add up to fewer rows than the array has if there are any.
+
+        Args:
+            values: A 1-D array of numbers.
+
+        Returns:
+            A BinaryLabelCounts object.
+        """
+        kind = values.dtype.kind
+        if kind in ('b', 'i', 'u'):
+            # As unsigned, negative numbers become large numbers, so everything other than 0 and 1 ends up in bin 2.
+            u = values.view(f'u{values.dtype.itemsize}')
+            if u.dtype.itemsize > 1:
+                u = np.minimum(u, 2, out=np.empty(u.shape, dtype=np.uint8), casting='unsafe')
+            bins = np.bincount(u, minlength=2)
+            return BinaryLabelCounts(int(bins[0]), int(bins[1]))
+        return BinaryLabelCounts(int(np.count_nonzero(values == 0)), int(np.count_nonzero(values == 1)))
+
     @classmethod
     def create_from_save(cls, fields: Dict[str, Any],
                          embedded_features: List[Feature], pkl: Any) -> 'FeatureLabelBinary':
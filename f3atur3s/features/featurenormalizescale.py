@@ -3,12 +3,14 @@ Definition of the Scaling Normalizer feature. It is a feature directly found in
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, FeatureNormalizeLogBase
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureNormalizeScale(FeatureNormalizeLogBase):
@@ -29,6 +31,9 @@ class FeatureNormalizeScale(FeatureNormalizeLogBase):
     def inference_ready(self) -> bool:
         return self.minimum is not None and self.maximum is not None
 
+    def normalize_parameters(self) -> Tuple[float, float]:
+        return self.minimum, self.maximum - self.minimum
+
     @classmethod
     def create_from_save(
             cls, fields: Dict[str, Any], embedded_features: List['Feature'], pkl: Any) -> 'FeatureNormalizeScale':
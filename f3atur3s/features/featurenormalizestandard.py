@@ -3,12 +3,14 @@ Definition of the Standardizing Normalizer feature. It is a feature directly fou
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, FeatureNormalizeLogBase
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureNormalizeStandard(FeatureNormalizeLogBase):
@@ -29,6 +31,9 @@ class FeatureNormalizeStandard(FeatureNormalizeLogBase):
     def inference_ready(self) -> bool:
         return self.mean is not None and self.stddev is not None
 
+    def normalize_parameters(self) -> Tuple[float, float]:
+        return self.mean, self.stddev
+
     @classmethod
     def create_from_save(
             cls, fields: Dict[str, Any], embedded_features: List['Feature'], pkl: Any) -> 'FeatureNormalizeStandard':
@@ -3,14 +3,19 @@ Definition of the Indexing feature. It is a feature directly found in a source.
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Mapping, Optional
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, FeatureWithBaseFeature, FeatureExpander, LearningCategory
+from ..common.exception import FeatureRunTimeException
 from ..common.learningcategory import LEARNING_CATEGORY_BINARY
 from .featurevirtual import FeatureVirtual
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureOneHot(FeatureExpander):
@@ -31,6 +36,44 @@ class FeatureOneHot(FeatureExpander):
         else:
             return []
 
+    @property
+    def expand_values(self) -> List[str]:
+        """
+        The input values of the expanded features. The expand names are the values, prefixed with the name of the
+        base feature or of this feature and the delimiter.
+
+        Returns:
+            A list of values, in the order of the expand_names.
+        """
+        self.val_inference_ready('expand_values')
+        for prefix in (f'{self.base_feature.name}{self.delimiter}', f'{self.name}{self.delimiter}'):
+            if all(n.startswith(prefix) for n in self.expand_names):
+                return [n[len(prefix):] for n in self.expand_names]
+        return [n.rsplit(self.delimiter, 1)[-1] for n in self.expand_names]
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        One hot encode the values of the base feature. Writes one column per expand name, values that are not one of
+        the expand values get all zeros.
+        """
+        values = self._transform_input(inputs, self.base_feature).astype(str)
+        categories = np.array(self.expand_values, dtype=str)
+        if out is None:
+            out = np.zeros((values.shape[0], len(categories)), dtype=self.type.numpy_type)
+        elif out.shape != (values.shape[0], len(categories)):
+            raise FeatureRunTimeException(
+                f'Output of <{self.name}> should have shape {(values.shape[0], len(categories))}. Got {out.shape}'
+            )
+        else:
+            out[...] = 0
+        if len(categories) == 0:
+            return out
+        order = np.argsort(categories)
+        pos = np.minimum(np.searchsorted(categories[order], values), len(categories) - 1)
+        found = np.flatnonzero(categories[order][pos] == values)
+        out[found, order[pos[found]]] = 1
+        return out
+
     @property
     def inference_ready(self) -> bool:
         return self.expand_names is not None
@@ -3,15 +3,20 @@ Definition of the Ratio feature. It calculated a ratio between 2 other numerical
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Mapping
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature, FeatureWithBaseFeature
 from ..common.learningcategory import LearningCategory
 from ..common.featuretype import FeatureTypeNumerical
 from ..common.exception import FeatureDefinitionException
+from ..kernels.ratio import RatioKernel
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureRatio(FeatureWithBaseFeature):
@@ -26,13 +31,13 @@ class FeatureRatio(FeatureWithBaseFeature):
         self.val_base_feature_is_numerical()
         self._val_denominator_is_numerical()
         # Add base and denominator to the embedded features list
-        self.embedded_features = self.get_base_and_base_embedded_features()
-        self.embedded_features.append(self.denominator_feature)
-        self.embedded_features.extend(self.denominator_feature.embedded_features)
-        self.embedded_features = list(set(self.embedded_features))
+        eb = self.get_base_and_base_embedded_features()
+        eb.append(self.denominator_feature)
+        eb.extend(self.denominator_feature.embedded_features)
+        self.embedded_features = eb
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = FeatureWithBaseFeature.as_json(self)
         # Just need to keep the name of the denominator_features
         json['denominator_feature'] = json['denominator_feature']['name']
         return json
@@ -47,6 +52,25 @@ class FeatureRatio(FeatureWithBaseFeature):
         # A ratio feature has no inference attributes
         return True
 
+    def compute(self, numerator: np.ndarray, denominator: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculate the ratio for arrays of base and denominator values. The division is done in the precision of the
+        type of this feature (FLOAT or FLOAT_32).
+
+        Args:
+            numerator: A Numpy array with the values of the base feature.
+            denominator: A Numpy array with the values of the denominator feature.
+            out: (Optional) Array to write to, for instance a column of a bigger array.
+
+        Returns:
+            A Numpy array with the ratio, 0 where the denominator is 0.
+        """
+        return RatioKernel.divide(numerator, denominator, self.type.numpy_type, out)
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        numerator = self._transform_input(inputs, self.base_feature)
+        return self.compute(numerator, self._transform_input(inputs, self.denominator_feature), out)
+
     def _val_denominator_is_numerical(self):
         if not isinstance(self.denominator_feature.type, FeatureTypeNumerical):
             raise FeatureDefinitionException(
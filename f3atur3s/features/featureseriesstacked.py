@@ -8,8 +8,10 @@ from typing import Dict, Any, List
 from ..common.learningcategory import LearningCategory, LEARNING_CATEGORY_NONE
 from ..common.feature import Feature, FeatureSeriesBased
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureSeriesStacked(FeatureSeriesBased):
@@ -25,16 +27,14 @@ class FeatureSeriesStacked(FeatureSeriesBased):
         self.val_same_learning_type()
         self.val_learning_category_not_none()
         self.val_same_root_feature_type()
-        # Set the Learning category
-        self._learning_category = [f.learning_category for f in self.series_features][0]
         # Create Embedded Features
-        self.embedded_features.extend(self.series_features)
+        eb = list(self.series_features)
         for sf in self.series_features:
-            self.embedded_features.extend(sf.embedded_features)
-        self.embedded_features = list(set(self.embedded_features))
+            eb.extend(sf.embedded_features)
+        self.embedded_features = eb
 
-    def __dict__(self) -> Dict[str, Any]:
-        json = super().__dict__()
+    def as_json(self) -> Dict[str, Any]:
+        json = Feature.as_json(self)
         # Only need the name of the key_feature
         json['key_feature'] = json['key_feature']['name']
         return json
@@ -50,4 +50,5 @@ class FeatureSeriesStacked(FeatureSeriesBased):
 
     @property
     def learning_category(self) -> LearningCategory:
-        return self._learning_category
+        # All series features have the same learning category, that is validated when the feature is created.
+        return self.series_features[0].learning_category
@@ -3,15 +3,20 @@ Definition of the source feature. It is a feature directly found in a source.
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Optional, Union, Dict, Any, List
+from typing import Optional, Union, Dict, Any, List, Mapping
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.exception import FeatureDefinitionException
 from ..common.feature import Feature
 from ..common.featuretype import FeatureTypeTimeBased
 from ..common.learningcategory import LearningCategory
+from ..kernels.datetimeparse import DateTimeParser
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True, order=True)
 class FeatureSource(Feature):
@@ -34,6 +39,24 @@ class FeatureSource(Feature):
         # Should be the learning category of the type of the source feature
         return self.type.learning_category
 
+    def parse(self, values: np.ndarray) -> np.ndarray:
+        """
+        Convert raw source values to the Numpy type of this feature. Time based features are parsed with the
+        format_code, common fixed width formats are parsed vectorized, others with strptime.
+
+        Args:
+            values: A Numpy array with the raw values, for time based features an array of strings.
+
+        Returns:
+            A Numpy array with the dtype of the FeatureType of this feature.
+        """
+        if isinstance(self.type, FeatureTypeTimeBased):
+            return DateTimeParser.compile(self.format_code).parse(values).astype(self.type.numpy_type, copy=False)
+        return np.asarray(values).astype(self.type.numpy_type, copy=False)
+
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self._transform_output(self.parse(self._transform_input(inputs, self)), out)
+
     @classmethod
     def create_from_save(cls, fields: Dict[str, Any], embedded_features: List[Feature], pkl: Any) -> 'FeatureSource':
         name, tp = cls.extract_dict(fields, embedded_features)
@@ -3,13 +3,17 @@ Definition of the virtual feature. It is a feature with an identity problem
 (c) 2023 tsm
 """
 from dataclasses import dataclass
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Mapping, Optional
+
+import numpy as np
 
 from ..common.typechecking import enforce_types
+from ..common.dataclassslots import add_slots
 from ..common.feature import Feature
 from ..common.learningcategory import LearningCategory, LEARNING_CATEGORY_NONE
 
 
+@add_slots
 @enforce_types
 @dataclass(unsafe_hash=True)
 class FeatureVirtual(Feature):
@@ -28,6 +32,9 @@ class FeatureVirtual(Feature):
         # Virtual features are never used for learning. No matter what their type is.
         return LEARNING_CATEGORY_NONE
 
+    def transform(self, inputs: Mapping[str, np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self._transform_output(self._transform_input(inputs, self), out)
+
     @classmethod
     def create_from_save(cls, fields: Dict[str, Any], embedded_features: List['Feature'], pkl: Any) -> 'FeatureVirtual':
         name, tp = cls.extract_dict(fields, embedded_features)
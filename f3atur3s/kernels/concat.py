@@ -0,0 +1,42 @@
+"""
+Vectorized string concatenation, used by the FeatureConcat.
+(c) 2023 tsm
+"""
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+
+
+class ConcatKernel:
+    """
+    Class that bundles the concatenation of string arrays. The arrays are concatenated as fixed width Numpy string
+    arrays, there is no Python string join per row.
+    """
+    @classmethod
+    def concat(cls, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """
+        Concatenate 2 string arrays element-wise.
+
+        Args:
+            left: A 1-D Numpy 'U', 'S' or object array of strings.
+            right: A 1-D Numpy 'U', 'S' or object array of strings, with the same length as left.
+
+        Returns:
+            A fixed width array with left + right. An 'S' array if both inputs are 'S' arrays, a 'U' array otherwise.
+            None values in object arrays are treated as empty strings.
+        """
+        if left.shape != right.shape:
+            raise FeatureRunTimeException(f'Can not concat arrays of shape {left.shape} and {right.shape}')
+        if left.dtype.kind == 'S' and right.dtype.kind == 'S':
+            return np.char.add(left, right)
+        return np.char.add(cls._as_unicode(left), cls._as_unicode(right))
+
+    @staticmethod
+    def _as_unicode(a: np.ndarray) -> np.ndarray:
+        if a.dtype.kind == 'U':
+            return a
+        elif a.dtype.kind == 'S':
+            return np.char.decode(a, 'utf-8')
+        elif a.dtype == object:
+            return np.where(np.equal(a, None), '', a).astype(str)
+        raise FeatureRunTimeException(f'Can only concat string arrays. Got dtype {a.dtype}')
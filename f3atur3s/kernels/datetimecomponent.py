@@ -0,0 +1,174 @@
+"""
+Vectorized extraction of date-time components, for instance the day-of-week or the month, from Numpy datetime64
+arrays. The components are calculated with integer arithmetic on the number of days and seconds since the epoch.
+(c) 2023 tsm
+"""
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+
+_SECONDS_PER_DAY = 86400
+
+
+def _days(values: np.ndarray) -> np.ndarray:
+    return values.astype('datetime64[D]').astype(np.int64)
+
+
+def _seconds_of_day(values: np.ndarray) -> np.ndarray:
+    return np.mod(values.astype('datetime64[s]').astype(np.int64), _SECONDS_PER_DAY)
+
+
+def _year(values: np.ndarray) -> np.ndarray:
+    return values.astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+def _month(values: np.ndarray) -> np.ndarray:
+    return np.mod(values.astype('datetime64[M]').astype(np.int64), 12) + 1
+
+
+def _day_of_month(values: np.ndarray) -> np.ndarray:
+    return _days(values) - values.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) + 1
+
+
+def _day_of_year(values: np.ndarray) -> np.ndarray:
+    return _days(values) - values.astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64) + 1
+
+
+def _weekday_sunday(values: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday. %w is 0 for Sunday.
+    return np.mod(_days(values) + 4, 7)
+
+
+def _weekday_monday(values: np.ndarray) -> np.ndarray:
+    # %u is 1 for Monday, 7 for Sunday.
+    return np.mod(_days(values) + 3, 7) + 1
+
+
+def _iso_week(values: np.ndarray) -> np.ndarray:
+    # The ISO week of a day is the week of the Thursday of the same (Monday based) week. Week 1 contains January 4th.
+    days = _days(values)
+    thursday = days - np.mod(days + 3, 7) + 3
+    iso_year_start = thursday.astype('datetime64[D]').astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    return (thursday - iso_year_start) // 7 + 1
+
+
+# The supported strftime directives and the function that calculates them.
+_COMPONENTS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    '%Y': _year,
+    '%m': _month,
+    '%d': _day_of_month,
+    '%j': _day_of_year,
+    '%w': _weekday_sunday,
+    '%u': _weekday_monday,
+    '%V': _iso_week,
+    '%H': lambda v: _seconds_of_day(v) // 3600,
+    '%M': lambda v: np.mod(_seconds_of_day(v), 3600) // 60,
+    '%S': lambda v: np.mod(_seconds_of_day(v), 60)
+}
+
+# The width strftime zero-pads each component to.
+_WIDTHS: Dict[str, int] = {
+    '%Y': 4, '%m': 2, '%d': 2, '%j': 3, '%w': 1, '%u': 1, '%V': 2, '%H': 2, '%M': 2, '%S': 2
+}
+
+# Splits a format in directives and literal text.
+_TOKENS = re.compile(r'(%.)')
+
+
+class DateTimeComponent:
+    """
+    Class that bundles the vectorized component extraction. A component is a single strftime directive that returns
+    a number, for instance '%w' (the day of the week) or '%m' (the month). Supported are %Y %m %d %j %w %u %V %H %M
+    and %S.
+    """
+    @classmethod
+    def supported(cls, format_code: str) -> bool:
+        """
+        Check if a format is a component that can be extracted vectorized.
+
+        Args:
+            format_code: A strftime format.
+
+        Returns:
+            True if the format is a single supported directive.
+        """
+        return format_code in _COMPONENTS
+
+    @classmethod
+    def extract(cls, values: np.ndarray, format_code: str) -> np.ndarray:
+        """
+        Extract a component from an array of date-times. The result for NaT values is undefined, callers should mask
+        them with np.isnat.
+
+        Args:
+            values: A Numpy datetime64 array.
+            format_code: A supported strftime directive, for instance '%w'.
+
+        Returns:
+            An int64 Numpy array with the same shape as values, the component has the value strftime would return.
+        """
+        if not np.issubdtype(values.dtype, np.datetime64):
+            raise FeatureRunTimeException(f'Can only extract date-time components from datetime64. Got {values.dtype}')
+        if not cls.supported(format_code):
+            raise FeatureRunTimeException(
+                f'Component <{format_code}> not supported. Supported are {list(_COMPONENTS.keys())}'
+            )
+        return _COMPONENTS[format_code](values)
+
+    @classmethod
+    def format(cls, values: np.ndarray, format_code: str) -> np.ndarray:
+        """
+        Format an array of date-times as strings. Formats that only consist of supported directives, literal text and
+        %%, for instance '%Y-%m' or '%H', are built vectorized from the zero-padded components. Other formats are
+        formatted per value with strftime. NaT values become empty strings.
+
+        Args:
+            values: A Numpy datetime64 array.
+            format_code: A strftime format.
+
+        Returns:
+            A Numpy unicode array, with the same values strftime would return.
+        """
+        tokens = cls._tokens(format_code)
+        if tokens is None:
+            return cls.strftime(values, format_code)
+        r: Optional[np.ndarray] = None
+        for t in tokens:
+            if t in _COMPONENTS:
+                part = np.char.zfill(cls.extract(values, t).astype(str), _WIDTHS[t])
+            else:
+                part = np.full(values.shape, t)
+            r = part if r is None else np.char.add(r, part)
+        nat = np.isnat(values)
+        if nat.any():
+            r[nat] = ''
+        return r
+
+    @staticmethod
+    def _tokens(format_code: str) -> Optional[List[str]]:
+        # Split a format in directives and literals. Returns None if it contains an unsupported directive.
+        tokens = [t for t in _TOKENS.split(format_code) if t != '']
+        if len(tokens) == 0 or any(t.startswith('%') and t not in _COMPONENTS and t != '%%' for t in tokens) or \
+                format_code.endswith('%') and not format_code.endswith('%%'):
+            return None
+        return ['%' if t == '%%' else t for t in tokens]
+
+    @classmethod
+    def strftime(cls, values: np.ndarray, format_code: str) -> np.ndarray:
+        """
+        Format each value with strftime. This is the slow path, for formats that can not be calculated vectorized.
+        NaT values become empty strings.
+
+        Args:
+            values: A Numpy datetime64 array.
+            format_code: A strftime format.
+
+        Returns:
+            A Numpy unicode array.
+        """
+        return np.array(
+            ['' if d is None else d.strftime(format_code) for d in values.astype('datetime64[s]').tolist()], dtype=str
+        )
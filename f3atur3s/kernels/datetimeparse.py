@@ -0,0 +1,237 @@
+"""
+Vectorized parsing of dates and date-times. Common fixed width format codes are compiled into a list of byte offsets,
+the values are then parsed with Numpy operations on a byte ('S' dtype) array, without creating a Python datetime
+object per value.
+(c) 2023 tsm
+"""
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Tuple, Optional, Dict
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+
+# The fixed width directives that can be parsed vectorized, with their width in characters.
+_DIRECTIVES: Dict[str, int] = {
+    'Y': 4,
+    'm': 2,
+    'd': 2,
+    'H': 2,
+    'M': 2,
+    'S': 2
+}
+
+# Value strptime uses for a directive that is not in the format.
+_DEFAULTS: Dict[str, int] = {
+    'Y': 1900,
+    'm': 1,
+    'd': 1,
+    'H': 0,
+    'M': 0,
+    'S': 0
+}
+
+# Valid ranges. The upper limit of the day is checked against the length of the month.
+_RANGES: Dict[str, Tuple[int, int]] = {
+    'Y': (1, 9999),
+    'm': (1, 12),
+    'd': (1, 31),
+    'H': (0, 23),
+    'M': (0, 59),
+    'S': (0, 59)
+}
+
+# A compiled format. A list of (directive, offset, width) for the fields and a list of (offset, byte) for literals.
+_Fields = List[Tuple[str, int, int]]
+_Literals = List[Tuple[int, int]]
+
+
+class DateTimeParser:
+    """
+    Parser for date and date-time strings. Formats that only use the fixed width directives %Y %m %d %H %M %S,
+    literal characters and %%, for instance '%Y-%m-%d', '%Y%m%d', '%Y-%m-%d %H:%M:%S' or the ISO 8601
+    '%Y-%m-%dT%H:%M:%S', are parsed vectorized. Values that do not match the fixed layout exactly and all values of
+    other formats are parsed with datetime.strptime, so the result is always the same as parsing with strptime.
+
+    Parsers are best created with the `compile` class method, which caches them per format code.
+
+    Args:
+        format_code: The strptime format code.
+    """
+    def __init__(self, format_code: str):
+        self._format_code = format_code
+        compiled = DateTimeParser._compile_format(format_code)
+        self._fields, self._literals, self._width = compiled if compiled is not None else ([], [], 0)
+        self._vectorized = compiled is not None
+
+    def __repr__(self):
+        return f'DateTimeParser : {self._format_code} vectorized={self._vectorized}'
+
+    @classmethod
+    @lru_cache(maxsize=128)
+    def compile(cls, format_code: str) -> 'DateTimeParser':
+        """
+        Get a parser for a format code. Parsers are cached, so the format is only compiled once.
+
+        Args:
+            format_code: The strptime format code.
+
+        Returns:
+            A DateTimeParser
+        """
+        return cls(format_code)
+
+    @property
+    def format_code(self) -> str:
+        return self._format_code
+
+    @property
+    def vectorized(self) -> bool:
+        """
+        Indicates if the format code can be parsed vectorized.
+
+        Returns:
+            A bool, True if the format is parsed vectorized, False if each value will be parsed with strptime.
+        """
+        return self._vectorized
+
+    def parse(self, values: np.ndarray) -> np.ndarray:
+        """
+        Parse a 1-D array of strings. Empty strings and None values become NaT.
+
+        Args:
+            values: A Numpy array of strings. Can be an 'S' (bytes), 'U' (unicode) or object array.
+
+        Returns:
+            A Numpy array with dtype 'datetime64[s]'.
+
+        Raises:
+            FeatureRunTimeException if a value can not be parsed with the format code.
+        """
+        values = np.asarray(values)
+        if values.ndim != 1:
+            raise FeatureRunTimeException(f'Can only parse 1-D arrays. Got shape {values.shape}')
+        result = np.full(values.shape[0], np.datetime64('NaT'), dtype='datetime64[s]')
+        b = self._as_bytes(values)
+        if b is None:
+            missing = np.array(
+                [v is None or (isinstance(v, (str, bytes)) and len(v) == 0) for v in values], dtype=bool
+            )
+            parsed = np.zeros(values.shape[0], dtype=bool)
+        else:
+            missing = b == b''
+            parsed = self._parse_vectorized(b, result) if self._vectorized else np.zeros(b.shape[0], dtype=bool)
+        for i in np.flatnonzero(~(parsed | missing)):
+            result[i] = self._strptime(values[i])
+        return result
+
+    def parse_one(self, value: str) -> Optional[datetime]:
+        """
+        Parse a single value with the fixed layout of the format, using string slicing instead of Numpy. Used for
+        single record processing.
+
+        Args:
+            value: A string.
+
+        Returns:
+            A datetime, or None if the format is not vectorized or the value does not have the exact fixed layout.
+            Callers should fall back to strptime in that case.
+        """
+        if not self._vectorized or not isinstance(value, str) or len(value) != self._width:
+            return None
+        for offset, byte in self._literals:
+            if ord(value[offset]) != byte:
+                return None
+        fields = dict(_DEFAULTS)
+        for d, offset, width in self._fields:
+            s = value[offset:offset + width]
+            if not (s.isascii() and s.isdigit()):
+                return None
+            fields[d] = int(s)
+        try:
+            return datetime(fields['Y'], fields['m'], fields['d'], fields['H'], fields['M'], fields['S'])
+        except ValueError:
+            return None
+
+    def _strptime(self, value) -> np.datetime64:
+        v = value.decode('utf-8') if isinstance(value, bytes) else str(value)
+        try:
+            return np.datetime64(datetime.strptime(v, self._format_code), 's')
+        except ValueError as e:
+            raise FeatureRunTimeException(
+                f'Could not parse <{v}> with format code <{self._format_code}>. Error <{e}>'
+            )
+
+    @staticmethod
+    def _as_bytes(values: np.ndarray) -> Optional[np.ndarray]:
+        # Convert to an 'S' array. Returns None if that is not possible, for instance for non-ASCII strings.
+        if values.dtype.kind == 'S':
+            return values
+        try:
+            if values.dtype.kind == 'U':
+                return values.astype('S')
+            elif values.dtype == object:
+                return np.array([b'' if v is None else v.encode('ascii') for v in values], dtype='S')
+        except (UnicodeEncodeError, AttributeError):
+            return None
+        return None
+
+    def _parse_vectorized(self, b: np.ndarray, result: np.ndarray) -> np.ndarray:
+        # Fill the rows of result that have the exact layout of the format, return a mask of the parsed rows.
+        rows, item_size = b.shape[0], b.dtype.itemsize
+        if item_size < self._width or rows == 0:
+            return np.zeros(rows, dtype=bool)
+        m = np.ascontiguousarray(b).view(np.uint8).reshape(rows, item_size)
+        # Values longer than the format have a non-null byte after the width. Shorter values fail the checks below.
+        ok = m[:, self._width] == 0 if item_size > self._width else np.ones(rows, dtype=bool)
+        for offset, byte in self._literals:
+            ok &= m[:, offset] == byte
+        values: Dict[str, np.ndarray] = {}
+        for d, offset, width in self._fields:
+            digits = m[:, offset:offset + width].astype(np.int64) - ord('0')
+            ok &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+            values[d] = digits @ (10 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+        for d, (low, high) in _RANGES.items():
+            if d in values:
+                ok &= (values[d] >= low) & (values[d] <= high)
+        v = {d: np.where(ok, values[d], _DEFAULTS[d]) if d in values else _DEFAULTS[d] for d in _DIRECTIVES}
+        month = ((v['Y'] - 1970) * 12 + v['m'] - 1) * np.ones(rows, dtype=np.int64)
+        first = month.astype('datetime64[M]').astype('datetime64[D]')
+        month_length = ((month + 1).astype('datetime64[M]').astype('datetime64[D]') - first).astype(np.int64)
+        ok &= v['d'] <= month_length
+        seconds = (v['d'] - 1) * 86400 + v['H'] * 3600 + v['M'] * 60 + v['S']
+        result[ok] = (first.astype('datetime64[s]') + np.asarray(seconds).astype('timedelta64[s]'))[ok]
+        return ok
+
+    @staticmethod
+    def _compile_format(format_code: str) -> Optional[Tuple[_Fields, _Literals, int]]:
+        # Returns None if the format can not be parsed vectorized.
+        fields: _Fields = []
+        literals: _Literals = []
+        offset, i = 0, 0
+        while i < len(format_code):
+            c = format_code[i]
+            if c == '%':
+                if i + 1 >= len(format_code):
+                    return None
+                d = format_code[i + 1]
+                if d == '%':
+                    literals.append((offset, ord('%')))
+                    offset += 1
+                elif d in _DIRECTIVES and d not in [f[0] for f in fields]:
+                    fields.append((d, offset, _DIRECTIVES[d]))
+                    offset += _DIRECTIVES[d]
+                else:
+                    return None
+                i += 2
+            else:
+                # strptime matches a space with any amount of whitespace. Only a single space is parsed vectorized.
+                if ord(c) > 127:
+                    return None
+                literals.append((offset, ord(c)))
+                offset += 1
+                i += 1
+        if len(fields) == 0:
+            return None
+        return fields, literals, offset
@@ -0,0 +1,137 @@
+"""
+Fused, in-place normalization. Scales or standardizes a block of columns, optionally after taking a logarithm, with a
+fixed number of passes over an output buffer and without temporary arrays.
+(c) 2023 tsm
+"""
+import math
+from typing import Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+
+if TYPE_CHECKING:
+    from ..common.feature import FeatureNormalizeLogBase
+
+# Multiplier that converts a natural logarithm to a logarithm of the base.
+_LOG_FACTORS = {
+    None: 1.0,
+    'e': 1.0,
+    '10': 1 / math.log(10),
+    '2': 1 / math.log(2)
+}
+
+
+class NormalizeKernel:
+    """
+    Class that bundles the normalization logic. Each column is transformed as
+
+        y = (log_base(x + delta) - offset) * scale   if the column has a log_base
+        y = (x - offset) * scale                     otherwise
+
+    For a scaling normalizer offset is the minimum and scale is 1 / (maximum - minimum), for a standardizing
+    normalizer offset is the mean and scale is 1 / stddev. The conversion of the natural logarithm to the requested base
+    is folded into the scale, so all columns are finished with a single multiply and add over the whole block.
+    """
+    @classmethod
+    def normalize(cls, values: np.ndarray, offsets: Sequence[float], scales: Sequence[float],
+                  log_bases: Sequence[Optional[str]], deltas: Sequence[float], out: Optional[np.ndarray] = None,
+                  dtype: np.dtype = np.float64) -> np.ndarray:
+        """
+        Normalize a 1-D array (one column) or a 2-D block with one column per set of coefficients.
+
+        Args:
+            values: The input, shape (rows,) or (rows, columns). Can be the same array as `out`.
+            offsets: Per column, the value subtracted before scaling.
+            scales: Per column, the multiplier.
+            log_bases: Per column, None or one of 'e', '10', '2'.
+            deltas: Per column, the value added before taking the logarithm.
+            out: (Optional) The output buffer, same shape as values. For instance a slice of a bigger array.
+            dtype: The dtype of the output if `out` is not provided.
+
+        Returns:
+            The output buffer.
+        """
+        columns = 1 if values.ndim == 1 else values.shape[1]
+        if not len(offsets) == len(scales) == len(log_bases) == len(deltas) == columns:
+            raise FeatureRunTimeException(
+                f'Expected coefficients for {columns} column(s). Got {len(offsets)}, {len(scales)}, ' +
+                f'{len(log_bases)} and {len(deltas)}'
+            )
+        if any(lb not in _LOG_FACTORS for lb in log_bases):
+            raise FeatureRunTimeException(f'Unknown log base in {log_bases}. Supported are {list(_LOG_FACTORS.keys())}')
+        if out is None:
+            out = np.empty(values.shape, dtype=dtype)
+        elif out.shape != values.shape:
+            raise FeatureRunTimeException(f'Output shape should be {values.shape}. Got {out.shape}')
+        if out is not values:
+            np.copyto(out, values, casting='same_kind')
+        block = out.reshape(-1, 1) if out.ndim == 1 else out
+        logged = [i for i, lb in enumerate(log_bases) if lb is not None]
+        if len(logged) == columns:
+            cls._log(block, np.asarray(deltas, dtype=block.dtype))
+        elif len(logged) > 0:
+            # Fancy indexing copies, write the logged columns back after the logarithm.
+            sub = block[:, logged]
+            cls._log(sub, np.asarray([deltas[i] for i in logged], dtype=block.dtype))
+            block[:, logged] = sub
+        s = np.array([sc * _LOG_FACTORS[lb] for sc, lb in zip(scales, log_bases)], dtype=block.dtype)
+        o = np.array([-of * sc for of, sc in zip(offsets, scales)], dtype=block.dtype)
+        np.multiply(block, s, out=block)
+        np.add(block, o, out=block)
+        return out
+
+    @classmethod
+    def normalize_features(cls, features: Sequence['FeatureNormalizeLogBase'], values: np.ndarray,
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Normalize a block of columns, one per feature, in one operation. The features can be any mix of
+        FeatureNormalizeScale and FeatureNormalizeStandard features, with or without log_base.
+
+        Args:
+            features: The normalize features, in the order of the columns. They must be inference ready.
+            values: The values of the base features. Shape (rows, len(features)), or (rows,) for a single feature.
+            out: (Optional) The output buffer, same shape as values. If not provided an array with the widest dtype of
+                the feature types is created.
+
+        Returns:
+            The output buffer.
+        """
+        coefficients = [cls.coefficients(f) for f in features]
+        dtype = np.result_type(*[f.type.numpy_type for f in features])
+        return cls.normalize(
+            values,
+            [c[0] for c in coefficients],
+            [c[1] for c in coefficients],
+            [f.log_base for f in features],
+            [f.delta for f in features],
+            out,
+            dtype
+        )
+
+    @staticmethod
+    def coefficients(feature: 'FeatureNormalizeLogBase') -> Tuple[float, float]:
+        """
+        Get the offset and scale of a normalize feature. A zero range or stddev gives a scale of 0, so the whole column
+        becomes 0 instead of inf or NaN.
+
+        Args:
+            feature: A FeatureNormalizeScale or FeatureNormalizeStandard feature.
+
+        Returns:
+            A tuple (offset, scale).
+
+        Raises:
+            FeatureRunTimeException if the feature is not inference ready.
+        """
+        if not feature.inference_ready:
+            raise FeatureRunTimeException(
+                f'Feature <{feature.name}> is not inference ready. Can not normalize without its inference attributes'
+            )
+        offset, spread = feature.normalize_parameters()
+        return offset, 0.0 if spread == 0 else 1 / spread
+
+    @staticmethod
+    def _log(block: np.ndarray, deltas: np.ndarray):
+        np.add(block, deltas, out=block)
+        np.log(block, out=block)
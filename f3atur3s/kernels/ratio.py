@@ -0,0 +1,44 @@
+"""
+Vectorized safe division, used by the FeatureRatio.
+(c) 2023 tsm
+"""
+from typing import Optional
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+
+
+class RatioKernel:
+    """
+    Class that bundles the ratio calculation. Divides a numerator by a denominator, rows where the denominator is 0
+    are 0, not inf or NaN.
+    """
+    @classmethod
+    def divide(cls, numerator: np.ndarray, denominator: np.ndarray, dtype: np.dtype = np.float64,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Divide 2 arrays.
+
+        Args:
+            numerator: A 1-D numerical Numpy array.
+            denominator: A 1-D numerical Numpy array with the same length as the numerator.
+            dtype: The float dtype of the result, if `out` is not provided.
+            out: (Optional) A float array to write to, for instance a column of a bigger array.
+
+        Returns:
+            An array with numerator / denominator. 0 where the denominator is 0.
+        """
+        if numerator.shape != denominator.shape:
+            raise FeatureRunTimeException(
+                f'Numerator and denominator should have the same shape. Got {numerator.shape} and {denominator.shape}'
+            )
+        if out is None:
+            out = np.zeros(numerator.shape, dtype=dtype)
+        elif out.shape != numerator.shape:
+            raise FeatureRunTimeException(f'Output shape should be {numerator.shape}. Got {out.shape}')
+        else:
+            out[...] = 0
+        # The division is done in the precision of the output. Casting float64 input to float32 output is allowed.
+        np.divide(numerator, denominator, out=out, where=denominator != 0, casting='same_kind')
+        return out
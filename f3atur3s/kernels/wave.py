@@ -0,0 +1,75 @@
+"""
+Vectorized sine/cosine wave encoding. Calculates all harmonics of a periodic value in one block.
+(c) 2023 tsm
+"""
+from typing import Optional
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+
+# Integer inputs with at most this many distinct values (max - min + 1) use a lookup table.
+_MAX_TABLE_SIZE = 1 << 16
+
+
+class WaveKernel:
+    """
+    Class that bundles the wave encoding. A value x with period p is encoded as sin(2*pi*k*x/p) and cos(2*pi*k*x/p)
+    for the harmonics k = 1 .. frequencies. The output has 2 * frequencies columns, in the order
+    sin_1, cos_1, sin_2, cos_2, ...
+
+    The sine and cosine are only calculated once, for the base angle. The higher harmonics are derived with the
+    angle-addition recurrence
+        sin((k+1)a) = sin(ka)cos(a) + cos(ka)sin(a)
+        cos((k+1)a) = cos(ka)cos(a) - sin(ka)sin(a)
+    For integer input with a small range, for instance a day-of-week, the block is calculated once per distinct value
+    and the rows are gathered from that table.
+    """
+    @classmethod
+    def encode(cls, values: np.ndarray, period: int, frequencies: int, out: Optional[np.ndarray] = None,
+               dtype: np.dtype = np.float64) -> np.ndarray:
+        """
+        Encode values as sine/cosine waves.
+
+        Args:
+            values: A 1-D Numpy array of numbers.
+            period: The period of the values.
+            frequencies: The number of harmonics.
+            out: (Optional) An array of shape (rows, 2 * frequencies) to write to. It can be a slice of a bigger
+                array. If not provided a new array is created.
+            dtype: The dtype of the output if `out` is not provided.
+
+        Returns:
+            The output array. NaN input gives NaN output.
+        """
+        values = np.asarray(values)
+        rows, columns = values.shape[0], 2 * frequencies
+        if period == 0 or frequencies < 1:
+            raise FeatureRunTimeException(f'Period must be <> 0 and frequencies > 0. Got {period} and {frequencies}')
+        if out is None:
+            out = np.empty((rows, columns), dtype=dtype)
+        elif out.shape != (rows, columns):
+            raise FeatureRunTimeException(f'Output shape should be {(rows, columns)}. Got {out.shape}')
+        if rows == 0:
+            return out
+        if np.issubdtype(values.dtype, np.integer):
+            low, high = int(values.min()), int(values.max())
+            if high - low < _MAX_TABLE_SIZE:
+                table = cls._harmonics(np.arange(low, high + 1, dtype=np.float64), period, frequencies)
+                np.take(table.astype(out.dtype, copy=False), values - low, axis=0, out=out)
+                return out
+        cls._harmonics(values.astype(np.float64, copy=False), period, frequencies, out)
+        return out
+
+    @staticmethod
+    def _harmonics(values: np.ndarray, period: int, frequencies: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = np.empty((values.shape[0], 2 * frequencies), dtype=np.float64)
+        angle = values * (2 * np.pi / period)
+        s1, c1 = np.sin(angle), np.cos(angle)
+        s, c = s1, c1
+        out[:, 0], out[:, 1] = s1, c1
+        for k in range(1, frequencies):
+            s, c = s * c1 + c * s1, c * c1 - s * s1
+            out[:, 2 * k], out[:, 2 * k + 1] = s, c
+        return out
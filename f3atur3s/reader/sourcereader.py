@@ -0,0 +1,244 @@
+"""
+Reader for source files. Reads only the source columns a TensorDefinition needs, converts them to the Numpy type of
+their FeatureSource and yields them in batches that can be passed to an executor.
+(c) 2023 tsm
+"""
+import csv
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Union
+
+import numpy as np
+
+from ..common.exception import FeatureRunTimeException
+from ..common.featuretype import FeatureTypeBool, FeatureTypeFloat, FeatureTypeInteger, FeatureTypeString
+from ..common.featuretype import FeatureTypeTimeBased
+from ..common.learningcategory import LearningCategory
+from ..features.featuresource import FeatureSource
+from ..tensor.tensordefinition import TensorDefinition
+from ..tensor.tensoranalysis import TensorDefinitionAnalysis
+
+# String values that are read as True for FeatureTypeBool sources. Compared lower case.
+_TRUE_VALUES = np.array(['1', 'true', 't', 'y', 'yes'])
+
+# A batch of source values. The name of the FeatureSource as key, a 1-D Numpy array as value.
+Batch = Dict[str, np.ndarray]
+
+
+class SourceReader:
+    """
+    Reads the source columns of a TensorDefinition from a CSV or Parquet file.
+
+    Only the FeatureSource columns that are needed to build the outputs are read (see TensorDefinitionAnalysis), all
+    other columns are skipped without being converted. Values are converted to the Numpy type of the FeatureType of
+    their FeatureSource, the types are never inferred from the data. Missing values, empty strings in CSV files or
+    nulls in Parquet files, are replaced by the `default` of the FeatureSource. Missing values without default become
+    NaN for floats, NaT for dates and '' for strings, for integer and bool sources they raise an error.
+
+    The file is read in batches of `batch_rows` rows, each batch is a dictionary with the source name as key and a
+    Numpy array as value, so it can be passed to `BatchExecutor.execute` directly.
+
+    Args:
+        td: The TensorDefinition to read the sources of.
+        batch_rows: The maximum number of rows per batch.
+        names: (Optional) Only read the sources needed for the outputs with these names.
+        categories: (Optional) Only read the sources needed for the outputs in these LearningCategories.
+    """
+    def __init__(self, td: TensorDefinition, batch_rows: int = 65536, names: Optional[List[str]] = None,
+                 categories: Optional[List[LearningCategory]] = None):
+        if batch_rows < 1:
+            raise FeatureRunTimeException(f'batch_rows must be >= 1. Got {batch_rows}')
+        self._td = td
+        self._batch_rows = batch_rows
+        self._sources = TensorDefinitionAnalysis(td, names, categories).required_sources
+
+    def __repr__(self):
+        return f'SourceReader : {self._td.name} sources={[s.name for s in self._sources]}'
+
+    @property
+    def sources(self) -> List[FeatureSource]:
+        """
+        The sources this reader reads.
+
+        Returns:
+            A list of FeatureSource objects.
+        """
+        return self._sources
+
+    def read_csv(self, file: Union[str, TextIO], delimiter: str = ',', quote_char: str = '"',
+                 encoding: str = 'utf-8') -> Iterator[Batch]:
+        """
+        Read a CSV file with a header row. The columns are looked up by the name of the FeatureSource.
+
+        Args:
+            file: The name of the file or an open text file.
+            delimiter: The field delimiter.
+            quote_char: The quote character.
+            encoding: The encoding of the file, if a name is given.
+
+        Returns:
+            An iterator of batches.
+        """
+        if isinstance(file, str):
+            with open(file, 'r', encoding=encoding, newline='') as f:
+                yield from self.read_csv(f, delimiter, quote_char)
+            return
+        reader = csv.reader(file, delimiter=delimiter, quotechar=quote_char)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = {n: i for i, n in enumerate(header)}
+        missing = [s.name for s in self._sources if s.name not in positions]
+        if len(missing) > 0:
+            raise FeatureRunTimeException(f'Columns {missing} not found in CSV header {header}')
+        if len(self._sources) == 0:
+            return
+        # itemgetter with a single index returns a value, not a tuple.
+        pick = itemgetter(*[positions[s.name] for s in self._sources])
+        single = len(self._sources) == 1
+        while True:
+            rows = [pick(r) for r in islice(reader, self._batch_rows)]
+            if len(rows) == 0:
+                return
+            columns = [rows] if single else list(zip(*rows))
+            yield {s.name: self.convert(s, np.array(c, dtype=np.str_)) for s, c in zip(self._sources, columns)}
+
+    def read_parquet(self, file: str) -> Iterator[Batch]:
+        """
+        Read a Parquet file. Only the needed columns are read, one batch of row-groups at a time. Requires pyarrow.
+
+        Args:
+            file: The name of the file.
+
+        Returns:
+            An iterator of batches.
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise FeatureRunTimeException(f'Reading Parquet files requires pyarrow, it is not installed')
+        pf = pq.ParquetFile(file)
+        available = set(pf.schema_arrow.names)
+        missing = [s.name for s in self._sources if s.name not in available]
+        if len(missing) > 0:
+            raise FeatureRunTimeException(f'Columns {missing} not found in Parquet file {file}')
+        if len(self._sources) == 0:
+            return
+        for rb in pf.iter_batches(batch_size=self._batch_rows, columns=[s.name for s in self._sources]):
+            batch = {}
+            for i, s in enumerate(self._sources):
+                column = rb.column(i)
+                values = column.to_numpy(zero_copy_only=False)
+                nulls = column.is_null().to_numpy(zero_copy_only=False) if column.null_count > 0 else None
+                batch[s.name] = self.convert(s, values, nulls)
+            yield batch
+
+    @staticmethod
+    def count_csv(file: Union[str, TextIO], delimiter: str = ',', quote_char: str = '"',
+                  encoding: str = 'utf-8') -> int:
+        """
+        Count the data rows of a CSV file with a header row, without converting any values. Records with quoted line
+        breaks count as one row. An open file is moved back to where it was.
+
+        Args:
+            file: The name of the file or an open, seekable, text file.
+            delimiter: The field delimiter.
+            quote_char: The quote character.
+            encoding: The encoding of the file, if a name is given.
+
+        Returns:
+            The number of rows, without the header.
+        """
+        if isinstance(file, str):
+            with open(file, 'r', encoding=encoding, newline='') as f:
+                return SourceReader.count_csv(f, delimiter, quote_char)
+        position = file.tell()
+        rows = sum(1 for _ in csv.reader(file, delimiter=delimiter, quotechar=quote_char))
+        file.seek(position)
+        return max(0, rows - 1)
+
+    @staticmethod
+    def count_parquet(file: str) -> int:
+        """
+        The number of rows of a Parquet file, taken from its metadata. Requires pyarrow.
+
+        Args:
+            file: The name of the file.
+
+        Returns:
+            The number of rows.
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise FeatureRunTimeException(f'Reading Parquet files requires pyarrow, it is not installed')
+        return pq.ParquetFile(file).metadata.num_rows
+
+    @classmethod
+    def convert(cls, source: FeatureSource, values: np.ndarray, missing: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Convert raw values to the Numpy type of a FeatureSource and fill the missing values with its default.
+
+        Args:
+            source: The FeatureSource.
+            values: A 1-D Numpy array with the raw values. Strings, or already typed values, for instance from Parquet.
+            missing: (Optional) A boolean mask of the missing values. If not given, empty strings are missing in string
+                arrays and None is missing in object arrays.
+
+        Returns:
+            A Numpy array with the dtype of the FeatureType of the source.
+        """
+        tp = source.type
+        if missing is None:
+            missing = cls._missing(values)
+        has_missing = missing is not None and bool(missing.any())
+        if values.dtype.kind in ('U', 'S', 'O'):
+            values = cls._fill_text(source, values, missing if has_missing else None)
+            try:
+                if isinstance(tp, FeatureTypeTimeBased):
+                    return source.parse(values)
+                elif isinstance(tp, FeatureTypeBool):
+                    return np.isin(np.char.lower(values.astype(np.str_)), _TRUE_VALUES)
+                elif isinstance(tp, FeatureTypeString):
+                    return values.astype(np.str_, copy=False)
+                return values.astype(tp.numpy_type)
+            except ValueError as e:
+                raise FeatureRunTimeException(f'Could not convert values of source <{source.name}> to {tp.name}. {e}')
+        # Typed values, for instance from Parquet. Missing values are overwritten below, their cast does not matter.
+        with np.errstate(invalid='ignore'):
+            r = values.astype(tp.numpy_type)
+        if has_missing:
+            if source.default is not None:
+                r[missing] = source.default
+            elif isinstance(tp, (FeatureTypeInteger, FeatureTypeBool)):
+                raise FeatureRunTimeException(f'Source <{source.name}> has missing values and no default')
+        return r
+
+    @staticmethod
+    def _missing(values: np.ndarray) -> Optional[np.ndarray]:
+        if values.dtype.kind == 'U':
+            return values == ''
+        elif values.dtype.kind == 'S':
+            return values == b''
+        elif values.dtype.kind == 'O':
+            return np.frompyfunc(lambda x: x is None or x == '', 1, 1)(values).astype(bool)
+        return None
+
+    @staticmethod
+    def _fill_text(source: FeatureSource, values: np.ndarray, missing: Optional[np.ndarray]) -> np.ndarray:
+        # Replace the missing values by the default, or by a value that converts to NaN/NaT/''.
+        if values.dtype.kind == 'O':
+            values = np.where(missing, '', values).astype(np.str_) if missing is not None else values.astype(np.str_)
+        if missing is None:
+            return values
+        tp = source.type
+        if source.default is not None:
+            fill: Any = source.default
+        elif isinstance(tp, FeatureTypeFloat):
+            fill = 'nan'
+        elif isinstance(tp, (FeatureTypeInteger, FeatureTypeBool)):
+            raise FeatureRunTimeException(f'Source <{source.name}> has missing values and no default')
+        else:
+            fill = ''
+        # np.where widens the string dtype if the fill value is longer than the values.
+        return np.where(missing, str(fill) if values.dtype.kind == 'U' else str(fill).encode(), values)
@@ -0,0 +1,119 @@
+"""
+Definition of the dtype policies. A policy decides the Numpy dtype of each feature and of the output matrix of each
+LearningCategory when a TensorDefinition is built.
+(c) 2023 tsm
+"""
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from ..common.exception import TensorDefinitionException
+from ..common.feature import Feature
+from ..common.learningcategory import LearningCategory
+from ..common.learningcategory import LEARNING_CATEGORY_BINARY, LEARNING_CATEGORY_CATEGORICAL
+from ..common.learningcategory import LEARNING_CATEGORY_CONTINUOUS
+from ..features.featurebin import FeatureBin
+from ..features.featureindex import FeatureIndex
+from .tensordefinition import TensorDefinition
+
+# Signed integer types from small to large. Signed because index tensors are typically used as embedding input.
+_INT_TYPES: List[np.dtype] = [np.dtype(np.int8), np.dtype(np.int16), np.dtype(np.int32), np.dtype(np.int64)]
+
+
+@dataclass(frozen=True)
+class DtypePolicy:
+    """
+    A dtype policy. The 'default' policy uses the Numpy type of the FeatureType of each feature. The output matrix of a
+    LearningCategory gets the type all its features can be cast to without loss.
+    """
+    name: str
+
+    def feature_dtype(self, feature: Feature) -> np.dtype:
+        """
+        The dtype of the values of a feature.
+
+        Args:
+            feature: The feature.
+
+        Returns:
+            A Numpy dtype.
+        """
+        return feature.type.numpy_type
+
+    def category_dtype(self, category: LearningCategory, features: List[Feature]) -> np.dtype:
+        """
+        The dtype of the output matrix of a LearningCategory.
+
+        Args:
+            category: The LearningCategory.
+            features: The features of the TensorDefinition in that LearningCategory.
+
+        Returns:
+            A Numpy dtype.
+        """
+        return np.result_type(*[self.feature_dtype(f) for f in features])
+
+    def dtypes(self, td: TensorDefinition) -> Dict[LearningCategory, np.dtype]:
+        """
+        The dtype of the output matrix of each LearningCategory of a TensorDefinition.
+
+        Args:
+            td: The TensorDefinition.
+
+        Returns:
+            A dictionary with the LearningCategory as key and the dtype as value.
+        """
+        return {lc: self.category_dtype(lc, td.filter_features(lc)) for lc in td.learning_categories}
+
+
+@dataclass(frozen=True)
+class DtypePolicyCompact(DtypePolicy):
+    """
+    The 'compact' policy. Uses the smallest dtype that holds the values without loss of information a model cares
+    about. Continuous features become float32, binary features int8 and categorical index features the smallest integer
+    type that holds their fitted cardinality. Features in other categories, for instance labels, keep their type.
+    The cardinality is only known once the features are fitted, so the features should be ready for inference.
+    """
+    def feature_dtype(self, feature: Feature) -> np.dtype:
+        lc = feature.learning_category
+        if lc == LEARNING_CATEGORY_CONTINUOUS:
+            return np.dtype(np.float32)
+        elif lc == LEARNING_CATEGORY_BINARY:
+            return np.dtype(np.int8)
+        elif lc == LEARNING_CATEGORY_CATEGORICAL:
+            if isinstance(feature, FeatureIndex):
+                self._val_inference_ready(feature)
+                # Index 0 is reserved for unknown values.
+                return self.smallest_int(max(feature.dictionary.values(), default=0))
+            elif isinstance(feature, FeatureBin):
+                return self.smallest_int(feature.number_of_bins)
+        return feature.type.numpy_type
+
+    @staticmethod
+    def smallest_int(maximum: int) -> np.dtype:
+        """
+        The smallest signed integer type that can hold the values 0 .. maximum.
+
+        Args:
+            maximum: The largest value.
+
+        Returns:
+            A Numpy integer dtype.
+        """
+        for t in _INT_TYPES:
+            if maximum <= np.iinfo(t).max:
+                return t
+        raise TensorDefinitionException(f'No integer type can hold the value {maximum}')
+
+    @staticmethod
+    def _val_inference_ready(feature: Feature):
+        if not feature.inference_ready:
+            raise TensorDefinitionException(
+                f'Feature <{feature.name}> is not ready for inference. The compact dtype policy needs its cardinality'
+            )
+
+
+DTYPE_POLICY_DEFAULT = DtypePolicy('default')
+DTYPE_POLICY_COMPACT = DtypePolicyCompact('compact')
+DTYPE_POLICIES: Dict[str, DtypePolicy] = {p.name: p for p in (DTYPE_POLICY_DEFAULT, DTYPE_POLICY_COMPACT)}
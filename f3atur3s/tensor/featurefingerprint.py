@@ -0,0 +1,236 @@
+"""
+Helper class to calculate structural fingerprints of features and of the source data they are built from.
+(c) 2023 tsm
+"""
+import builtins
+import dataclasses
+import dis
+import hashlib
+import json
+import os
+import uuid
+from types import BuiltinFunctionType, CodeType, ModuleType
+from typing import Any, Dict, FrozenSet, List, Set
+
+import numpy as np
+
+from ..common.feature import Feature
+from ..common.expression import Expression
+
+# Fields that are derived from other fields and should not influence the fingerprint.
+_FINGERPRINT_SKIP_FIELDS = ('embedded_features',)
+# Prefix of the fingerprints of features that can not be fingerprinted reliably.
+UNIQUE_FINGERPRINT_PREFIX = 'unique-'
+
+
+class _NotFingerprintable(Exception):
+    """
+    Raised internally when a value, typically something a function captured, can not be fingerprinted reliably.
+    """
+
+
+class FeatureFingerprint:
+    """
+    Class that bundles the fingerprint logic. A fingerprint is a digest of the definition of a feature. It includes
+    the class, the type, all parameters, the inference attributes and, recursively, the fingerprints of the features
+    it is built from. Two features with the same fingerprint will always build the same values from the same source
+    data, changing the definition of a feature changes its fingerprint and the fingerprint of all its dependents.
+
+    The name of a derived feature is not part of the fingerprint, the name of a feature without embedded features
+    (a FeatureSource for instance) is, because that name defines which data is read.
+
+    Expressions of the Expression DSL are fingerprinted by their canonical text. Python functions are fingerprinted by
+    their code together with everything that can change what the code computes, the values captured in the closure,
+    the defaults and the globals the code refers to. If any of those is not a constant that can be fingerprinted, for
+    instance a captured Numpy array or object that could be changed later, the feature gets a unique fingerprint. It
+    is then never an alias of another feature and never found in a cache, and neither are its dependents.
+    """
+    @classmethod
+    def feature(cls, feature: Feature) -> str:
+        """
+        Calculate the fingerprint of a feature.
+
+        Args:
+            feature: The feature to fingerprint.
+
+        Returns:
+            A hex string fingerprint of the feature.
+        """
+        return cls._feature(feature, {})
+
+    @classmethod
+    def features(cls, features: List[Feature]) -> Dict[str, str]:
+        """
+        Calculate the fingerprints of a list of features. Shared embedded features are only fingerprinted once.
+
+        Args:
+            features: A list of features to fingerprint.
+
+        Returns:
+            A dictionary with the feature names as key and the fingerprints as value.
+        """
+        memo: Dict[int, str] = {}
+        return {f.name: cls._feature(f, memo) for f in features}
+
+    @classmethod
+    def source_arrays(cls, arrays: Dict[str, np.ndarray]) -> str:
+        """
+        Calculate the fingerprint of source data that is held in memory as Numpy arrays.
+
+        Args:
+            arrays: Dictionary with the source feature names as keys and a Numpy array of values as value.
+
+        Returns:
+            A hex string fingerprint of the data.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for name in sorted(arrays.keys()):
+            a = np.ascontiguousarray(arrays[name])
+            h.update(name.encode('utf-8'))
+            h.update(str(a.dtype).encode('utf-8'))
+            h.update(str(a.shape).encode('utf-8'))
+            if a.dtype == object:
+                h.update(repr(a.tolist()).encode('utf-8'))
+            else:
+                h.update(a.tobytes())
+        return h.hexdigest()
+
+    @classmethod
+    def source_file(cls, file: str) -> str:
+        """
+        Calculate the fingerprint of a source file. Uses the absolute path, size and modification time of the file, it
+        does not read the content.
+
+        Args:
+            file: The name of the file.
+
+        Returns:
+            A hex string fingerprint of the file.
+        """
+        st = os.stat(file)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f'{os.path.abspath(file)}|{st.st_size}|{st.st_mtime_ns}'.encode('utf-8'))
+        return h.hexdigest()
+
+    @classmethod
+    def _feature(cls, feature: Feature, memo: Dict[int, str]) -> str:
+        fp = memo.get(id(feature), None)
+        if fp is not None:
+            return fp
+        leaf = len(feature.embedded_features) == 0
+        parts: Dict[str, Any] = {'class': feature.__class__.__name__}
+        try:
+            for fld in dataclasses.fields(feature):
+                if fld.name in _FINGERPRINT_SKIP_FIELDS or (fld.name == 'name' and not leaf):
+                    continue
+                parts[fld.name] = cls._value(getattr(feature, fld.name), memo)
+            fp = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        except _NotFingerprintable:
+            # A random fingerprint. It will not match any other fingerprint, not even one of the same feature.
+            fp = f'{UNIQUE_FINGERPRINT_PREFIX}{uuid.uuid4().hex}'
+        memo[id(feature)] = fp
+        return fp
+
+    @staticmethod
+    def is_unique(fingerprint: str) -> bool:
+        """
+        Check if a fingerprint is unique, i.e. it belongs to a feature that could not be fingerprinted reliably or that
+        is built from such a feature. The values of such a feature should not be re-used.
+
+        Args:
+            fingerprint: A fingerprint.
+
+        Returns:
+            True if the fingerprint is unique.
+        """
+        return fingerprint.startswith(UNIQUE_FINGERPRINT_PREFIX)
+
+    @classmethod
+    def _value(cls, value: Any, memo: Dict[int, str]) -> Any:
+        if isinstance(value, Feature):
+            fp = cls._feature(value, memo)
+            if cls.is_unique(fp):
+                raise _NotFingerprintable()
+            return fp
+        elif isinstance(value, (list, tuple)):
+            return [cls._value(v, memo) for v in value]
+        elif isinstance(value, dict):
+            return {str(k): cls._value(v, memo) for k, v in value.items()}
+        elif isinstance(value, Expression):
+            return f'Expression:{value.canonical}'
+        elif dataclasses.is_dataclass(value):
+            return {value.__class__.__name__: dataclasses.asdict(value)}
+        elif hasattr(value, '__code__'):
+            return cls._function(value, frozenset())
+        elif value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        else:
+            return repr(value)
+
+    @classmethod
+    def _function(cls, fn: Any, seen: FrozenSet[int]) -> str:
+        # The code, plus the captured values, defaults and globals the code refers to. `seen` stops the recursion for
+        # functions that refer to themselves or to each other.
+        name = f'{getattr(fn, "__module__", "")}.{fn.__qualname__}'
+        if id(fn) in seen:
+            return f'recursive:{name}'
+        seen = seen | {id(fn)}
+        h = hashlib.sha256(f'{name}:{cls._code(fn.__code__)}'.encode('utf-8'))
+        for cell in fn.__closure__ or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                # A cell that is not filled yet, its value is only known when the function is called.
+                raise _NotFingerprintable()
+            h.update(cls._constant(contents, seen).encode('utf-8'))
+        h.update(cls._constant(fn.__defaults__, seen).encode('utf-8'))
+        h.update(cls._constant(fn.__kwdefaults__, seen).encode('utf-8'))
+        fn_globals = getattr(fn, '__globals__', {})
+        for g in sorted(cls._globals(fn.__code__, set())):
+            if g in fn_globals:
+                h.update(f'{g}={cls._constant(fn_globals[g], seen)}'.encode('utf-8'))
+            elif not hasattr(builtins, g):
+                # Not defined yet. It could be defined with any value later.
+                raise _NotFingerprintable()
+        return h.hexdigest()
+
+    @classmethod
+    def _constant(cls, value: Any, seen: FrozenSet[int]) -> str:
+        # A string for values that can not change without the function changing. Raises for anything mutable or unknown.
+        if value is None or isinstance(value, (str, bytes, int, float, complex, bool, np.generic)):
+            return f'{type(value).__name__}:{value!r}'
+        elif isinstance(value, (tuple, frozenset)):
+            items = [cls._constant(v, seen) for v in value]
+            return f'{type(value).__name__}:[{",".join(sorted(items) if isinstance(value, frozenset) else items)}]'
+        elif isinstance(value, dict):
+            # Only defaults (__kwdefaults__) are dictionaries here, they belong to the function and are not shared.
+            return f'dict:{{{",".join(f"{k!r}:{cls._constant(v, seen)}" for k, v in sorted(value.items()))}}}'
+        elif isinstance(value, Expression):
+            return f'Expression:{value.canonical}'
+        elif isinstance(value, ModuleType):
+            return f'module:{value.__name__}'
+        elif isinstance(value, (type, BuiltinFunctionType, np.ufunc)):
+            qualname = getattr(value, '__qualname__', value.__name__)
+            return f'{type(value).__name__}:{getattr(value, "__module__", "")}.{qualname}'
+        elif hasattr(value, '__code__'):
+            return f'function:{cls._function(value, seen)}'
+        raise _NotFingerprintable()
+
+    @classmethod
+    def _globals(cls, code: CodeType, names: Set[str]) -> Set[str]:
+        # The global names a code object and the code objects nested in it load. co_names can not be used, it also
+        # holds the attribute names.
+        names.update(i.argval for i in dis.get_instructions(code) if i.opname in ('LOAD_GLOBAL', 'LOAD_NAME'))
+        for c in code.co_consts:
+            if isinstance(c, CodeType):
+                cls._globals(c, names)
+        return names
+
+    @classmethod
+    def _code(cls, code: CodeType) -> str:
+        # Nested code objects (lambdas, comprehensions) have their memory address in their repr. Recurse into them.
+        h = hashlib.sha256(code.co_code)
+        for c in code.co_consts:
+            h.update((cls._code(c) if isinstance(c, CodeType) else repr(c)).encode('utf-8'))
+        h.update(repr(code.co_names).encode('utf-8'))
+        return h.hexdigest()
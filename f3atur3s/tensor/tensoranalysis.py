@@ -0,0 +1,213 @@
+"""
+Static analysis of a TensorDefinition. Finds the source columns that are actually needed, the features that are built
+but never used and estimates the cost of each output feature.
+(c) 2023 tsm
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from ..common.exception import TensorDefinitionException
+from ..common.feature import Feature
+from ..common.featuretype import FeatureTypeTimeBased
+from ..common.learningcategory import LearningCategory, LEARNING_CATEGORIES_MODEL
+from ..features.featuresource import FeatureSource
+from .tensordefinition import TensorDefinition
+from .tensorplan import TensorDefinitionPlan
+
+# Rough cost in nanoseconds per row of building a feature of a class, measured with the vectorized transform methods
+# (see benchmark/suite.py). Only the relative size matters. Use `measured` costs for exact numbers.
+DEFAULT_COSTS: Dict[str, float] = {
+    'FeatureSource': 20.0,
+    'FeatureVirtual': 0.0,
+    'FeatureNormalizeScale': 2.0,
+    'FeatureNormalizeStandard': 2.0,
+    'FeatureRatio': 3.0,
+    'FeatureConcat': 15.0,
+    'FeatureExpression': 5.0,
+    'FeatureFilter': 5.0,
+    'FeatureBin': 25.0,
+    'FeatureIndex': 85.0,
+    'FeatureOneHot': 100.0,
+    'FeatureLabelBinary': 1.0,
+    'FeatureDateTimeFormat': 150.0,
+    'FeatureDateTimeWave': 15.0
+}
+# Parsing a date-time source is a lot more expensive than reading a number.
+DEFAULT_TIME_SOURCE_COST = 700.0
+DEFAULT_COST = 50.0
+
+
+@dataclass(frozen=True)
+class OutputCost:
+    """
+    Estimated cost of one output feature, in nanoseconds per row.
+
+    total: The cost of the output and all the features it is built from.
+    exclusive: The cost of the features only this output needs. It is what would be saved by removing the output.
+    amortized: The cost of each feature divided over all outputs that need it. The amortized costs of all outputs add
+        up to the cost of the whole TensorDefinition.
+    """
+    total: float
+    exclusive: float
+    amortized: float
+
+
+class TensorDefinitionAnalysis:
+    """
+    Analysis of the dependency DAG of a TensorDefinition.
+
+    The outputs are the features of the TensorDefinition that end up in a model LearningCategory, optionally
+    restricted to some names and/or categories. Every feature that is not needed to build the outputs is dead, for
+    instance a feature in a non-model category, or an intermediate that only other dead features use. The required
+    sources are the input columns a reader has to provide, all other columns can be skipped without parsing them.
+
+    Costs are estimated per feature from a table of per-class costs (DEFAULT_COSTS). Measured costs, for instance from
+    `FeatureProfiler.cost_per_row()`, take precedence. Structurally identical features are built only once (see
+    TensorDefinitionPlan), they cost nothing.
+
+    Args:
+        td: The TensorDefinition to analyse.
+        names: (Optional) Only consider the outputs with these names.
+        categories: (Optional) Only consider the outputs in these LearningCategories.
+        measured: (Optional) A dictionary with feature names as key and measured cost in nanoseconds per row as value.
+    """
+    def __init__(self, td: TensorDefinition, names: Optional[List[str]] = None,
+                 categories: Optional[List[LearningCategory]] = None, measured: Optional[Mapping[str, float]] = None):
+        self._td = td
+        self._measured = {} if measured is None else dict(measured)
+        unknown = [n for n in (names or []) if n not in [f.name for f in td.features]]
+        if len(unknown) > 0:
+            raise TensorDefinitionException(f'Features {unknown} are not part of TensorDefinition <{td.name}>')
+        self._outputs = [
+            f for f in td.features if f.learning_category in LEARNING_CATEGORIES_MODEL and
+            (names is None or f.name in names) and (categories is None or f.learning_category in categories)
+        ]
+        required = set(self._outputs)
+        for f in self._outputs:
+            required.update(f.embedded_features)
+        self._required = tuple(f for f in td.embedded_features if f in required)
+        self._aliases = {s.feature.name: s.alias_of.name for s in TensorDefinitionPlan(td).steps if s.is_alias}
+        # Per required feature, the outputs that need it.
+        self._users: Dict[str, List[Feature]] = {f.name: [] for f in self._required}
+        for o in self._outputs:
+            for f in (o,) + tuple(o.embedded_features):
+                if o not in self._users[f.name]:
+                    self._users[f.name].append(o)
+
+    def __repr__(self):
+        return f'TensorDefinitionAnalysis : {self._td.name} outputs={len(self._outputs)} dead={len(self.dead_features)}'
+
+    @property
+    def outputs(self) -> List[Feature]:
+        return self._outputs
+
+    @property
+    def required_features(self) -> Tuple[Feature, ...]:
+        """
+        The features needed to build the outputs, in the order of `TensorDefinition.embedded_features`.
+        """
+        return self._required
+
+    @property
+    def required_sources(self) -> List[FeatureSource]:
+        """
+        The source features the outputs are built from. Their names are the columns a reader has to provide.
+        """
+        return [f for f in self._required if isinstance(f, FeatureSource)]
+
+    @property
+    def unused_sources(self) -> List[FeatureSource]:
+        """
+        The source features of the TensorDefinition that are not needed for any output.
+        """
+        return [f for f in self.dead_features if isinstance(f, FeatureSource)]
+
+    @property
+    def dead_features(self) -> List[Feature]:
+        """
+        The features of the TensorDefinition that are not needed to build any output.
+        """
+        required = set(self._required)
+        return [f for f in self._td.embedded_features if f not in required]
+
+    @property
+    def duplicate_features(self) -> Dict[str, str]:
+        """
+        The required features that are structurally identical to another feature. They are not built, but they do
+        clutter the definition.
+
+        Returns:
+            A dictionary with the name of the duplicate as key and the name of the feature that is built as value.
+        """
+        names = set(f.name for f in self._required)
+        return {k: v for k, v in self._aliases.items() if k in names}
+
+    def cost(self, feature: Feature) -> float:
+        """
+        The estimated cost of building a single feature, without the features it is built from.
+
+        Args:
+            feature: The feature.
+
+        Returns:
+            The cost in nanoseconds per row.
+        """
+        canonical = self._aliases.get(feature.name, None)
+        if canonical is not None and canonical in self._users:
+            # The feature this is an alias of is built anyway.
+            return 0.0
+        c = self._measured.get(feature.name if canonical is None else canonical, None)
+        if c is not None:
+            return c
+        if isinstance(feature, FeatureSource) and isinstance(feature.type, FeatureTypeTimeBased):
+            return DEFAULT_TIME_SOURCE_COST
+        return DEFAULT_COSTS.get(feature.__class__.__name__, DEFAULT_COST)
+
+    @property
+    def total_cost(self) -> float:
+        """
+        The estimated cost of building all required features, in nanoseconds per row.
+        """
+        return sum(self.cost(f) for f in self._required)
+
+    @property
+    def dead_cost(self) -> float:
+        """
+        The estimated cost of the dead features, i.e. what is saved per row by not building them.
+        """
+        return sum(self.cost(f) for f in self.dead_features)
+
+    @property
+    def output_costs(self) -> Dict[str, OutputCost]:
+        """
+        The estimated cost per output feature, most expensive (total) first.
+
+        Returns:
+            A dictionary with the name of the output as key and an OutputCost as value.
+        """
+        r = {}
+        for o in self._outputs:
+            closure = (o,) + tuple(o.embedded_features)
+            costs = [(self.cost(f), len(self._users[f.name])) for f in closure]
+            r[o.name] = OutputCost(
+                total=sum(c for c, _ in costs),
+                exclusive=sum(c for c, n in costs if n == 1),
+                amortized=sum(c / n for c, n in costs)
+            )
+        return dict(sorted(r.items(), key=lambda x: x[1].total, reverse=True))
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            'tensor_definition': self._td.name,
+            'outputs': [f.name for f in self._outputs],
+            'required_sources': [f.name for f in self.required_sources],
+            'unused_sources': [f.name for f in self.unused_sources],
+            'dead_features': [f.name for f in self.dead_features],
+            'duplicate_features': self.duplicate_features,
+            'total_cost': self.total_cost,
+            'dead_cost': self.dead_cost,
+            'output_costs': {
+                k: {'total': v.total, 'exclusive': v.exclusive, 'amortized': v.amortized}
+                for k, v in self.output_costs.items()
+            }
+        }
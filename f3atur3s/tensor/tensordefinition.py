@@ -3,7 +3,7 @@ Definition of the TensorDefinition feature. It is used to bundle Feature objects
 (c) 2023 tsm
 """
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from ..common.exception import TensorDefinitionException
 from ..common.feature import Feature, FeatureExpander, FeatureTypeNumerical
@@ -83,10 +83,10 @@ class TensorDefinition:
         self._name = name
         self._rank = None
         self._shapes = None
-        if features is None:
-            self._feature_list = []
-        else:
-            self._features_list = features
+        # A copy, so the caller can not change the features behind the back of the cached closure.
+        self._features_list = [] if features is None else list(features)
+        self._closure: Optional[Tuple[Feature, ...]] = None
+        self._dependents: Optional[Dict[str, Tuple[Feature, ...]]] = None
         self._val_duplicate_entries()
         self._val_base_feature_overlap()
 
@@ -162,12 +162,13 @@ class TensorDefinition:
     @property
     def features(self) -> List[Feature]:
         """
-        Property that lists all features of this tensor definition
+        Property that lists all features of this tensor definition. The list is a copy, changing it does not change the
+        TensorDefinition. Use `remove` to remove a feature.
 
         Returns:
              A list of features of the tensor definition
         """
-        return self._features_list
+        return list(self._features_list)
 
     @property
     def feature_names(self) -> List[str]:
@@ -187,18 +188,44 @@ class TensorDefinition:
         return out
 
     @property
-    def embedded_features(self) -> List[Feature]:
+    def embedded_features(self) -> Tuple[Feature, ...]:
         """
         Function which returns all features embedded in the base features + the base features themselves. It effectively
         returns all features referenced in this Tensor Definition.
 
+        The closure is calculated once and cached. The features are ordered so that a feature always comes after the
+        features it is built from, features without dependencies between them are ordered by name.
+
+        Returns:
+             A tuple of features embedded in the base features + the base features
+        """
+        if self._closure is None:
+            closure = dict.fromkeys(self._features_list)
+            for f in self._features_list:
+                closure.update(dict.fromkeys(f.embedded_features))
+            # A feature has more embedded features than any of the features it is built from.
+            self._closure = tuple(sorted(closure.keys(), key=lambda x: (len(x.embedded_features), x.name)))
+        return self._closure
+
+    def dependents(self, feature: Feature) -> Tuple[Feature, ...]:
+        """
+        Get all features of this TensorDefinition that are built, directly or indirectly, from a feature. These are
+        the features that need to be rebuilt if the feature changes. The reverse index is calculated once and cached.
+
+        Args:
+            feature: The feature to find the dependents of.
+
         Returns:
-             A list of features embedded in the base features + the base features
+            A tuple with the dependent features, in the same order as `embedded_features`. Empty if no feature depends
+            on the feature or if the feature is not part of this TensorDefinition.
         """
-        base_features = self._features_list
-        embedded_features = [features.embedded_features for features in base_features]
-        embedded_features_flat = [feature for features in embedded_features for feature in features]
-        return list(set(embedded_features_flat + base_features))
+        if self._dependents is None:
+            index: Dict[str, List[Feature]] = {}
+            for f in self.embedded_features:
+                for e in f.embedded_features:
+                    index.setdefault(e.name, []).append(f)
+            self._dependents = {k: tuple(v) for k, v in index.items()}
+        return self._dependents.get(feature.name, ())
 
     @property
     def inference_ready(self) -> bool:
@@ -240,8 +267,48 @@ class TensorDefinition:
         # Last one has the biggest precision
         return t[-1]
 
+    def subset(self, names: Optional[List[str]] = None, categories: Optional[List[LearningCategory]] = None,
+               name: Optional[str] = None) -> 'TensorDefinition':
+        """
+        Create a new TensorDefinition with only some of the features of this TensorDefinition. Features are selected
+        by name and/or by LearningCategory, a feature is kept if it matches either. The order of the features is kept.
+
+        The embedded features of the new TensorDefinition are only the features needed to build the selected features,
+        so executors, savers and loaders do not touch any of the other features. The Feature objects are shared with
+        this TensorDefinition, they are not copied.
+
+        Args:
+            names: (Optional) The names of the features to keep.
+            categories: (Optional) The LearningCategories of the features to keep.
+            name: (Optional) The name of the new TensorDefinition. Default is the name of this one with a '-subset'
+                suffix.
+
+        Returns:
+            A new TensorDefinition.
+
+        Raises:
+            TensorDefinitionException if a name is not a feature of this TensorDefinition or if nothing is selected.
+        """
+        names = [] if names is None else names
+        categories = [] if categories is None else categories
+        own = set(f.name for f in self.features)
+        unknown = [n for n in names if n not in own]
+        if len(unknown) > 0:
+            raise TensorDefinitionException(
+                f'Can not create subset of <{self.name}>. Features {unknown} are not part of the TensorDefinition'
+            )
+        selected = [f for f in self.features if f.name in names or f.learning_category in categories]
+        if len(selected) == 0:
+            raise TensorDefinitionException(
+                f'Can not create subset of <{self.name}>. No features selected by names {names} and categories ' +
+                f'{[c.name for c in categories]}'
+            )
+        return TensorDefinition(f'{self.name}-subset' if name is None else name, selected)
+
     def remove(self, feature: Feature) -> None:
         self._features_list.remove(feature)
+        self._closure = None
+        self._dependents = None
 
     def filter_features(self, category: LearningCategory, expand=False) -> List[Feature]:
         """
@@ -328,7 +395,7 @@ class TensorDefinition:
         Returns:
              A list of features that returned False to the inference_ready call
         """
-        return [f for f in self.embedded_features if f.inference_ready]
+        return [f for f in self.embedded_features if not f.inference_ready]
 
     @property
     def is_series_based(self) -> bool:
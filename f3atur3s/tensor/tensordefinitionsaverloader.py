@@ -7,16 +7,18 @@ import json
 import os
 import pickle
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from ..common.feature import Feature
 from ..common.featuresave import FeatureWithPickle
 from ..common.exception import TensorDefinitionSaverException, TensorDefinitionLoaderException
 from ..common.exception import TensorDefinitionException
 from .tensordefinition import TensorDefinition
+from .tensorfitter import TensorDefinitionFitter
 
 FEATURE_DIR = 'features'
 TENSOR_JSON_FILE = 'tensor.json'
+FITTER_JSON_FILE = 'fitter.json'
 
 
 class TensorDefinitionSaver:
@@ -24,15 +26,22 @@ class TensorDefinitionSaver:
     Helper class for the saving of a TensorDefinition into JSON files.
     """
     @classmethod
-    def save(cls, td: TensorDefinition, directory: str):
+    def save(cls, td: TensorDefinition, directory: str, fitter: Optional[TensorDefinitionFitter] = None):
         # Check if the path exists, make if it does not exist.
         if os.path.exists(directory):
             raise TensorDefinitionSaverException(td.name, f'Path already exists {directory}')
-        else:
-            os.makedirs(directory)
+        if fitter is not None and fitter.tensor_definition is not td:
+            raise TensorDefinitionSaverException(
+                td.name, f'The fitter belongs to TensorDefinition <{fitter.tensor_definition.name}>'
+            )
+        os.makedirs(directory)
 
         cls._write_tensor_json(td, directory)
         cls._write_features_jsons(td, directory)
+        if fitter is not None:
+            # Save the state of the fitter, so it can be updated with new data after loading.
+            with open(os.path.join(directory, FITTER_JSON_FILE), 'w') as j_file:
+                json.dump(fitter.as_json(), j_file, indent=4)
 
     @staticmethod
     def _write_tensor_json(td: TensorDefinition, directory: str):
@@ -58,8 +67,8 @@ class TensorDefinitionSaver:
         to_save_features = td.embedded_features
         for f in to_save_features:
             with open(os.path.join(directory, FEATURE_DIR, f'{f.name}.json'), 'w') as f_file:
-                json.dump(f.__dict__(), f_file, indent=4)
-            if isinstance(f, FeatureWithPickle):
+                json.dump(f.as_json(), f_file, indent=4)
+            if isinstance(f, FeatureWithPickle) and f.get_pickle() is not None:
                 with open(os.path.join(directory, FEATURE_DIR, f'{f.name}.pkl'), 'wb') as p_file:
                     pickle.dump(f.get_pickle(), p_file)
 
@@ -94,6 +103,27 @@ class TensorDefinitionLoader:
         td = TensorDefinition(td_dict['name'], [load_features[lo] for lo in load_order if lo is not None])
         return td
 
+    @classmethod
+    def load_fitter(cls, td: TensorDefinition, directory: str) -> Optional[TensorDefinitionFitter]:
+        """
+        Load the fitter that was saved with a TensorDefinition.
+
+        Args:
+            td: The TensorDefinition loaded from the same directory.
+            directory: The directory the TensorDefinition was saved to.
+
+        Returns:
+            A TensorDefinitionFitter, or None if the TensorDefinition was saved without fitter.
+        """
+        file = os.path.join(directory, FITTER_JSON_FILE)
+        if not os.path.exists(file):
+            return None
+        with open(file) as j_file:
+            try:
+                return TensorDefinitionFitter.from_json(td, json.load(j_file))
+            except TensorDefinitionException as e:
+                raise TensorDefinitionLoaderException(f'Can not load fitter from {directory}. {e}')
+
     @staticmethod
     def _read_features_jsons(directory: str) -> List[Feature]:
         # Check we have a features directory
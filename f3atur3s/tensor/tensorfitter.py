@@ -0,0 +1,306 @@
+"""
+Incremental fitting of the inference attributes of a TensorDefinition. Keeps the statistics the attributes are
+calculated from, so they can be updated with a new window of data instead of being refitted over the whole history.
+(c) 2023 tsm
+"""
+import math
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from ..common.exception import TensorDefinitionException
+from ..common.feature import Feature, FeatureNormalizeLogBase
+from ..features.featureindex import FeatureIndex
+from ..features.featurenormalizescale import FeatureNormalizeScale
+from ..features.featurenormalizestandard import FeatureNormalizeStandard
+from ..features.featureonehot import FeatureOneHot
+from ..kernels.normalize import NormalizeKernel
+from .tensordefinition import TensorDefinition
+from .tensorplan import TensorDefinitionPlan
+
+# Vocabulary counts that decayed below this weight are removed, so the state does not grow with every value ever seen.
+_PRUNE_WEIGHT = 1e-6
+
+
+class TensorDefinitionFitter:
+    """
+    Stateful fitter for the inference attributes of a TensorDefinition.
+
+    Each call to `update` adds one window of data, for instance one day. Per feature, the fitter keeps the statistics
+    of the windows and sets the inference attributes from them, so the cost of an update only depends on the size of
+    the new window:
+
+    - FeatureNormalizeStandard: the weight, mean and sum of squared deviations, the stddev is the population stddev.
+    - FeatureNormalizeScale: the minimum and maximum.
+    - FeatureIndex and FeatureOneHot: the count of each value.
+
+    Old windows are forgotten in one of two ways. With `decay`, the statistics of the previous windows are multiplied
+    by the decay before a new window is added, an exponentially weighted history. The minimum and maximum of a scale
+    feature can not decay, they cover the whole history. With `window`, the statistics of the last `window` windows are
+    kept and the attributes are calculated over those only. Without either, the history is kept in full and the
+    attributes are the same as a fit over all data so far.
+
+    The indexes of a FeatureIndex are kept compact, they run from 1 to the number of values in the dictionary, so an
+    embedding sized with `len(feature)` always fits and the integer type only needs to hold the values of the current
+    windows. Values whose count fell below `min_count` are dropped from the dictionary, they get index 0 (unknown).
+    A value keeps its index as long as it stays in the dictionary and its index is not above the new dictionary size.
+    The indexes freed by dropped values are first given to new values, if the dictionary shrank the values with the
+    highest indexes are moved to the remaining free indexes. The price is that an index can mean another value after
+    an update, a model trained on the previous indexes should be retrained or fine-tuned when the dictionary changes.
+    The expand names of a FeatureOneHot keep their order, new values are added at the end.
+
+    Other features are not fitted, those with inference attributes, for instance a FeatureBin, must already be inference
+    ready. NaN values are ignored.
+
+    Args:
+        td: The TensorDefinition to fit.
+        decay: (Optional) The factor, in (0, 1], the statistics of previous windows are multiplied with.
+        window: (Optional) The number of most recent windows to keep. Can not be combined with decay.
+        min_count: The minimum (decayed) count a value needs to be included in a FeatureIndex or FeatureOneHot.
+    """
+    def __init__(self, td: TensorDefinition, decay: Optional[float] = None, window: Optional[int] = None,
+                 min_count: float = 0.0):
+        if decay is not None and window is not None:
+            raise TensorDefinitionException(f'A fitter can have a decay or a window, not both')
+        if decay is not None and not 0.0 < decay <= 1.0:
+            raise TensorDefinitionException(f'decay should be in (0, 1]. Got {decay}')
+        if window is not None and window < 1:
+            raise TensorDefinitionException(f'window should be >= 1. Got {window}')
+        self._td = td
+        self._decay = decay
+        self._window = window
+        self._min_count = min_count
+        self._plan = TensorDefinitionPlan(td)
+        self._features = [s.feature for s in self._plan.steps if self.can_fit(s.feature)]
+        self._needed = self._needed_steps(self._plan, self._features)
+        # Per feature, the statistics of each kept window. With a decay or a full history that is a single entry.
+        self._state: Dict[str, List[Any]] = {f.name: [] for f in self._features}
+        # Per FeatureIndex, the index assigned to each value.
+        self._indexes: Dict[str, Dict[str, int]] = {f.name: {} for f in self._features if isinstance(f, FeatureIndex)}
+        self._windows = 0
+
+    def __repr__(self):
+        return f'TensorDefinitionFitter : {self._td.name} windows={self._windows}'
+
+    @property
+    def tensor_definition(self) -> TensorDefinition:
+        return self._td
+
+    @property
+    def decay(self) -> Optional[float]:
+        return self._decay
+
+    @property
+    def window(self) -> Optional[int]:
+        return self._window
+
+    @property
+    def windows(self) -> int:
+        """
+        The number of windows this fitter has been updated with.
+        """
+        return self._windows
+
+    @property
+    def features(self) -> List[Feature]:
+        """
+        The features this fitter fits, in the order they are fitted.
+        """
+        return self._features
+
+    @staticmethod
+    def can_fit(feature: Feature) -> bool:
+        return isinstance(feature, (FeatureNormalizeStandard, FeatureNormalizeScale, FeatureIndex, FeatureOneHot))
+
+    def update(self, inputs: Mapping[str, np.ndarray]):
+        """
+        Add a window of data and set the inference attributes of the fitted features. The features are visited in plan
+        order, each feature is updated with the values of its base feature and then built, so features built on a
+        fitted feature see its updated attributes. Only the features the fitted features are built from are built,
+        the other features of the TensorDefinition are skipped.
+
+        Args:
+            inputs: The raw data of the window. A mapping with the names of the source features as keys and 1-D Numpy
+                arrays as values.
+        """
+        values: Dict[str, np.ndarray] = dict(inputs)
+        for step in self._plan.steps:
+            f = step.feature
+            if self.can_fit(f):
+                self._update_feature(f, values[f.base_feature.name])
+            elif not f.inference_ready:
+                raise TensorDefinitionException(
+                    f'Feature <{f.name}> can not be fitted incrementally and is not ready for inference'
+                )
+            if f.name in self._needed:
+                values[f.name] = values[step.alias_of.name] if step.is_alias else f.transform(values)
+        self._windows += 1
+
+    @staticmethod
+    def _needed_steps(plan: TensorDefinitionPlan, features: List[Feature]) -> Set[str]:
+        # The names of the features the fitted features are built from. The features an alias points to are needed
+        # too, with the features they are built from. The plan is ordered, so those are visited later in reverse.
+        needed = set(e.name for f in features for e in f.embedded_features)
+        for step in reversed(plan.steps):
+            if step.is_alias and step.feature.name in needed:
+                needed.add(step.alias_of.name)
+                needed.update(e.name for e in step.alias_of.embedded_features)
+        return needed
+
+    def _update_feature(self, feature: Feature, values: np.ndarray):
+        windows = self._state[feature.name]
+        if isinstance(feature, FeatureNormalizeStandard):
+            new = self._moments(self._log(feature, values))
+            self._add(windows, new, lambda s: (s[0] * self._decay, s[1], s[2] * self._decay), self._combine_moments)
+            w, mean, m2 = self._total(windows, self._combine_moments)
+            if w > 0:
+                feature.mean, feature.stddev = mean, math.sqrt(m2 / w)
+        elif isinstance(feature, FeatureNormalizeScale):
+            new = self._range(self._log(feature, values))
+            self._add(windows, new, lambda s: s, self._combine_range)
+            total = self._total(windows, self._combine_range)
+            if total is not None:
+                feature.minimum, feature.maximum = total
+        else:
+            new = self._counts(values)
+            self._add(windows, new, lambda s: self._prune({k: c * self._decay for k, c in s.items()}),
+                      self._combine_counts)
+            counts = self._total(windows, self._combine_counts)
+            keep = set(k for k, c in counts.items() if c >= self._min_count)
+            if isinstance(feature, FeatureIndex):
+                indexes = self._compact(feature, self._indexes[feature.name], keep)
+                self._indexes[feature.name] = indexes
+                feature.dictionary = {k: indexes[k] for k in sorted(indexes.keys(), key=lambda x: indexes[x])}
+            else:
+                current = feature.expand_values if feature.inference_ready else []
+                current_set = set(current)
+                order = [k for k in current if k in keep] + sorted(k for k in keep if k not in current_set)
+                feature.expand_names = [f'{feature.base_feature.name}{feature.delimiter}{k}' for k in order]
+
+    @staticmethod
+    def _compact(feature: FeatureIndex, indexes: Dict[str, int], keep: Set[str]) -> Dict[str, int]:
+        # Assign the indexes 1..len(keep). Kept values with an index in that range keep it, new values and then kept
+        # values with a higher index get the free indexes in that range.
+        n = len(keep)
+        if n > np.iinfo(feature.type.numpy_type).max:
+            raise TensorDefinitionException(
+                f'Feature <{feature.name}> has {n} values, more than its type {feature.type.name} can index'
+            )
+        r = {k: i for k, i in indexes.items() if k in keep and i <= n}
+        free = iter(sorted(set(range(1, n + 1)).difference(r.values())))
+        moved = sorted((k for k, i in indexes.items() if k in keep and i > n), key=lambda x: indexes[x])
+        for k in sorted(k for k in keep if k not in indexes) + moved:
+            r[k] = next(free)
+        return r
+
+    def _add(self, windows: List[Any], new: Any, decay, combine):
+        # Add the statistics of a new window, forgetting old windows as configured.
+        if self._window is not None:
+            windows.append(new)
+            del windows[:-self._window]
+        elif len(windows) == 0:
+            windows.append(new)
+        else:
+            windows[0] = combine(decay(windows[0]) if self._decay is not None else windows[0], new)
+
+    @staticmethod
+    def _total(windows: List[Any], combine) -> Any:
+        total = windows[0]
+        for w in windows[1:]:
+            total = combine(total, w)
+        return total
+
+    @staticmethod
+    def _log(feature: FeatureNormalizeLogBase, values: np.ndarray) -> np.ndarray:
+        # The normalization parameters are calculated on the logarithm of the values if the feature has a log base.
+        v = values.astype(np.float64, copy=False)
+        if feature.log_base is not None:
+            v = NormalizeKernel.normalize(v, [0.0], [1.0], [feature.log_base], [feature.delta])
+        return v[~np.isnan(v)]
+
+    @staticmethod
+    def _moments(values: np.ndarray) -> Tuple[float, float, float]:
+        if values.shape[0] == 0:
+            return 0.0, 0.0, 0.0
+        mean = float(np.mean(values))
+        return float(values.shape[0]), mean, float(np.sum(np.square(values - mean)))
+
+    @staticmethod
+    def _combine_moments(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> Tuple[float, float, float]:
+        # Combine the weight, mean and sum of squared deviations of two sets (Chan et al.).
+        w = a[0] + b[0]
+        if w == 0:
+            return 0.0, 0.0, 0.0
+        d = b[1] - a[1]
+        return w, a[1] + d * b[0] / w, a[2] + b[2] + d * d * a[0] * b[0] / w
+
+    @staticmethod
+    def _range(values: np.ndarray) -> Optional[Tuple[float, float]]:
+        # An empty window has no range. None is saved as null in the JSON.
+        if values.shape[0] == 0:
+            return None
+        return float(np.min(values)), float(np.max(values))
+
+    @staticmethod
+    def _combine_range(a: Optional[Tuple[float, float]],
+                       b: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+        if a is None or b is None:
+            return b if a is None else a
+        return min(a[0], b[0]), max(a[1], b[1])
+
+    @staticmethod
+    def _counts(values: np.ndarray) -> Dict[str, float]:
+        if values.dtype.kind == 'f':
+            values = values[~np.isnan(values)]
+        keys, counts = np.unique(values.astype(str), return_counts=True)
+        return {str(k): float(c) for k, c in zip(keys, counts)}
+
+    @staticmethod
+    def _combine_counts(a: Dict[str, float], b: Dict[str, float]) -> Dict[str, float]:
+        r = dict(a)
+        for k, c in b.items():
+            r[k] = r.get(k, 0.0) + c
+        return r
+
+    @staticmethod
+    def _prune(counts: Dict[str, float]) -> Dict[str, float]:
+        return {k: c for k, c in counts.items() if c >= _PRUNE_WEIGHT}
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            'tensor_definition': self._td.name,
+            'decay': self._decay,
+            'window': self._window,
+            'min_count': self._min_count,
+            'windows': self._windows,
+            'features': {
+                f.name: {
+                    'state': [list(s) if isinstance(s, tuple) else s for s in self._state[f.name]],
+                    **({'indexes': self._indexes[f.name]} if f.name in self._indexes else {})
+                } for f in self._features
+            }
+        }
+
+    @classmethod
+    def from_json(cls, td: TensorDefinition, fields: Dict[str, Any]) -> 'TensorDefinitionFitter':
+        """
+        Re-create a fitter from the output of `as_json`.
+
+        Args:
+            td: The TensorDefinition the fitter was created for.
+            fields: The dictionary created by `as_json`.
+
+        Returns:
+            A TensorDefinitionFitter.
+        """
+        fitter = TensorDefinitionFitter(td, fields['decay'], fields['window'], fields['min_count'])
+        saved = fields['features']
+        missing = [f.name for f in fitter.features if f.name not in saved]
+        if len(missing) > 0:
+            raise TensorDefinitionException(f'No saved state for features {missing} of <{td.name}>')
+        for f in fitter.features:
+            fitter._state[f.name] = [tuple(s) if isinstance(s, list) else s for s in saved[f.name]['state']]
+            if f.name in fitter._indexes:
+                fitter._indexes[f.name] = {k: int(i) for k, i in saved[f.name]['indexes'].items()}
+        fitter._windows = fields['windows']
+        return fitter
@@ -0,0 +1,164 @@
+"""
+Definition of the TensorDefinitionPlan. It is the compiled, ordered list of features that need to be built for a
+TensorDefinition. Structurally identical features are only built once.
+(c) 2023 tsm
+"""
+import dataclasses
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from ..common.feature import Feature
+from ..common.exception import TensorDefinitionException
+from .tensordefinition import TensorDefinition
+from .featurefingerprint import FeatureFingerprint
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """
+    A step in a TensorDefinitionPlan. If `alias_of` is set, the feature does not need to be built, its values are the
+    values of the `alias_of` feature.
+    """
+    feature: Feature
+    fingerprint: str
+    alias_of: Optional[Feature] = None
+
+    @property
+    def is_alias(self) -> bool:
+        return self.alias_of is not None
+
+
+class TensorDefinitionPlan:
+    """
+    The compiled plan of a TensorDefinition. It contains all features referenced in the TensorDefinition, ordered so
+    that a feature always comes after the features it is built from.
+
+    Features are fingerprinted (see FeatureFingerprint), if multiple features have the same fingerprint, for instance
+    the same FeatureFilter defined under different names, only the first is built. The others become aliases.
+    As inference attributes are part of the fingerprint, a plan should be compiled after the inference attributes
+    have been set.
+
+    Args:
+        td: The TensorDefinition to compile.
+    """
+    def __init__(self, td: TensorDefinition):
+        self._td = td
+        features = td.embedded_features
+        fingerprints = FeatureFingerprint.features(features)
+        first: Dict[str, Feature] = {}
+        self._steps: List[PlanStep] = []
+        for f in TensorDefinitionPlan.topological_order(features):
+            fp = fingerprints[f.name]
+            canonical = first.setdefault(fp, f)
+            self._steps.append(PlanStep(f, fp, None if canonical is f else canonical))
+        self._steps_by_name = {s.feature.name: s for s in self._steps}
+
+    def __len__(self):
+        return len(self._steps)
+
+    def __repr__(self):
+        return f'TensorDefinitionPlan : {self._td.name} steps={len(self._steps)} aliases={len(self.aliases)}'
+
+    @property
+    def tensor_definition(self) -> TensorDefinition:
+        return self._td
+
+    @property
+    def steps(self) -> List[PlanStep]:
+        """
+        All steps of the plan, in the order they should be executed.
+
+        Returns:
+            A List of PlanStep objects.
+        """
+        return self._steps
+
+    @property
+    def compute_features(self) -> List[Feature]:
+        """
+        The features that actually need to be built, in the order they should be built. Aliases are not included.
+
+        Returns:
+            A List of features
+        """
+        return [s.feature for s in self._steps if not s.is_alias]
+
+    @property
+    def aliases(self) -> Dict[str, str]:
+        """
+        The features that are not built because a structurally identical feature is built.
+
+        Returns:
+            A dictionary with the name of the alias as key and the name of the feature that is built as value.
+        """
+        return {s.feature.name: s.alias_of.name for s in self._steps if s.is_alias}
+
+    def step(self, feature: Feature) -> PlanStep:
+        """
+        Get the step of a feature.
+
+        Args:
+            feature: The feature to look for.
+
+        Returns:
+            The PlanStep of the feature.
+
+        Raises:
+            TensorDefinitionException if the feature is not part of the plan.
+        """
+        s = self._steps_by_name.get(feature.name, None)
+        if s is None:
+            raise TensorDefinitionException(
+                f'Feature <{feature.name}> is not part of the plan of TensorDefinition <{self._td.name}>'
+            )
+        return s
+
+    def canonical(self, feature: Feature) -> Feature:
+        """
+        Get the feature that is actually built for a feature. That is the feature itself unless it is an alias.
+
+        Args:
+            feature: The feature to look for.
+
+        Returns:
+            The feature that is built.
+        """
+        s = self.step(feature)
+        return s.alias_of if s.is_alias else s.feature
+
+    @staticmethod
+    def dependencies(feature: Feature) -> List[Feature]:
+        """
+        Get the features a feature is directly built from. As opposed to the embedded features, which also contain
+        all indirect dependencies.
+
+        Args:
+            feature: The feature to get the dependencies of.
+
+        Returns:
+            A list of features.
+        """
+        r: List[Feature] = []
+        for fld in dataclasses.fields(feature):
+            if fld.name == 'embedded_features':
+                continue
+            v = getattr(feature, fld.name)
+            for d in (v if isinstance(v, list) else [v]):
+                if isinstance(d, Feature) and d.name not in [x.name for x in r]:
+                    r.append(d)
+        return r
+
+    @staticmethod
+    def topological_order(features: List[Feature]) -> List[Feature]:
+        """
+        Order features so that each feature comes after the features it is built from.
+
+        Args:
+            features: A list of features. Should be closed, i.e. contain all embedded features of each feature.
+
+        Returns:
+            The ordered list of features. Features without dependencies between them are ordered by name.
+        """
+        # The embedded features are the transitive closure of the dependencies. A feature therefore always has more
+        # embedded features than any of the features it depends on. Ties are ordered by name to be deterministic.
+        return sorted(features, key=lambda f: (len(set(e.name for e in f.embedded_features)), f.name))
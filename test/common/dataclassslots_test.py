@@ -0,0 +1,51 @@
+"""
+Unit Tests for the add_slots decorator
+(c) 2023 tsm
+"""
+import pickle
+import unittest
+from dataclasses import dataclass, field
+from typing import Tuple
+
+import f3atur3s as ft
+from f3atur3s.common.dataclassslots import add_slots
+
+
+@add_slots
+@dataclass
+class _Base:
+    a: int
+    b: Tuple[int, ...] = field(default=(), init=False)
+
+
+@add_slots
+@dataclass
+class _Child(_Base):
+    c: int = 0
+
+
+class TestAddSlots(unittest.TestCase):
+    def test_slots(self):
+        x = _Child(1, 2)
+        self.assertFalse(hasattr(x, '__dict__'), f'Instance should not have a __dict__')
+        self.assertTupleEqual(_Child.__slots__, ('c',), f'Inherited fields should not get a slot again')
+        self.assertEqual((x.a, x.b, x.c), (1, (), 2), f'Fields, including init=False defaults, should be set')
+        with self.assertRaises(AttributeError):
+            x.d = 1
+        self.assertEqual(pickle.loads(pickle.dumps(x)), x)
+
+    def test_features(self):
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        for f in (fs, fn):
+            self.assertFalse(hasattr(f, '__dict__'), f'{f.__class__.__name__} should not have a __dict__')
+        self.assertTupleEqual(ft.FeatureNormalizeScale.__slots__, ('minimum', 'maximum'))
+        self.assertTupleEqual(fn.embedded_features, (fs,))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Unit Tests for the Expression language
+(c) 2023 tsm
+"""
+import unittest
+import numpy as np
+import f3atur3s as ft
+
+
+class TestExpression(unittest.TestCase):
+    def test_arithmetic(self):
+        e = ft.Expression('amount / (count + 1)')
+        self.assertListEqual(e.names, ['amount', 'count'], f'Names not correct. Got {e.names}')
+        r = e({'amount': np.array([10.0, 9.0]), 'count': np.array([1, 2])})
+        self.assertListEqual(r.tolist(), [5.0, 3.0])
+
+    def test_boolean(self):
+        e = ft.Expression("country == 'DE' and amount > 100")
+        r = e({'country': np.array(['DE', 'DE', 'FR']), 'amount': np.array([150.0, 50.0, 150.0])})
+        self.assertListEqual(r.tolist(), [True, False, False])
+
+    def test_in_chain_if(self):
+        e = ft.Expression("1 < x <= 3 or c in ('A', 'B')")
+        r = e({'x': np.array([1, 2, 3, 4]), 'c': np.array(['Z', 'Z', 'Z', 'A'])})
+        self.assertListEqual(r.tolist(), [False, True, True, True])
+        e = ft.Expression("x if x > 0 else -x")
+        self.assertListEqual(e({'x': np.array([-2, 3])}).tolist(), [2, 3])
+
+    def test_functions(self):
+        e = ft.Expression('log1p(abs(x)) + max(x, 0)')
+        r = e({'x': np.array([-1.0, 1.0])})
+        self.assertTrue(np.allclose(r, [np.log(2), np.log(2) + 1.0]))
+
+    def test_quoted_names(self):
+        e = ft.Expression('`amount-eur` * 2')
+        self.assertListEqual(e.names, ['amount-eur'])
+        self.assertListEqual(e({'amount-eur': np.array([1.0])}).tolist(), [2.0])
+
+    def test_equality(self):
+        self.assertEqual(ft.Expression('a+1'), ft.Expression('a + 1'), f'White space should not matter')
+        self.assertNotEqual(ft.Expression('a+1'), ft.Expression('a+2'))
+
+    def test_bad(self):
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.Expression('amount +')
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.Expression('__import__("os")')
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.Expression('amount.real')
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.Expression('c in d')
+        with self.assertRaises(ft.FeatureRunTimeException):
+            ft.Expression('a + b')({'a': np.array([1])})
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
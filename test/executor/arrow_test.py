@@ -0,0 +1,124 @@
+"""
+Unit Tests for the ArrowExecutor
+(c) 2023 tsm
+"""
+import ctypes
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+from f3atur3s.executor.arrow import _ArrowArray, _ArrowSchema, _CDataExport
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_8)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, None, 1.0, 0.0, 10.0)
+    fr = ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_8, ff)
+    return ft.TensorDefinition('arrow', [fs, fr, oh, fa, fl])
+
+
+def _inputs():
+    return {
+        'amount': np.array([0.0, 9.0, np.nan, 4.0, 2.0]),
+        'count': np.array([0, 3, 2, 1, 1], dtype=np.int16),
+        'country': np.array(['FR', 'BE', 'DE', 'BE', 'FR']),
+        'fraud': np.array([0, 1, 0, 0, 1], dtype=np.int8)
+    }
+
+
+class TestArrowExecutor(unittest.TestCase):
+    def test_execute(self):
+        td = _definition()
+        ex = ft.ArrowExecutor(td)
+        self.assertListEqual(
+            ex.names, ['country__BE', 'country__FR', 'amount-scale', 'amount-per-count', 'amount', 'fraud-label']
+        )
+        out = ex.execute(_inputs())
+        self.assertListEqual(list(out.columns.keys()), ex.names)
+        expected = ft.BatchExecutor(td).execute(_inputs())
+        for lc, m in expected.items():
+            same = np.array_equal(out.matrices[lc], m, equal_nan=True)
+            self.assertTrue(same, f'{lc.name} differs from BatchExecutor')
+        for n, c in out.columns.items():
+            self.assertTrue(c.flags.c_contiguous, f'Column {n} should be contiguous')
+            self.assertEqual(c.ctypes.data % ft.ARROW_ALIGNMENT, 0, f'Column {n} should be 64-byte aligned')
+        self.assertListEqual(list(out.columns['country__BE']), [0, 1, 0, 1, 0])
+        self.assertTrue(np.shares_memory(out.columns['amount'], out.matrices[ft.LEARNING_CATEGORY_CONTINUOUS]))
+
+    def test_validity(self):
+        out = ft.ArrowExecutor(_definition()).execute(_inputs())
+        self.assertSetEqual(set(out.validity.keys()), {'amount-scale', 'amount-per-count', 'amount'})
+        self.assertEqual(out.null_counts['amount'], 1)
+        v = out.validity['amount']
+        self.assertEqual(v.ctypes.data % ft.ARROW_ALIGNMENT, 0)
+        self.assertEqual(v.shape[0] % ft.ARROW_ALIGNMENT, 0, f'Bitmap should be padded')
+        self.assertListEqual(list(np.unpackbits(v[:1], bitorder='little')[:5]), [1, 1, 0, 1, 1])
+        out = ft.ArrowExecutor(_definition(), nan_as_null=False).execute(_inputs())
+        self.assertDictEqual(out.validity, {})
+
+    def test_reuse(self):
+        ex = ft.ArrowExecutor(_definition())
+        out = ex.allocate(5)
+        address = out.columns['amount'].ctypes.data
+        inputs = _inputs()
+        inputs['amount'] = np.arange(5, dtype=np.float64)
+        r = ex.execute(inputs, out)
+        self.assertIs(r, out)
+        self.assertEqual(r.columns['amount'].ctypes.data, address, f'Memory should have been re-used')
+        self.assertDictEqual(r.validity, {}, f'Validity of the previous batch should be cleared')
+
+    def test_export_to_c(self):
+        out = ft.ArrowExecutor(_definition()).execute(_inputs())
+        array, schema = _ArrowArray(), _ArrowSchema()
+        out.export_to_c(ctypes.addressof(array), ctypes.addressof(schema))
+        self.assertEqual(schema.format, b'+s')
+        self.assertEqual(schema.n_children, 6)
+        self.assertEqual(array.length, 5)
+        self.assertEqual(array.n_children, 6)
+        formats = [schema.children[i].contents.format for i in range(6)]
+        self.assertListEqual(formats, [b'c', b'c', b'g', b'g', b'g', b'c'])
+        self.assertEqual(schema.children[4].contents.name, b'amount')
+        child = array.children[4].contents
+        self.assertEqual(child.null_count, 1)
+        self.assertEqual(child.buffers[1], out.columns['amount'].ctypes.data, f'Data should not have been copied')
+        self.assertEqual(child.buffers[0], out.validity['amount'].ctypes.data)
+        self.assertIsNone(array.children[0].contents.buffers[0], f'Column without nulls should have no bitmap')
+        # Releasing the parents releases the children and the references to the buffers.
+        array.release(ctypes.pointer(array))
+        schema.release(ctypes.pointer(schema))
+        self.assertFalse(array.release)
+        self.assertFalse(schema.release)
+        self.assertDictEqual(_CDataExport._alive, {})
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_to_pyarrow(self):
+        out = ft.ArrowExecutor(_definition()).execute(_inputs())
+        rb = out.to_pyarrow()
+        self.assertListEqual(rb.schema.names, list(out.columns.keys()))
+        self.assertEqual(rb.column('amount').null_count, 1)
+        self.assertEqual(rb.column('amount').buffers()[1].address, out.columns['amount'].ctypes.data)
+        array, schema = _ArrowArray(), _ArrowSchema()
+        out.export_to_c(ctypes.addressof(array), ctypes.addressof(schema))
+        imported = pyarrow.RecordBatch._import_from_c(ctypes.addressof(array), ctypes.addressof(schema))
+        self.assertTrue(imported.equals(pyarrow.RecordBatch.from_struct_array(
+            pyarrow.StructArray.from_arrays(rb.columns, names=rb.schema.names)
+        )))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
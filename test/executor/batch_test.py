@@ -0,0 +1,117 @@
+"""
+Unit Tests for the BatchExecutor and the feature transform methods
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE, '%Y%m%d')
+    ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_8)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, 'e', 1.0, 0.0, 10.0)
+    fs.minimum, fs.maximum = 0.0, 10.0
+    fr = ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_16, fm)
+    fi.dictionary = {'m1': 1, 'm2': 2}
+    fw = ft.FeatureDateTimeWave('date-wave', ft.FEATURE_TYPE_FLOAT, fd, '%w', 7, 1)
+    fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_8, ff)
+    return ft.TensorDefinition('batch', [fs, fr, oh, fi, fw, fa, fl])
+
+
+def _inputs():
+    return {
+        'amount': np.array([0.0, 9.0, 4.0]),
+        'count': np.array([0, 3, 2], dtype=np.int16),
+        'merchant': np.array(['m1', 'm2', 'm9']),
+        'country': np.array(['FR', 'BE', 'DE']),
+        'date': np.array(['20230101', '20230102', '20230104']),
+        'fraud': np.array([0, 1, 0], dtype=np.int8)
+    }
+
+
+class TestBatchExecutor(unittest.TestCase):
+    def test_layout(self):
+        ex = ft.BatchExecutor(_definition())
+        widths = {lc.name: fs[-1][1].stop for lc, fs in ex.layout.items()}
+        self.assertDictEqual(widths, {'Binary': 2, 'Categorical': 1, 'Continuous': 5, 'Label': 1})
+
+    def test_execute(self):
+        ex = ft.BatchExecutor(_definition())
+        out = ex.execute(_inputs())
+        cont = out[ft.LEARNING_CATEGORY_CONTINUOUS]
+        self.assertEqual(cont.dtype, np.float64, f'Continuous block should have the widest float type')
+        self.assertTrue(np.allclose(cont[:, 0], np.log(np.array([0.0, 9.0, 4.0]) + 1.0) / 10.0, atol=1e-6))
+        self.assertListEqual(cont[:, 1].tolist(), [0.0, 3.0, 2.0], f'Ratio should be 0 where count is 0')
+        w = 2 * np.pi * np.array([0, 1, 3]) / 7
+        self.assertTrue(np.allclose(cont[:, 2], np.sin(w)) and np.allclose(cont[:, 3], np.cos(w)))
+        self.assertListEqual(cont[:, 4].tolist(), [0.0, 9.0, 4.0], f'Source feature should be copied')
+        self.assertListEqual(out[ft.LEARNING_CATEGORY_BINARY].tolist(), [[0, 1], [1, 0], [0, 0]])
+        self.assertListEqual(out[ft.LEARNING_CATEGORY_CATEGORICAL][:, 0].tolist(), [1, 2, 0])
+        self.assertListEqual(out[ft.LEARNING_CATEGORY_LABEL][:, 0].tolist(), [0, 1, 0])
+
+    def test_reuse_out(self):
+        ex = ft.BatchExecutor(_definition())
+        out = ex.allocate(3)
+        r = ex.execute(_inputs(), out)
+        self.assertIs(r[ft.LEARNING_CATEGORY_CONTINUOUS], out[ft.LEARNING_CATEGORY_CONTINUOUS])
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ex.execute(_inputs(), ex.allocate(4))
+
+    def test_label_counts(self):
+        ex = ft.BatchExecutor(_definition())
+        ex.execute(_inputs())
+        ex.execute(_inputs())
+        counts = ex.label_counts['fraud-label']
+        self.assertEqual((counts.negatives, counts.positives), (4, 2), f'Counts should add up over batches')
+        self.assertAlmostEqual(counts.prevalence, 1 / 3)
+        ex.reset_label_counts()
+        self.assertDictEqual(ex.label_counts, {})
+        inputs = _inputs()
+        inputs['fraud'] = np.array([0, 2, 1], dtype=np.int8)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ex.execute(inputs)
+
+    def test_alias(self):
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        f1 = ft.FeatureExpression('x2-a', ft.FEATURE_TYPE_FLOAT, ft.Expression('amount * 2'), [fa])
+        f2 = ft.FeatureExpression('x2-b', ft.FEATURE_TYPE_FLOAT, ft.Expression('amount*2'), [fa])
+        ex = ft.BatchExecutor(ft.TensorDefinition('alias', [f1, f2]))
+        self.assertEqual(len(ex.plan.aliases), 1, f'Expected one alias')
+        out = ex.execute({'amount': np.array([1.0, 2.0])})[ft.LEARNING_CATEGORY_CONTINUOUS]
+        self.assertListEqual(out.tolist(), [[2.0, 2.0], [4.0, 4.0]])
+
+    def test_not_inference_ready(self):
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.BatchExecutor(ft.TensorDefinition('not-ready', [fs]))
+
+    def test_missing_input(self):
+        ex = ft.BatchExecutor(_definition())
+        inputs = _inputs()
+        del inputs['country']
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ex.execute(inputs)
+
+    def test_transform_not_supported(self):
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fs = ft.FeatureSource('card', ft.FEATURE_TYPE_STRING)
+        fg = ft.FeatureGrouper('grouped', ft.FEATURE_TYPE_FLOAT, fa, fs, None, ft.TIME_PERIOD_DAY, 1, ft.AGGREGATOR_SUM)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = fg.transform({'amount': np.ones(2), 'card': np.array(['a', 'b'])})
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Unit Tests for the micro-batching BatchCoalescer
+(c) 2023 tsm
+"""
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    return ft.TensorDefinition('coalesce', [fs, oh])
+
+
+def _records(n: int):
+    return [{'amount': float(i), 'country': 'BE' if i % 2 == 0 else 'FR'} for i in range(n)]
+
+
+class TestBatchCoalescer(unittest.TestCase):
+    def _check(self, records, results):
+        for r, res in zip(records, results):
+            self.assertAlmostEqual(res[ft.LEARNING_CATEGORY_CONTINUOUS][0], r['amount'] / 10.0)
+            expected = [1, 0] if r['country'] == 'BE' else [0, 1]
+            self.assertListEqual(list(res[ft.LEARNING_CATEGORY_BINARY]), expected)
+
+    def test_full_batches(self):
+        records = _records(10)
+
+        async def run():
+            c = ft.BatchCoalescer(ft.BatchExecutor(_definition()), max_latency_us=1_000_000, max_records=4)
+            results = await asyncio.gather(*[c.submit(r) for r in records[:8]])
+            return c, results
+
+        c, results = asyncio.run(run())
+        self._check(records, results)
+        self.assertEqual(c.metrics.batches, 2)
+        self.assertEqual(c.metrics.full_flushes, 2)
+        self.assertEqual(c.metrics.batch_sizes[4], 2)
+        self.assertEqual(c.metrics.mean_batch_size, 4.0)
+
+    def test_timed_batch(self):
+        records = _records(3)
+
+        async def run():
+            c = ft.BatchCoalescer(ft.BatchExecutor(_definition()), max_latency_us=2000, max_records=100)
+            results = await asyncio.gather(*[c.submit(r) for r in records])
+            return c, results
+
+        c, results = asyncio.run(run())
+        self._check(records, results)
+        self.assertEqual(c.metrics.timed_flushes, 1)
+        self.assertEqual(c.metrics.batches, 1)
+        self.assertEqual(c.metrics.percentile(50), 3)
+        self.assertEqual(c.pending, 0)
+
+    def test_pool(self):
+        records = _records(7)
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                c = ft.BatchCoalescer(ft.BatchExecutor(_definition()), max_latency_us=500, max_records=3, pool=pool)
+                results = await asyncio.gather(*[c.submit(r) for r in records])
+                await c.flush()
+                return c, results
+
+        c, results = asyncio.run(run())
+        self._check(records, results)
+        self.assertEqual(c.metrics.records, 7)
+        self.assertEqual(c.metrics.as_json()['batch_sizes'], {'1': 1, '3': 2})
+
+    def test_pool_shared_state(self):
+        # Batches run concurrently on one BatchExecutor, the label counts and profiles should add up.
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_8)
+        fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+        fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_8, ff)
+        profiler = ft.FeatureProfiler()
+        ex = ft.BatchExecutor(ft.TensorDefinition('shared', [fs, fl]), profiler=profiler)
+        records = [{'amount': float(i), 'fraud': i % 3 == 0} for i in range(3000)]
+
+        async def run():
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                c = ft.BatchCoalescer(ex, max_latency_us=100, max_records=7, pool=pool)
+                _ = await asyncio.gather(*[c.submit(r) for r in records])
+                await c.flush()
+
+        asyncio.run(run())
+        counts = ex.label_counts['fraud-label']
+        self.assertEqual((counts.negatives, counts.positives), (2000, 1000))
+        self.assertEqual(profiler.profiles['amount-scale'].rows, 3000)
+
+    def test_missing_input(self):
+        async def run():
+            c = ft.BatchCoalescer(ft.BatchExecutor(_definition()))
+            await c.submit({'amount': 1.0})
+
+        with self.assertRaises(ft.FeatureRunTimeException):
+            asyncio.run(run())
+
+    def test_failed_batch(self):
+        # A value that can not be parsed fails all records in its batch.
+        async def run():
+            c = ft.BatchCoalescer(ft.BatchExecutor(_definition()), max_records=2)
+            r = await asyncio.gather(
+                c.submit({'amount': 'x', 'country': 'BE'}), c.submit({'amount': 1.0, 'country': 'BE'}),
+                return_exceptions=True
+            )
+            return c, r
+
+        c, r = asyncio.run(run())
+        self.assertTrue(all(isinstance(e, Exception) for e in r), f'All records of the batch should fail {r}')
+        self.assertEqual(c.metrics.failed_batches, 1)
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.BatchCoalescer(ft.BatchExecutor(_definition()), max_records=0)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.BatchCoalescer(ft.BatchExecutor(_definition()), max_latency_us=-1)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
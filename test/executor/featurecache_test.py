@@ -0,0 +1,168 @@
+"""
+Unit Tests for the FeatureCache
+(c) 2023 tsm
+"""
+import os
+import unittest
+import shutil
+import numpy as np
+import f3atur3s as ft
+
+CACHE_LOCATION = './data/cache/'
+
+
+class TestFeatureCache(unittest.TestCase):
+    def setUp(self):
+        shutil.rmtree(CACHE_LOCATION, ignore_errors=True)
+
+    def tearDown(self):
+        shutil.rmtree(CACHE_LOCATION, ignore_errors=True)
+
+    def test_get_put(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        c = ft.FeatureCache(CACHE_LOCATION + 'get_put')
+        self.assertIsNone(c.get(fn, 'src'), f'Empty cache should not return values')
+        values = np.arange(100, dtype=np.float32)
+        self.assertTrue(c.put(fn, 'src', values))
+        r = c.get(fn, 'src')
+        self.assertIsInstance(r, np.memmap, f'Expected a memory-mapped array. Got {type(r)}')
+        self.assertTrue(np.array_equal(r, values), f'Cached values not the same')
+        self.assertIsNone(c.get(fn, 'other-src'), f'Other source should be a miss')
+        self.assertEqual(c.stats.hits, 1, f'Expected 1 hit. Got {c.stats.hits}')
+        self.assertEqual(c.stats.misses, 2, f'Expected 2 misses. Got {c.stats.misses}')
+        self.assertEqual(len(c), 1, f'Expected one entry. Got {len(c)}')
+
+    def test_get_or_compute(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        c = ft.FeatureCache(CACHE_LOCATION + 'compute')
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.ones(10)
+
+        _ = c.get_or_compute(fs, 'src', compute)
+        r = c.get_or_compute(fs, 'src', compute)
+        self.assertEqual(len(calls), 1, f'Compute should only have been called once')
+        self.assertTrue(np.array_equal(r, np.ones(10)))
+
+    def test_reopen(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        c = ft.FeatureCache(CACHE_LOCATION + 'reopen')
+        c.put(fs, 'src', np.ones(10))
+        self.assertEqual(len(ft.FeatureCache(CACHE_LOCATION + 'reopen')), 0, f'Index should only be written on flush')
+        c.close()
+        c2 = ft.FeatureCache(CACHE_LOCATION + 'reopen')
+        self.assertEqual(len(c2), 1, f'Entries should survive re-opening the cache')
+        self.assertIsNotNone(c2.get(fs, 'src'))
+
+    def test_definition_change(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        c = ft.FeatureCache(CACHE_LOCATION + 'change')
+        c.put(fn, 'src', np.ones(10))
+        fn.minimum = 1.0
+        self.assertIsNone(c.get(fn, 'src'), f'Changed definition should not hit')
+
+    def test_lru_eviction(self):
+        fs = [ft.FeatureSource(f'f{i}', ft.FEATURE_TYPE_FLOAT) for i in range(3)]
+        values = np.ones(1000)
+        c = ft.FeatureCache(CACHE_LOCATION + 'lru', max_bytes=2 * values.nbytes + 500)
+        c.put(fs[0], 'src', values)
+        c.put(fs[1], 'src', values)
+        # Touch the first, so the second is the least recently used.
+        _ = c.get(fs[0], 'src')
+        c.put(fs[2], 'src', values)
+        self.assertEqual(c.stats.evictions, 1, f'Expected an eviction')
+        self.assertIsNotNone(c.get(fs[0], 'src'))
+        self.assertIsNone(c.get(fs[1], 'src'))
+        self.assertIsNotNone(c.get(fs[2], 'src'))
+        self.assertLessEqual(c.size, 2 * values.nbytes + 500)
+
+    def test_invalidate_dependents(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        fb = ft.FeatureBin('bin', ft.FEATURE_TYPE_INT_16, fn, 10)
+        fo = ft.FeatureSource('Other', ft.FEATURE_TYPE_FLOAT)
+        td = ft.TensorDefinition('td', [fb, fo])
+        c = ft.FeatureCache(CACHE_LOCATION + 'invalidate')
+        for f in (fs, fn, fb, fo):
+            c.put(f, 'src', np.ones(10))
+        self.assertEqual(c.invalidate(fn, td), 2, f'Expected scale and bin to be invalidated')
+        self.assertIsNotNone(c.get(fs, 'src'))
+        self.assertIsNotNone(c.get(fo, 'src'))
+        self.assertIsNone(c.get(fb, 'src'))
+
+    def test_access_time_persisted(self):
+        fs = [ft.FeatureSource(f'f{i}', ft.FEATURE_TYPE_FLOAT) for i in range(3)]
+        values = np.ones(1000)
+        c = ft.FeatureCache(CACHE_LOCATION + 'persist', max_bytes=2 * values.nbytes + 500)
+        c.put(fs[0], 'src', values)
+        c.put(fs[1], 'src', values)
+        _ = c.get(fs[0], 'src')
+        c.close()
+        # Another process opening the cache should see the first entry was used last.
+        c2 = ft.FeatureCache(CACHE_LOCATION + 'persist', max_bytes=2 * values.nbytes + 500)
+        c2.put(fs[2], 'src', values)
+        self.assertIsNotNone(c2.get(fs[0], 'src'))
+        self.assertIsNone(c2.get(fs[1], 'src'), f'Least recently used entry should have been evicted')
+
+    def test_executor(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs, None, 1.0, 0.0, 10.0)
+        fb = ft.FeatureBin('bin', ft.FEATURE_TYPE_INT_16, fn, 2)
+        fb.bins = [0.0, 0.5, 1.0]
+        td = ft.TensorDefinition('td', [fn, fb])
+        c = ft.FeatureCache(CACHE_LOCATION + 'executor')
+        inputs = {'Amount': np.array([0.0, 2.0, 8.0])}
+        expected = ft.BatchExecutor(td).execute(inputs)
+        ex = ft.BatchExecutor(td, cache=c)
+        r = ex.execute(inputs)
+        self.assertEqual((c.stats.hits, c.stats.misses, c.stats.puts), (0, 2, 2), f'First run should miss and put')
+        self.assertTrue(all(np.array_equal(r[lc], m) for lc, m in expected.items()))
+        r = ex.execute(inputs)
+        self.assertEqual((c.stats.hits, c.stats.misses), (2, 2), f'Second run should hit')
+        self.assertTrue(all(np.array_equal(r[lc], m) for lc, m in expected.items()))
+        # Other data is a miss, so is a changed feature.
+        _ = ex.execute({'Amount': np.array([1.0, 2.0, 3.0])})
+        self.assertEqual((c.stats.hits, c.stats.misses), (2, 4))
+        fn.maximum = 4.0
+        ex = ft.BatchExecutor(td, cache=c)
+        r = ex.execute(inputs)
+        self.assertEqual((c.stats.hits, c.stats.misses), (2, 6), f'Changed scale and dependent bin should miss')
+        self.assertListEqual(list(r[ft.LEARNING_CATEGORY_CONTINUOUS][:, 0]), [0.0, 0.5, 2.0])
+        # An explicit source fingerprint is used as key.
+        _ = ex.execute(inputs, source_fingerprint='file-1')
+        _ = ex.execute({'Amount': np.array([9.0, 9.0, 9.0])}, source_fingerprint='file-1')
+        self.assertEqual(c.stats.hits, 4, f'Same source fingerprint should hit')
+        self.assertEqual(len(ft.FeatureCache(CACHE_LOCATION + 'executor')), len(c), f'Index should be flushed')
+
+    def test_no_index_write_on_hit(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        c = ft.FeatureCache(CACHE_LOCATION + 'no_write')
+        c.put(fs, 'src', np.ones(10))
+        c.flush()
+        index = os.path.join(CACHE_LOCATION, 'no_write', 'index.json')
+        with open(index) as f:
+            before = f.read()
+        os.remove(index)
+        fp = ft.FeatureFingerprint.feature(fs)
+        for _ in range(10):
+            self.assertIsNotNone(c.get(fs, 'src', fp))
+        self.assertFalse(os.path.exists(index), f'A hit should not write the index')
+        c.close()
+        with open(index) as f:
+            self.assertNotEqual(f.read(), before, f'Close should write the access times')
+
+    def test_bad_max_bytes(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.FeatureCache(CACHE_LOCATION + 'bad', max_bytes=0)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Unit Tests for the MemmapExecutor
+(c) 2023 tsm
+"""
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+CSV = (
+    'amount,country,fraud,note\n'
+    '1.0,BE,0,a\n'
+    '2.0,FR,1,b\n'
+    '4.0,DE,0,c\n'
+    '8.0,BE,0,d\n'
+    '5.0,"F\nR",1,e\n'
+)
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_8)
+    fn = ft.FeatureSource('note', ft.FEATURE_TYPE_STRING)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, None, 1.0, 0.0, 10.0)
+    fi = ft.FeatureIndex('country-ix', ft.FEATURE_TYPE_INT_16, fy)
+    fi.dictionary = {'BE': 1, 'FR': 2}
+    fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_8, ff)
+    # Not in a model LearningCategory, neither it nor the 'note' column should be built.
+    fk = ft.FeatureConcat('note-x', ft.FEATURE_TYPE_STRING, fn, fn)
+    return ft.TensorDefinition('memmap', [fs, fi, fa, fl, fk])
+
+
+class TestMemmapExecutor(unittest.TestCase):
+    def test_build_csv(self):
+        td = _definition()
+        with tempfile.TemporaryDirectory() as d:
+            ex = ft.MemmapExecutor(td, os.path.join(d, 'out'))
+            out = ex.build_csv(io.StringIO(CSV), batch_rows=2)
+            self.assertSetEqual(set(os.listdir(ex.directory)), {'categorical.npy', 'continuous.npy', 'label.npy'})
+            cont = out[ft.LEARNING_CATEGORY_CONTINUOUS]
+            self.assertIsInstance(cont, np.memmap, f'Output should be memory-mapped')
+            self.assertEqual(cont.shape, (5, 2))
+            self.assertListEqual(list(cont[:, 1]), [1.0, 2.0, 4.0, 8.0, 5.0])
+            self.assertListEqual(list(out[ft.LEARNING_CATEGORY_CATEGORICAL][:, 0]), [1, 2, 0, 1, 0])
+            self.assertListEqual(list(out[ft.LEARNING_CATEGORY_LABEL][:, 0]), [0, 1, 0, 0, 1])
+            # The files are plain .npy files.
+            c = np.load(ex.files[ft.LEARNING_CATEGORY_CONTINUOUS], mmap_mode='r')
+            self.assertTrue(np.array_equal(c, cont))
+            del out, cont, c
+
+    def test_same_as_batch(self):
+        td = _definition()
+        inputs = {
+            'amount': np.arange(10, dtype=np.float64),
+            'country': np.array(['BE', 'FR', 'DE', 'NL', 'BE'] * 2),
+            'fraud': np.array([0, 1] * 5, dtype=np.int8)
+        }
+        batches = [{k: v[i:i + 3] for k, v in inputs.items()} for i in range(0, 10, 3)]
+        with tempfile.TemporaryDirectory() as d:
+            ex = ft.MemmapExecutor(td, d, dtype_policy=ft.DTYPE_POLICY_COMPACT)
+            out = ex.build(batches, 10)
+            policy = ft.DTYPE_POLICY_COMPACT
+            expected = ft.BatchExecutor(td.subset(categories=td.learning_categories), dtype_policy=policy)
+            for lc, m in expected.execute(inputs).items():
+                self.assertEqual(out[lc].dtype, m.dtype)
+                self.assertTrue(np.array_equal(out[lc], m), f'Output for {lc.name} differs from the BatchExecutor')
+            self.assertEqual(out[ft.LEARNING_CATEGORY_CONTINUOUS].dtype, np.float32)
+            del out
+
+    def test_row_mismatch(self):
+        td = _definition()
+        with tempfile.TemporaryDirectory() as d:
+            ex = ft.MemmapExecutor(td, d)
+            with self.assertRaises(ft.FeatureRunTimeException):
+                ex.build_csv(io.StringIO(CSV), rows=4)
+            with self.assertRaises(ft.FeatureRunTimeException):
+                ex.build_csv(io.StringIO(CSV), rows=6)
+            self.assertListEqual(os.listdir(d), [], f'A failed build should not leave files')
+            with self.assertRaises(ft.FeatureRunTimeException):
+                ex.load()
+
+    def test_empty(self):
+        td = _definition()
+        with tempfile.TemporaryDirectory() as d:
+            ex = ft.MemmapExecutor(td, d)
+            out = ex.build([], 0)
+            self.assertEqual(out[ft.LEARNING_CATEGORY_CONTINUOUS].shape, (0, 2))
+            del out
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
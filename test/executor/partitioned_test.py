@@ -0,0 +1,100 @@
+"""
+Unit Tests for the PartitionedExpressionExecutor
+(c) 2023 tsm
+"""
+import unittest
+import numpy as np
+import f3atur3s as ft
+
+
+def series_sum(amounts: np.ndarray, counts: np.ndarray):
+    return float(np.sum(amounts * counts))
+
+
+def scalar_multiply(amount: float, count: int):
+    return amount * count
+
+
+class TestPartitionedExpressionExecutor(unittest.TestCase):
+    def test_partitions(self):
+        e = ft.PartitionedExpressionExecutor(workers=2, partition_size=4)
+        self.assertListEqual(e.partitions(10), [(0, 4), (4, 8), (8, 10)])
+        self.assertListEqual(e.partitions(0), [])
+
+    def test_series(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fc = ft.FeatureSource('Count', ft.FEATURE_TYPE_INT_16)
+        fe = ft.FeatureExpressionSeries('series', ft.FEATURE_TYPE_FLOAT, series_sum, [fa, fc])
+        amounts = np.random.rand(101, 5)
+        counts = np.random.randint(0, 10, size=(101, 5)).astype(np.int16)
+        e = ft.PartitionedExpressionExecutor(workers=2, partition_size=10)
+        r = e.execute(fe, [amounts, counts])
+        self.assertEqual(r.shape, (101,), f'Unexpected shape {r.shape}')
+        self.assertTrue(np.allclose(r, fe.evaluate([amounts, counts])), f'Result differs from single process')
+
+    def test_expression(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fc = ft.FeatureSource('Count', ft.FEATURE_TYPE_INT_16)
+        fe = ft.FeatureExpression('expr', ft.FEATURE_TYPE_FLOAT_32, scalar_multiply, [fa, fc])
+        amounts = np.arange(50, dtype=np.float64)
+        counts = np.full(50, 2, dtype=np.int16)
+        r = ft.PartitionedExpressionExecutor(workers=3, partition_size=7).execute(fe, [amounts, counts])
+        self.assertEqual(r.dtype, np.float32, f'Expected float32. Got {r.dtype}')
+        self.assertListEqual(r.tolist(), (amounts * 2).tolist())
+
+    def test_expression_text(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fe = ft.FeatureExpression('expr', ft.FEATURE_TYPE_FLOAT, ft.Expression('Amount * 2'), [fa])
+        amounts = np.arange(20, dtype=np.float64)
+        r = ft.PartitionedExpressionExecutor(workers=2, partition_size=6).execute(fe, [amounts])
+        self.assertListEqual(r.tolist(), (amounts * 2).tolist())
+
+    def test_pool_reused(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fc = ft.FeatureSource('Count', ft.FEATURE_TYPE_INT_16)
+        fe = ft.FeatureExpression('expr', ft.FEATURE_TYPE_FLOAT, scalar_multiply, [fa, fc])
+        fx = ft.FeatureExpression('text', ft.FEATURE_TYPE_FLOAT, ft.Expression('Amount + 1'), [fa])
+        amounts, counts = np.arange(30, dtype=np.float64), np.full(30, 3, dtype=np.int16)
+        with ft.PartitionedExpressionExecutor(workers=2, partition_size=8) as e:
+            r1 = e.execute(fe, [amounts, counts])
+            pool = e._pool
+            r2 = e.execute(fx, [amounts])
+            self.assertIs(e._pool, pool, f'The pool should be re-used between calls')
+        self.assertIsNone(e._pool, f'The pool should be closed on exit')
+        self.assertListEqual(r1.tolist(), (amounts * 3).tolist())
+        self.assertListEqual(r2.tolist(), (amounts + 1).tolist(), f'Second call should use its own expression')
+
+    def test_task_arguments(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fx = ft.FeatureExpression('text', ft.FEATURE_TYPE_FLOAT, ft.Expression('Amount + 1'), [fa])
+        amounts = np.arange(30, dtype=np.float64)
+        with ft.PartitionedExpressionExecutor(workers=2, partition_size=8) as e:
+            pool, sent = e._get_pool(), []
+            pool_map = pool.map
+            pool.map = lambda fn, *iterables: sent.extend(zip(*iterables)) or pool_map(fn, *iterables)
+            r = e.execute(fx, [amounts])
+        self.assertListEqual(r.tolist(), (amounts + 1).tolist())
+        self.assertListEqual([(s, e) for _, s, e in sent], [(0, 8), (8, 16), (16, 24), (24, 30)])
+        self.assertTrue(
+            all(isinstance(c, str) for c, _, _ in sent), f'A task should only send the call name and the row range'
+        )
+
+    def test_bad(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        e = ft.PartitionedExpressionExecutor(workers=2)
+        fl = ft.FeatureExpression('lambda', ft.FEATURE_TYPE_FLOAT, lambda x: x, [fa])
+        with self.assertRaises(ft.FeatureRunTimeException):
+            e.execute(fl, [np.ones(10)])
+        fs = ft.FeatureExpression('string', ft.FEATURE_TYPE_STRING, scalar_multiply, [fa, fa])
+        with self.assertRaises(ft.FeatureRunTimeException):
+            e.execute(fs, [np.ones(10), np.ones(10)])
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.PartitionedExpressionExecutor(workers=0)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Unit Tests for the FeatureProfiler
+(c) 2023 tsm
+"""
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+    # Same definition under a different name, the plan builds it once.
+    fs2 = ft.FeatureNormalizeScale('amount-scale-2', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    return ft.TensorDefinition('profile', [fs, fs2, oh])
+
+
+def _inputs(rows: int):
+    return {'amount': np.arange(rows, dtype=np.float64), 'country': np.array(['BE', 'FR'] * (rows // 2))}
+
+
+class TestFeatureProfiler(unittest.TestCase):
+    def test_batch_profile(self):
+        p = ft.FeatureProfiler()
+        e = ft.BatchExecutor(_definition(), profiler=p)
+        _ = e.execute(_inputs(100))
+        _ = e.execute(_inputs(100))
+        self.assertSetEqual(
+            set(p.profiles.keys()), {'amount', 'country', 'amount-scale', 'amount-scale-2', 'country-oh'}
+        )
+        for pr in p.profiles.values():
+            if pr.name == 'amount-scale-2':
+                continue
+            self.assertEqual(pr.calls, 2, f'Each feature should be profiled once per batch {pr}')
+            self.assertEqual(pr.rows, 200)
+            self.assertEqual((pr.cache_hits, pr.hit_rows), (0, 0))
+        pr = p.profiles['amount-scale-2']
+        self.assertEqual((pr.cache_hits, pr.hit_rows), (2, 200), f'The alias should be counted as cache hit')
+        self.assertEqual((pr.calls, pr.rows, pr.wall_ns), (0, 0, 0), f'Hits should not count as timed calls')
+        self.assertGreater(p.profiles['country-oh'].wall_ns, 0)
+        self.assertEqual(p.profiles['country-oh'].feature_class, 'FeatureOneHot')
+        walls = [pr.wall_ns for pr in p.report()]
+        self.assertListEqual(walls, sorted(walls, reverse=True), f'Report should be sorted by cost')
+
+    def test_cost_per_row(self):
+        p = ft.FeatureProfiler()
+        f = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        _ = p.run(f, 100, lambda: np.zeros(100))
+        p.hit(f, 1_000_000)
+        pr = p.profiles['amount']
+        self.assertEqual((pr.calls, pr.rows, pr.cache_hits, pr.hit_rows), (1, 100, 1, 1_000_000))
+        self.assertEqual(p.cost_per_row(), {'amount': pr.wall_ns / 100}, f'Hit rows should not lower the cost')
+        p.hit(ft.FeatureSource('country', ft.FEATURE_TYPE_STRING), 10)
+        self.assertNotIn('country', p.cost_per_row(), f'Feature that was never built should not have a cost')
+        self.assertIn('hit rows', p.summary())
+
+    def test_no_profiler(self):
+        e = ft.BatchExecutor(_definition())
+        self.assertIsNone(e.profiler)
+        p = ft.FeatureProfiler()
+        e.profiler = p
+        _ = e.execute(_inputs(10))
+        self.assertEqual(len(p.profiles), 5)
+
+    def test_memory(self):
+        p = ft.FeatureProfiler(memory_sample_every=2)
+        e = ft.BatchExecutor(_definition(), profiler=p)
+        for _ in range(3):
+            _ = e.execute(_inputs(10_000))
+        p.stop()
+        pr = p.profiles['amount']
+        self.assertEqual(pr.memory_samples, 2, f'Calls 1 and 3 should be sampled')
+        self.assertGreater(pr.bytes, 0)
+        self.assertEqual(p.profiles['country-oh'].memory_samples, 2)
+
+    def test_export(self):
+        p = ft.FeatureProfiler(trace=True)
+        _ = ft.BatchExecutor(_definition(), profiler=p).execute(_inputs(10))
+        with tempfile.TemporaryDirectory() as d:
+            p.save_json(os.path.join(d, 'profile.json'))
+            p.save_chrome_trace(os.path.join(d, 'trace.json'))
+            with open(os.path.join(d, 'profile.json')) as f:
+                j = json.load(f)
+            with open(os.path.join(d, 'trace.json')) as f:
+                t = json.load(f)
+        self.assertEqual(len(j['features']), 5)
+        self.assertEqual(len(t['traceEvents']), 5)
+        self.assertTrue(all(e['ph'] == 'X' for e in t['traceEvents']))
+        self.assertIn('country-oh', p.summary())
+
+    def test_trace_bounded(self):
+        p = ft.FeatureProfiler()
+        e = ft.BatchExecutor(_definition(), profiler=p)
+        _ = e.execute(_inputs(10))
+        with self.assertRaises(ft.FeatureRunTimeException):
+            p.chrome_trace()
+        p = ft.FeatureProfiler(trace=True, max_events=7)
+        e.profiler = p
+        for _ in range(3):
+            _ = e.execute(_inputs(10))
+        events = p.chrome_trace()['traceEvents']
+        self.assertEqual(len(events), 7, f'Only the last max_events events should be kept')
+        self.assertEqual(p.profiles['amount'].calls, 3, f'Profiles should count all calls')
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.FeatureProfiler(trace=True, max_events=0)
+
+    def test_bad_sort(self):
+        p = ft.FeatureProfiler()
+        with self.assertRaises(ft.FeatureRunTimeException):
+            p.report('not-an-attribute')
+        with self.assertRaises(ft.FeatureRunTimeException):
+            ft.FeatureProfiler(trace=False).chrome_trace()
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
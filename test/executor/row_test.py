@@ -0,0 +1,224 @@
+"""
+Unit Tests for the single record RowExecutor
+(c) 2023 tsm
+"""
+import math
+import unittest
+from datetime import datetime
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d %H:%M:%S')
+    ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_8)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, '10', 1.0, 0.0, 3.0)
+    fz = ft.FeatureNormalizeStandard('amount-z', ft.FEATURE_TYPE_FLOAT, fa, None, 0.01, 4.0, 2.0)
+    fr = ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_16, fm)
+    fi.dictionary = {'m1': 1, 'm2': 2}
+    fb = ft.FeatureBin('amount-bin', ft.FEATURE_TYPE_INT_16, fa, 3)
+    fb.bins = [0.0, 2.0, 6.0]
+    fw = ft.FeatureDateTimeWave('date-wave', ft.FEATURE_TYPE_FLOAT, fd, '%H', 24, 3)
+    ft_ = ft.FeatureDateTimeFormat('date-dow', ft.FEATURE_TYPE_INT_8, fd, '%u')
+    fe = ft.FeatureExpression('amount-x2', ft.FEATURE_TYPE_FLOAT, ft.Expression('amount * 2 + count'), [fa, fc])
+    fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_8, ff)
+    return ft.TensorDefinition('row', [fs, fz, fr, oh, fi, fb, fw, ft_, fe, fl])
+
+
+RECORDS = [
+    {'amount': 0.0, 'count': 0, 'merchant': 'm1', 'country': 'FR', 'date': '2023-01-01 00:10:00', 'fraud': 0},
+    {'amount': 9.5, 'count': 3, 'merchant': 'm2', 'country': 'BE', 'date': '2023-03-15 13:00:00', 'fraud': 1},
+    {'amount': 4.0, 'count': 2, 'merchant': 'm9', 'country': 'DE', 'date': '2023-12-31 23:59:59', 'fraud': 0},
+]
+
+
+def _double(amount):
+    return amount * 2.0
+
+
+def _double_vectorized(amount):
+    # Only works on arrays, a scalar has no len.
+    return np.full(len(amount), 2.0) * amount
+
+
+def _is_large(amount):
+    return amount > 5.0
+
+
+def _parity_definition() -> ft.TensorDefinition:
+    # One feature of each class the RowExecutor supports.
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d %H:%M:%S')
+    ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_8)
+    fv = ft.FeatureVirtual('amount', ft.FEATURE_TYPE_FLOAT)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, '10', 1.0, 0.0, 3.0)
+    fz = ft.FeatureNormalizeStandard('amount-z', ft.FEATURE_TYPE_FLOAT, fa, None, 0.01, 4.0, 2.0)
+    fr = ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    fk = ft.FeatureConcat('merchant-country', ft.FEATURE_TYPE_STRING, fm, fy)
+    fh = ft.FeatureDateTimeFormat('date-hour', ft.FEATURE_TYPE_FLOAT, fd, '%H')
+    fo = ft.FeatureDateTimeFormat('date-month', ft.FEATURE_TYPE_STRING, fd, '%Y%m')
+    fw = ft.FeatureDateTimeWave('date-wave', ft.FEATURE_TYPE_FLOAT, fd, '%H', 24, 2)
+    fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_16, fm)
+    fi.dictionary = {'m1': 1, 'm2': 2}
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    fb = ft.FeatureBin('amount-bin', ft.FEATURE_TYPE_INT_16, fa, 3)
+    fb.bins = [0.0, 2.0, 6.0]
+    fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_8, ff)
+    fe = ft.FeatureExpression('amount-x2', ft.FEATURE_TYPE_FLOAT, _double, [fa])
+    fx = ft.FeatureExpression('amount-x2-v', ft.FEATURE_TYPE_FLOAT, _double_vectorized, [fv], vectorized=True)
+    fn = ft.FeatureExpression('amount-dsl', ft.FEATURE_TYPE_FLOAT, ft.Expression('amount * 2 + count'), [fa, fc])
+    fg = ft.FeatureFilter('amount-large', ft.FEATURE_TYPE_BOOL, _is_large, [fa])
+    return ft.TensorDefinition('parity', [fa, fs, fz, fr, fk, fh, fo, fw, fi, oh, fb, fl, fe, fx, fn, fg])
+
+
+PARITY_RECORDS = [
+    {'amount': 9.5, 'count': 3, 'merchant': 'm2', 'country': 'BE', 'date': '2023-03-15 13:00:00', 'fraud': 1},
+    {'amount': 4.0, 'count': 0, 'merchant': 'm9', 'country': 'DE', 'date': '', 'fraud': 0},
+    {'amount': np.nan, 'count': 2, 'merchant': 'm1', 'country': 'FR', 'date': '2023-1-5 07:00:00', 'fraud': 0},
+]
+
+
+def _float32_definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fp = ft.FeatureSource('price', ft.FEATURE_TYPE_FLOAT_32)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d %H:%M:%S')
+    fv = ft.FeatureVirtual('amount', ft.FEATURE_TYPE_FLOAT)
+    return ft.TensorDefinition('float32', [
+        fp,
+        ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, None, 1.0, 0.1, 7.3),
+        ft.FeatureNormalizeScale('amount-log10', ft.FEATURE_TYPE_FLOAT_32, fa, '10', 1.0, 0.0, 3.7),
+        ft.FeatureNormalizeStandard('amount-z', ft.FEATURE_TYPE_FLOAT_32, fa, None, 0.0, 3.3, 1.7),
+        ft.FeatureNormalizeStandard('price-ln', ft.FEATURE_TYPE_FLOAT_32, fp, 'e', 0.5, 1.1, 0.9),
+        ft.FeatureNormalizeStandard('amount-z64', ft.FEATURE_TYPE_FLOAT, fa, '2', 1.0, 3.3, 1.7),
+        ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT_32, fa, fc),
+        ft.FeatureRatio('price-per-count', ft.FEATURE_TYPE_FLOAT_32, fp, fc),
+        ft.FeatureExpression('amount-x2', ft.FEATURE_TYPE_FLOAT_32, _double, [fa]),
+        ft.FeatureExpression('amount-x2-v', ft.FEATURE_TYPE_FLOAT_32, _double_vectorized, [fv], vectorized=True),
+        ft.FeatureExpression('amount-dsl', ft.FEATURE_TYPE_FLOAT_32, ft.Expression('amount / 3 + count'), [fa, fc]),
+        ft.FeatureDateTimeFormat('date-hour', ft.FEATURE_TYPE_FLOAT_32, fd, '%H')
+    ])
+
+
+FLOAT32_RECORDS = [
+    {'amount': 0.1, 'price': 1 / 3, 'count': 3, 'date': '2023-03-15 13:00:00'},
+    {'amount': 123456.789, 'price': 2.718281828, 'count': 7, 'date': '2023-03-15 01:00:00'},
+    {'amount': np.nan, 'price': 0.3, 'count': 0, 'date': ''},
+]
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b if isinstance(a, str) else bool(np.isclose(a, b, atol=1e-6))
+
+
+class TestRowExecutor(unittest.TestCase):
+    def test_same_as_batch(self):
+        td = _definition()
+        row, batch = ft.RowExecutor(td), ft.BatchExecutor(td)
+        inputs = {k: np.array([r[k] for r in RECORDS]) for k in RECORDS[0].keys()}
+        expected = batch.execute(inputs)
+        for i, record in enumerate(RECORDS):
+            r = row.execute(record)
+            self.assertListEqual(list(r.keys()), list(expected.keys()), f'Learning categories should be the same')
+            for lc, vector in r.items():
+                self.assertTrue(
+                    np.allclose(np.array(vector, dtype=np.float64), expected[lc][i].astype(np.float64), atol=1e-6),
+                    f'Row {i} category {lc.name} differs. Row {vector} Batch {expected[lc][i]}'
+                )
+
+    def test_parity(self):
+        td = _parity_definition()
+        classes = set(f.__class__ for f in list(td.embedded_features) + list(td.features))
+        self.assertSetEqual(classes, {
+            ft.FeatureSource, ft.FeatureVirtual, ft.FeatureNormalizeScale, ft.FeatureNormalizeStandard,
+            ft.FeatureRatio, ft.FeatureConcat, ft.FeatureDateTimeFormat, ft.FeatureDateTimeWave, ft.FeatureIndex,
+            ft.FeatureOneHot, ft.FeatureBin, ft.FeatureLabelBinary, ft.FeatureExpression, ft.FeatureFilter
+        }, f'The parity definition should have a feature of every class supported in row mode')
+        row, batch = ft.RowExecutor(td), ft.BatchExecutor(td)
+        for i, record in enumerate(PARITY_RECORDS):
+            expected = batch.execute({k: np.array([v]) for k, v in record.items()})
+            r = row.execute(record)
+            self.assertListEqual(list(r.keys()), list(expected.keys()))
+            for lc, vector in r.items():
+                b = expected[lc][0].tolist()
+                self.assertEqual(len(vector), len(b))
+                for j, (x, y) in enumerate(zip(vector, b)):
+                    self.assertTrue(
+                        _same(x, y), f'Record {i} {lc.name} column {j} differs. Row <{x}> Batch <{y}>'
+                    )
+
+    def test_float32_parity(self):
+        # Row mode should give exactly the values of batch mode, not values that are only close.
+        td = _float32_definition()
+        for policy, dtype in ((ft.DTYPE_POLICY_DEFAULT, np.float64), (ft.DTYPE_POLICY_COMPACT, np.float32)):
+            row, batch = ft.RowExecutor(td, policy), ft.BatchExecutor(td, dtype_policy=policy)
+            self.assertEqual(batch.dtypes[ft.LEARNING_CATEGORY_CONTINUOUS], dtype)
+            for i, record in enumerate(FLOAT32_RECORDS):
+                expected = batch.execute({k: np.array([v]) for k, v in record.items()})
+                r = row.execute(record)
+                for lc, vector in r.items():
+                    for j, (x, y) in enumerate(zip(vector, expected[lc][0].tolist())):
+                        self.assertTrue(
+                            x == y or (math.isnan(x) and math.isnan(y)),
+                            f'Policy {policy.name} record {i} column {batch.layout[lc][j][0].name} differs. ' +
+                            f'Row <{x!r}> Batch <{y!r}>'
+                        )
+
+    def test_label_validation(self):
+        td = _parity_definition()
+        row, batch = ft.RowExecutor(td), ft.BatchExecutor(td)
+        record = dict(PARITY_RECORDS[0])
+        record['fraud'] = 2
+        with self.assertRaises(ft.FeatureRunTimeException):
+            batch.execute({k: np.array([v]) for k, v in record.items()})
+        with self.assertRaises(ft.FeatureRunTimeException):
+            row.execute(record)
+
+    def test_datetime_input(self):
+        row = ft.RowExecutor(_definition())
+        record = dict(RECORDS[1])
+        record['date'] = datetime(2023, 3, 15, 13)
+        self.assertListEqual(row.execute(record)[ft.LEARNING_CATEGORY_CATEGORICAL], row.execute(RECORDS[1])[
+            ft.LEARNING_CATEGORY_CATEGORICAL])
+
+    def test_missing_input(self):
+        row = ft.RowExecutor(_definition())
+        record = dict(RECORDS[0])
+        del record['merchant']
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = row.execute(record)
+
+    def test_not_supported(self):
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fs = ft.FeatureSource('card', ft.FEATURE_TYPE_STRING)
+        fg = ft.FeatureGrouper('grouped', ft.FEATURE_TYPE_FLOAT, fa, fs, None, ft.TIME_PERIOD_DAY, 1, ft.AGGREGATOR_SUM)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.RowExecutor(ft.TensorDefinition('grouped', [fg]))
+
+    def test_parse_one(self):
+        p = ft.DateTimeParser.compile('%Y-%m-%d %H:%M:%S')
+        self.assertEqual(p.parse_one('2023-03-15 13:00:01'), datetime(2023, 3, 15, 13, 0, 1))
+        self.assertIsNone(p.parse_one('2023-3-15 13:00:01'), f'Wrong layout should return None')
+        self.assertIsNone(p.parse_one('2023-02-30 13:00:01'), f'Invalid date should return None')
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ Unit Tests for FeatureBin Creation
 import shutil
 import os
 import unittest
+import numpy as np
 import f3atur3s as ft
 
 
@@ -69,6 +70,15 @@ class TestFeatureBin(unittest.TestCase):
         self.assertNotEqual(fb1, fb5, f'Should not have been equal. Different Type')
 
 
+class TestFeatureBinTransform(unittest.TestCase):
+    def test_transform(self):
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fb = ft.FeatureBin('amount-bin', ft.FEATURE_TYPE_INT_16, fs, 3)
+        fb.bins = [0.0, 1.0, 2.0]
+        r = fb.transform({'amount': np.array([-1.0, 0.5, 1.5, 5.0, np.nan])})
+        self.assertListEqual(r.tolist(), [0, 1, 2, 3, 0])
+
+
 class TestFeatureBinSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-bin-base'
@@ -111,7 +121,7 @@ class TestFeatureBinSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
@@ -5,6 +5,7 @@ Unit Tests for FeatureConcat Creation
 import os
 import unittest
 import shutil
+import numpy as np
 import f3atur3s as ft
 
 
@@ -69,6 +70,15 @@ class TestFeatureConcat(unittest.TestCase):
         self.assertNotEqual(rf_1, rf_4, f'Should not have been equal. Different Concat-Feature')
 
 
+class TestFeatureConcatCompute(unittest.TestCase):
+    def test_compute(self):
+        fb = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+        fc = ft.FeatureSource('city', ft.FEATURE_TYPE_STRING)
+        f = ft.FeatureConcat('country-city', ft.FEATURE_TYPE_STRING, fb, fc)
+        r = f.compute(np.array(['BE', 'NL']), np.array(['Gent', 'Delft']))
+        self.assertListEqual(r.tolist(), ['BEGent', 'NLDelft'])
+
+
 class TestFeatureConcatSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-concat-base'
@@ -113,7 +123,7 @@ class TestFeatureConcatSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
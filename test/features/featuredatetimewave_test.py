@@ -5,6 +5,9 @@ Unit Tests for FeatureBin Creation
 import shutil
 import os
 import unittest
+from datetime import datetime
+
+import numpy as np
 import f3atur3s as ft
 
 
@@ -57,6 +60,29 @@ class TestFeatureDateTimeWave(unittest.TestCase):
             _ = ft.FeatureDateTimeWave(name, ft.FEATURE_TYPE_FLOAT, sf, '%w', 2, 2.0)
 
 
+class TestFeatureDateTimeWaveEncode(unittest.TestCase):
+    def test_encode(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_DATE, '%Y-%m-%d')
+        fw = ft.FeatureDateTimeWave('wave', ft.FEATURE_TYPE_FLOAT_32, sf, '%w', 7, 2)
+        values = np.array(['2023-01-01', '2023-01-04', 'NaT'], dtype='datetime64[D]')
+        r = fw.encode(values)
+        self.assertEqual(r.shape, (3, 4), f'Expected one column per expand name. Got {r.shape}')
+        self.assertEqual(r.dtype, np.float32, f'Expected the dtype of the feature type. Got {r.dtype}')
+        # Sunday is day 0
+        self.assertTrue(np.allclose(r[0], [0.0, 1.0, 0.0, 1.0], atol=1e-6), f'Unexpected Sunday encoding {r[0]}')
+        w = 2 * np.pi * 3 / 7
+        self.assertTrue(np.allclose(r[1], [np.sin(w), np.cos(w), np.sin(2 * w), np.cos(2 * w)], atol=1e-6))
+        self.assertTrue(np.isnan(r[2]).all(), f'NaT should give NaN')
+
+    def test_encode_strftime_fallback(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d')
+        fw = ft.FeatureDateTimeWave('wave', ft.FEATURE_TYPE_FLOAT, sf, '%I', 12, 1)
+        values = np.array(['2023-01-01T15:00:00'], dtype='datetime64[s]')
+        x = int(datetime(2023, 1, 1, 15).strftime('%I'))
+        r = fw.encode(values)
+        self.assertTrue(np.allclose(r[0], [np.sin(2 * np.pi * x / 12), np.cos(2 * np.pi * x / 12)]))
+
+
 class TestFeatureDateTimeWaveSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-date-time-wave-base'
@@ -103,7 +129,7 @@ class TestFeatureDateTimeWaveSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
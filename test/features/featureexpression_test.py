@@ -5,6 +5,7 @@ Unit Tests for FeatureExpression Creation
 import os
 import unittest
 import shutil
+import numpy as np
 import f3atur3s as ft
 
 from typing import Any
@@ -16,6 +17,18 @@ def feature_expression(param: int):
 def feature_expression_add(param1: int, param2: int):
     return param1 + param2
 
+
+def feature_expression_vectorized(param1: np.ndarray, param2: np.ndarray):
+    return param1 * param2
+
+
+def feature_expression_vectorized_scalar(param1: np.ndarray):
+    return 1.0
+
+
+def feature_expression_vectorized_string(param1: np.ndarray):
+    return param1.astype(np.str_)
+
 class TestFeatureExpression(unittest.TestCase):
     def test_creation_base(self):
         name = 'expr'
@@ -94,6 +107,48 @@ class TestFeatureExpression(unittest.TestCase):
             _ = ft.FeatureExpression(name, f_type, feature_expression, par_3)
 
 
+class TestFeatureExpressionVectorized(unittest.TestCase):
+    def test_evaluate_scalar(self):
+        sf1 = ft.FeatureSource('Source1', ft.FEATURE_TYPE_INT_16)
+        sf2 = ft.FeatureSource('Source2', ft.FEATURE_TYPE_INT_16)
+        ef = ft.FeatureExpression('expr', ft.FEATURE_TYPE_INT_32, feature_expression_add, [sf1, sf2])
+        self.assertFalse(ef.vectorized, f'Vectorized should default to False')
+        r = ef.evaluate([np.array([1, 2, 3], dtype=np.int16), np.array([1, 1, 1], dtype=np.int16)])
+        self.assertEqual(r.dtype, np.int32, f'Expected int32 output. Got {r.dtype}')
+        self.assertListEqual(r.tolist(), [2, 3, 4])
+
+    def test_evaluate_vectorized(self):
+        sf1 = ft.FeatureSource('Source1', ft.FEATURE_TYPE_FLOAT)
+        sf2 = ft.FeatureSource('Source2', ft.FEATURE_TYPE_FLOAT)
+        ef = ft.FeatureExpression(
+            'expr', ft.FEATURE_TYPE_FLOAT_32, feature_expression_vectorized, [sf1, sf2], vectorized=True
+        )
+        r = ef.evaluate([np.array([1.0, 2.0]), np.array([3.0, 4.0])])
+        self.assertEqual(r.dtype, np.float32, f'Expected float32 output. Got {r.dtype}')
+        self.assertListEqual(r.tolist(), [3.0, 8.0])
+        with self.assertRaises(ft.FeatureRunTimeException):
+            ef.evaluate([np.array([1.0, 2.0])])
+
+    def test_vectorized_bad_output(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_FLOAT)
+        # Returns a scalar, not an array
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.FeatureExpression(
+                'expr', ft.FEATURE_TYPE_FLOAT, feature_expression_vectorized_scalar, [sf], vectorized=True
+            )
+        # Returns strings for a float feature
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.FeatureExpression(
+                'expr', ft.FEATURE_TYPE_FLOAT, feature_expression_vectorized_string, [sf], vectorized=True
+            )
+
+    def test_filter_vectorized(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_INT_16)
+        ff = ft.FeatureFilter('filter', ft.FEATURE_TYPE_BOOL, feature_expression, [sf], vectorized=True)
+        r = ff.evaluate([np.array([0, 1, 2], dtype=np.int16)])
+        self.assertListEqual(r.tolist(), [False, True, False])
+
+
 class TestFeatureExpressionSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-expression-base'
@@ -134,7 +189,19 @@ class TestFeatureExpressionSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        shutil.rmtree(save_file, ignore_errors=True)
+
+    def test_load_vectorized(self):
+        save_file = './load-expression-vectorized'
+        shutil.rmtree(save_file, ignore_errors=True)
+        fb1 = ft.FeatureSource('base-1', ft.FEATURE_TYPE_FLOAT)
+        fb2 = ft.FeatureSource('base-2', ft.FEATURE_TYPE_FLOAT)
+        f = ft.FeatureExpression('expr', ft.FEATURE_TYPE_FLOAT, feature_expression_vectorized, [fb1, fb2], True)
+        td = ft.TensorDefinition('vectorized', [f])
+        ft.TensorDefinitionSaver.save(td, save_file)
+        td_new = ft.TensorDefinitionLoader.load(save_file)
+        self.assertTrue(td_new.features[0].vectorized, f'Vectorized flag not loaded')
         shutil.rmtree(save_file, ignore_errors=True)
 
     # TODO Need to work out saving for lambda
@@ -3,6 +3,8 @@ Unit Tests for FeatureFilter Creation
 (c) 2023 tsm
 """
 import unittest
+import shutil
+import numpy as np
 import f3atur3s as ft
 
 
@@ -34,6 +36,36 @@ class TestFeatureFilter(unittest.TestCase):
         with self.assertRaises(ft.FeatureDefinitionException):
             _ = ft.FeatureFilter(name, f_type, feature_expression, par)
 
+    def test_expression_text(self):
+        sf1 = ft.FeatureSource('Country', ft.FEATURE_TYPE_STRING)
+        sf2 = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        ff = ft.FeatureFilter(
+            'filter', ft.FEATURE_TYPE_BOOL, ft.Expression("Country == 'DE' and Amount > 100"), [sf1, sf2]
+        )
+        self.assertTrue(ff.vectorized, f'Expression should always be vectorized')
+        r = ff.evaluate([np.array(['DE', 'FR']), np.array([200.0, 200.0])])
+        self.assertListEqual(r.tolist(), [True, False])
+        # Expression references a feature that is not a parameter
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.FeatureFilter('filter', ft.FEATURE_TYPE_BOOL, ft.Expression('Other > 1'), [sf2])
+        # Expression does not return a bool
+        with self.assertRaises(ft.FeatureDefinitionException):
+            _ = ft.FeatureFilter('filter', ft.FEATURE_TYPE_BOOL, ft.Expression('Amount * 2.5'), [sf2])
+
+    def test_save_load_expression_text(self):
+        save_file = './save-filter-expression'
+        shutil.rmtree(save_file, ignore_errors=True)
+        sf = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        ff = ft.FeatureFilter('filter', ft.FEATURE_TYPE_BOOL, ft.Expression('Amount > 100'), [sf])
+        td = ft.TensorDefinition('filter', [ff])
+        ft.TensorDefinitionSaver.save(td, save_file)
+        td_new = ft.TensorDefinitionLoader.load(save_file)
+        f_new = td_new.features[0]
+        self.assertIsInstance(f_new, ft.FeatureFilter, f'Expected a FeatureFilter. Got {type(f_new)}')
+        self.assertEqual(f_new.expression, ff.expression, f'Expression not loaded')
+        self.assertEqual(f_new, ff, f'Loaded feature not the same')
+        shutil.rmtree(save_file, ignore_errors=True)
+
     # TODO Need equality tests
 
 
@@ -5,6 +5,8 @@ Unit Tests for FeatureBin Creation
 import shutil
 import os
 import unittest
+
+import numpy as np
 import f3atur3s as ft
 
 
@@ -30,6 +32,43 @@ class TestFeatureDateTimeFormat(unittest.TestCase):
             _ = ft.FeatureDateTimeFormat(name, ft.FEATURE_TYPE_INT_8, sf, '%w')
 
 
+class TestFeatureDateTimeFormatExtract(unittest.TestCase):
+    values = np.array(['2020-12-31T23:15:00', '2021-01-03T08:05:09', '2021-06-15T12:00:00'], dtype='datetime64[s]')
+
+    def _strftime(self, fmt):
+        return [d.strftime(fmt) for d in self.values.tolist()]
+
+    def test_extract_int(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%dT%H:%M:%S')
+        for fmt in ('%d', '%w', '%u', '%m', '%H', '%j', '%Y', '%V'):
+            f = ft.FeatureDateTimeFormat('fmt', ft.FEATURE_TYPE_INT_16, sf, fmt)
+            r = f.extract(self.values)
+            self.assertEqual(r.dtype, np.int16, f'Expected the dtype of the feature. Got {r.dtype}')
+            self.assertListEqual(r.tolist(), [int(x) for x in self._strftime(fmt)], f'{fmt} differs from strftime')
+
+    def test_extract_string(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%dT%H:%M:%S')
+        for fmt in ('%d', '%j', '%Y-%m', 'W%V %%', '%d %b'):
+            f = ft.FeatureDateTimeFormat('fmt', ft.FEATURE_TYPE_STRING, sf, fmt)
+            self.assertListEqual(f.extract(self.values).tolist(), self._strftime(fmt), f'{fmt} differs from strftime')
+
+    def test_extract_composite_int(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%dT%H:%M:%S')
+        f = ft.FeatureDateTimeFormat('fmt', ft.FEATURE_TYPE_INT_32, sf, '%Y%m')
+        self.assertListEqual(f.extract(self.values).tolist(), [202012, 202101, 202106])
+
+    def test_extract_nat(self):
+        sf = ft.FeatureSource('Source', ft.FEATURE_TYPE_DATE, '%Y-%m-%d')
+        values = np.array(['2021-01-01', 'NaT'], dtype='datetime64[D]')
+        r = ft.FeatureDateTimeFormat('fmt', ft.FEATURE_TYPE_FLOAT, sf, '%m').extract(values)
+        self.assertEqual(r[0], 1.0)
+        self.assertTrue(np.isnan(r[1]), f'NaT should be NaN for a float type')
+        r = ft.FeatureDateTimeFormat('fmt', ft.FEATURE_TYPE_STRING, sf, '%m').extract(values)
+        self.assertListEqual(r.tolist(), ['01', ''])
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.FeatureDateTimeFormat('fmt', ft.FEATURE_TYPE_INT_8, sf, '%m').extract(values)
+
+
 class TestFeatureDateTimeFormatSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-date-time-format-base'
@@ -72,7 +111,7 @@ class TestFeatureDateTimeFormatSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
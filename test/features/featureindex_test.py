@@ -5,6 +5,7 @@ Unit Tests for FeatureIndex Creation
 import os
 import unittest
 import shutil
+import numpy as np
 import f3atur3s as ft
 
 
@@ -68,6 +69,18 @@ class TestIndexFeature(unittest.TestCase):
         self.assertNotEqual(fi1, fi5, f'Should not have been equal. Different Type')
 
 
+class TestFeatureIndexTransform(unittest.TestCase):
+    def test_transform(self):
+        fs = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+        fi = ft.FeatureIndex('country-ix', ft.FEATURE_TYPE_INT_16, fs)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = fi.transform({'country': np.array(['BE'])})
+        fi.dictionary = {'FR': 2, 'BE': 1}
+        r = fi.transform({'country': np.array(['BE', 'FR', 'DE'])})
+        self.assertEqual(r.dtype, np.int16)
+        self.assertListEqual(r.tolist(), [1, 2, 0], f'Unknown values should get index 0')
+
+
 class TestFeatureIndexSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-index-base'
@@ -108,7 +121,7 @@ class TestFeatureIndexSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
@@ -5,6 +5,8 @@ Unit Tests for FeatureLabelBinary Creation
 import unittest
 import shutil
 import os
+
+import numpy as np
 import f3atur3s as ft
 
 
@@ -50,6 +52,45 @@ class TestFeatureLabelBinary(unittest.TestCase):
         self.assertEqual(fl1, fl5, f'Should have been equal')
 
 
+class TestFeatureLabelBinaryTransform(unittest.TestCase):
+    def test_transform_no_copy(self):
+        fs = ft.FeatureSource('source', ft.FEATURE_TYPE_INT_8)
+        fl = ft.FeatureLabelBinary('label', ft.FEATURE_TYPE_INT_8, fs)
+        values = np.array([0, 1, 1, 0, 0], dtype=np.uint8)
+        r, counts = fl.transform_counts({'source': values})
+        self.assertEqual(r.dtype, np.int8)
+        self.assertTrue(np.shares_memory(r, values), f'Same size integers should not have been copied')
+        self.assertEqual((counts.negatives, counts.positives, counts.rows), (3, 2, 5))
+        self.assertAlmostEqual(counts.prevalence, 0.4)
+        self.assertTupleEqual(counts.class_weights, (5 / 6, 5 / 4))
+        r = fl.transform({'source': values.astype(np.int64)})
+        self.assertEqual(r.dtype, np.int8)
+        self.assertListEqual(r.tolist(), [0, 1, 1, 0, 0])
+
+    def test_transform_out(self):
+        fs = ft.FeatureSource('source', ft.FEATURE_TYPE_FLOAT)
+        fl = ft.FeatureLabelBinary('label', ft.FEATURE_TYPE_INT_16, fs)
+        out = np.full(3, 7, dtype=np.int16)
+        r, counts = fl.transform_counts({'source': np.array([1.0, 0.0, 1.0])}, out)
+        self.assertIs(r, out)
+        self.assertListEqual(out.tolist(), [1, 0, 1])
+        self.assertEqual(counts, ft.BinaryLabelCounts(1, 2))
+
+    def test_transform_invalid(self):
+        fs = ft.FeatureSource('source', ft.FEATURE_TYPE_INT_32)
+        fl = ft.FeatureLabelBinary('label', ft.FEATURE_TYPE_INT_8, fs)
+        for values in (np.array([0, 1, -1]), np.array([0, 1, 2 ** 40]), np.array([0.0, 0.5]), np.array([1.0, np.nan])):
+            with self.assertRaises(ft.FeatureRunTimeException):
+                _ = fl.transform({'source': values})
+
+    def test_counts(self):
+        c = ft.FeatureLabelBinary.count(np.array([True, False, True]))
+        self.assertEqual(c, ft.BinaryLabelCounts(1, 2))
+        self.assertEqual(c + c, ft.BinaryLabelCounts(2, 4))
+        self.assertEqual(ft.BinaryLabelCounts().prevalence, 0.0)
+        self.assertTupleEqual(ft.BinaryLabelCounts(3, 0).class_weights, (0.5, 0.0))
+
+
 class TestFeatureLabelBinarySaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-label-bin-base'
@@ -90,7 +131,7 @@ class TestFeatureLabelBinarySaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
@@ -5,6 +5,7 @@ Unit Tests for FeatureSource Creation
 import os
 import unittest
 import shutil
+import numpy as np
 import f3atur3s as ft
 
 
@@ -34,6 +35,17 @@ class TestFeatureOneHot(unittest.TestCase):
 # TODO Need Equality Tests
 
 
+class TestFeatureOneHotTransform(unittest.TestCase):
+    def test_transform(self):
+        fs = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+        oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fs)
+        oh.expand_names = ['country__FR', 'country__BE']
+        self.assertListEqual(oh.expand_values, ['FR', 'BE'])
+        out = np.full((3, 4), 7, dtype=np.int8)
+        oh.transform({'country': np.array(['BE', 'DE', 'FR'])}, out[:, 1:3])
+        self.assertListEqual(out.tolist(), [[7, 0, 1, 7], [7, 0, 0, 7], [7, 1, 0, 7]])
+
+
 class TestFeatureOneHotSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-onehot-base'
@@ -74,7 +86,7 @@ class TestFeatureOneHotSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
@@ -5,6 +5,7 @@ Unit Tests for FeatureSource Creation
 import os
 import unittest
 import shutil
+import numpy as np
 import f3atur3s as ft
 
 
@@ -88,6 +89,17 @@ class TestFeatureRatio(unittest.TestCase):
         self.assertNotEqual(rf_1, rf_5, f'Should not have been equal. Different Denominator-Feature')
 
 
+class TestFeatureRatioCompute(unittest.TestCase):
+    def test_compute(self):
+        fb = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fd = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+        for tp in (ft.FEATURE_TYPE_FLOAT, ft.FEATURE_TYPE_FLOAT_32):
+            f = ft.FeatureRatio('ratio', tp, fb, fd)
+            r = f.compute(np.array([10.0, 3.0]), np.array([4, 0], dtype=np.int16))
+            self.assertEqual(r.dtype, tp.numpy_type, f'Expected dtype of the feature type. Got {r.dtype}')
+            self.assertListEqual(r.tolist(), [2.5, 0.0])
+
+
 class TestFeatureRatioSaveLoad(unittest.TestCase):
     def test_save_base(self):
         save_file = './save-ratio-base'
@@ -132,7 +144,7 @@ class TestFeatureRatioSaveLoad(unittest.TestCase):
         self.assertEqual(td_new.inference_ready, td.inference_ready, f'Inference state not equal')
         self.assertListEqual(td_new.learning_categories, td.learning_categories, f'Learning Cat not equal')
         self.assertEqual(td_new.features[0], td.features[0], 'Main Feature not the same')
-        self.assertListEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
+        self.assertTupleEqual(td_new.embedded_features, td.embedded_features, f'Embedded features not the same')
         shutil.rmtree(save_file, ignore_errors=True)
 
 
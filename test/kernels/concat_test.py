@@ -0,0 +1,38 @@
+"""
+Unit Tests for the ConcatKernel
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+class TestConcatKernel(unittest.TestCase):
+    def test_unicode(self):
+        r = ft.ConcatKernel.concat(np.array(['a', 'bb', '']), np.array(['x', 'y', 'zz']))
+        self.assertEqual(r.dtype.kind, 'U')
+        self.assertListEqual(r.tolist(), ['ax', 'bby', 'zz'])
+
+    def test_bytes(self):
+        r = ft.ConcatKernel.concat(np.array([b'a', b'b']), np.array([b'1', b'22']))
+        self.assertEqual(r.dtype.kind, 'S', f'Two byte arrays should give a byte array')
+        self.assertListEqual(r.tolist(), [b'a1', b'b22'])
+
+    def test_mixed(self):
+        r = ft.ConcatKernel.concat(np.array([b'a', b'b']), np.array(['é', None], dtype=object))
+        self.assertListEqual(r.tolist(), ['aé', 'b'], f'None should be an empty string')
+
+    def test_bad(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.ConcatKernel.concat(np.array([1, 2]), np.array(['a', 'b']))
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.ConcatKernel.concat(np.array(['a']), np.array(['a', 'b']))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Unit Tests for the vectorized DateTimeComponent extraction
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+FORMATS = ['%Y', '%m', '%d', '%j', '%w', '%u', '%V', '%H', '%M', '%S']
+
+
+class TestDateTimeComponent(unittest.TestCase):
+    def test_extract_same_as_strftime(self):
+        rng = np.random.default_rng(42)
+        # Includes dates before the epoch and around new year, where the ISO week differs from the year.
+        values = np.concatenate([
+            np.datetime64('1960-01-01T00:00:00') + rng.integers(0, 80 * 365 * 86400, 2000).astype('timedelta64[s]'),
+            np.arange('2019-12-25', '2021-01-10', dtype='datetime64[D]').astype('datetime64[s]')
+        ])
+        for fmt in FORMATS:
+            self.assertTrue(ft.DateTimeComponent.supported(fmt), f'{fmt} should be supported')
+            r = ft.DateTimeComponent.extract(values, fmt)
+            e = ft.DateTimeComponent.strftime(values, fmt).astype(np.int64)
+            self.assertTrue(np.array_equal(r, e), f'{fmt} differs from strftime at {np.flatnonzero(r != e)[:5]}')
+
+    def test_date_resolution(self):
+        values = np.array(['2021-03-01', '2021-03-07'], dtype='datetime64[D]')
+        self.assertListEqual(ft.DateTimeComponent.extract(values, '%u').tolist(), [1, 7])
+
+    def test_not_supported(self):
+        self.assertFalse(ft.DateTimeComponent.supported('%b'))
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.DateTimeComponent.extract(np.array(['2021-03-01'], dtype='datetime64[D]'), '%b')
+
+    def test_not_datetime(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.DateTimeComponent.extract(np.array([1, 2]), '%w')
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Unit Tests for the vectorized DateTimeParser
+(c) 2023 tsm
+"""
+import unittest
+from datetime import datetime
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _strptime(values, format_code):
+    return np.array([np.datetime64(datetime.strptime(v, format_code), 's') for v in values], dtype='datetime64[s]')
+
+
+class TestDateTimeParser(unittest.TestCase):
+    def test_vectorized_formats(self):
+        cases = [
+            ('%Y-%m-%d', ['2020-01-01', '2020-02-29', '1999-12-31', '2023-06-15']),
+            ('%Y%m%d', ['20200101', '20200229', '19991231', '20230615']),
+            ('%Y-%m-%d %H:%M:%S', ['2020-01-01 00:00:00', '2020-02-29 23:59:59', '1999-12-31 12:30:01']),
+            ('%Y-%m-%dT%H:%M:%S', ['2020-01-01T00:00:00', '2020-02-29T23:59:59', '1969-07-20T20:17:40']),
+            ('%d/%m/%Y', ['01/02/2020', '31/12/1999'])
+        ]
+        for fmt, values in cases:
+            p = ft.DateTimeParser.compile(fmt)
+            self.assertTrue(p.vectorized, f'{fmt} should be parsed vectorized')
+            for a in (np.array(values), np.array(values, dtype='S'), np.array(values, dtype=object)):
+                r = p.parse(a)
+                self.assertEqual(r.dtype, np.dtype('datetime64[s]'), f'Unexpected dtype {r.dtype}')
+                self.assertTrue(np.array_equal(r, _strptime(values, fmt)), f'{fmt} parse differs from strptime {r}')
+
+    def test_compile_cached(self):
+        self.assertIs(ft.DateTimeParser.compile('%Y-%m-%d'), ft.DateTimeParser.compile('%Y-%m-%d'))
+
+    def test_fallback_format(self):
+        p = ft.DateTimeParser.compile('%d-%b-%Y')
+        self.assertFalse(p.vectorized, f'%b is not fixed width and should not be vectorized')
+        values = ['01-Jan-2020', '15-Jun-2021']
+        self.assertTrue(np.array_equal(p.parse(np.array(values)), _strptime(values, '%d-%b-%Y')))
+
+    def test_fallback_rows(self):
+        # Single digit months and multiple spaces do not fit the fixed layout, strptime still accepts them.
+        fmt = '%Y-%m-%d %H:%M:%S'
+        values = ['2020-1-05 10:00:00', '2020-01-05  10:00:00', '2020-01-05 10:00:00']
+        r = ft.DateTimeParser.compile(fmt).parse(np.array(values))
+        self.assertTrue(np.array_equal(r, _strptime(values, fmt)), f'Fallback rows not parsed correctly {r}')
+
+    def test_missing(self):
+        r = ft.DateTimeParser.compile('%Y-%m-%d').parse(np.array(['2020-01-01', '', None], dtype=object))
+        self.assertEqual(r[0], np.datetime64('2020-01-01', 's'))
+        self.assertTrue(np.isnat(r[1]) and np.isnat(r[2]), f'Missing values should be NaT')
+
+    def test_invalid(self):
+        p = ft.DateTimeParser.compile('%Y-%m-%d')
+        for bad in ('2020-02-30', '2020-13-01', '2020-0a-01', '2020-01-01x'):
+            with self.assertRaises(ft.FeatureRunTimeException):
+                _ = p.parse(np.array(['2020-01-01', bad]))
+
+    def test_non_ascii(self):
+        r = ft.DateTimeParser.compile('%Y-%m-%d').parse(np.array(['2020-01-01', '２０２０-01-01']))
+        self.assertTrue(np.array_equal(r, _strptime(['2020-01-01', '２０２０-01-01'], '%Y-%m-%d')))
+
+    def test_feature_source_parse(self):
+        fs = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE, '%Y%m%d')
+        r = fs.parse(np.array(['20200101', '20211231']))
+        self.assertEqual(r.dtype, np.dtype('datetime64[D]'), f'A date should be parsed to datetime64[D]')
+        self.assertEqual(r[1], np.datetime64('2021-12-31'))
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        self.assertEqual(fs.parse(np.array(['1.5'])).dtype, np.float64)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Unit Tests for the fused NormalizeKernel
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+LOG = {'e': np.log, '10': np.log10, '2': np.log2}
+
+
+def _reference(f, x):
+    x = LOG[f.log_base](x + f.delta) if f.log_base is not None else x
+    if isinstance(f, ft.FeatureNormalizeScale):
+        return (x - f.minimum) / (f.maximum - f.minimum)
+    return (x - f.mean) / f.stddev
+
+
+class TestNormalizeKernel(unittest.TestCase):
+    def setUp(self):
+        self.values = np.random.default_rng(3).random((100, 4)) * 100
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        self.features = [
+            ft.FeatureNormalizeScale('s', ft.FEATURE_TYPE_FLOAT, fs, None, 0.01, 0.0, 100.0),
+            ft.FeatureNormalizeScale('s-log', ft.FEATURE_TYPE_FLOAT, fs, '10', 1.0, 0.0, 2.0),
+            ft.FeatureNormalizeStandard('z', ft.FEATURE_TYPE_FLOAT, fs, None, 0.01, 50.0, 29.0),
+            ft.FeatureNormalizeStandard('z-log', ft.FEATURE_TYPE_FLOAT, fs, 'e', 0.5, 3.5, 1.1),
+        ]
+
+    def test_block(self):
+        r = ft.NormalizeKernel.normalize_features(self.features, self.values)
+        for i, f in enumerate(self.features):
+            self.assertTrue(np.allclose(r[:, i], _reference(f, self.values[:, i])), f'Column {f.name} not correct')
+
+    def test_block_all_logged(self):
+        features = [self.features[1], self.features[3]]
+        values = self.values[:, :2].copy()
+        r = ft.NormalizeKernel.normalize_features(features, values, out=values)
+        self.assertIs(r, values, f'Should have normalized in place')
+        self.assertTrue(np.allclose(r[:, 1], _reference(features[1], self.values[:, 1])))
+
+    def test_single_column_out(self):
+        block = np.zeros((100, 3), dtype=np.float32)
+        f = self.features[1]
+        f.normalize(self.values[:, 0], out=block[:, 1])
+        self.assertTrue(np.allclose(block[:, 1], _reference(f, self.values[:, 0]), atol=1e-5))
+        self.assertEqual(np.count_nonzero(block[:, [0, 2]]), 0, f'Should not write outside the column')
+
+    def test_zero_spread(self):
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        f = ft.FeatureNormalizeScale('s', ft.FEATURE_TYPE_FLOAT, fs, None, 0.01, 1.0, 1.0)
+        self.assertListEqual(f.normalize(np.array([1.0, 1.0])).tolist(), [0.0, 0.0])
+
+    def test_float32(self):
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        f = ft.FeatureNormalizeStandard('z', ft.FEATURE_TYPE_FLOAT_32, fs, None, 0.01, 1.0, 2.0)
+        self.assertEqual(f.normalize(np.array([1.0, 3.0])).dtype, np.float32)
+
+    def test_not_inference_ready(self):
+        fs = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        f = ft.FeatureNormalizeScale('s', ft.FEATURE_TYPE_FLOAT, fs)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = f.normalize(np.array([1.0]))
+
+    def test_bad_coefficients(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.NormalizeKernel.normalize(np.ones((2, 2)), [0.0], [1.0], [None], [0.0])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Unit Tests for the RatioKernel
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+class TestRatioKernel(unittest.TestCase):
+    def test_divide(self):
+        n = np.array([1.0, 2.0, 3.0, 4.0])
+        d = np.array([2.0, 0.0, 4.0, 0.0])
+        r = ft.RatioKernel.divide(n, d)
+        self.assertEqual(r.dtype, np.float64)
+        self.assertListEqual(r.tolist(), [0.5, 0.0, 0.75, 0.0], f'Division by 0 should give 0')
+
+    def test_divide_float32(self):
+        n = np.array([1.0, 2.0])
+        r = ft.RatioKernel.divide(n, np.array([3.0, 0.0]), np.float32)
+        self.assertEqual(r.dtype, np.float32, f'Expected float32 output. Got {r.dtype}')
+        self.assertAlmostEqual(float(r[0]), 1 / 3, places=6)
+
+    def test_divide_int(self):
+        r = ft.RatioKernel.divide(np.array([1, 5]), np.array([2, 0]))
+        self.assertListEqual(r.tolist(), [0.5, 0.0])
+
+    def test_out_column(self):
+        block = np.full((3, 2), 9.0, dtype=np.float32)
+        ft.RatioKernel.divide(np.array([1.0, 1.0, 1.0]), np.array([1.0, 0.0, 2.0]), out=block[:, 1])
+        self.assertListEqual(block[:, 1].tolist(), [1.0, 0.0, 0.5], f'Output column not filled correctly')
+        self.assertListEqual(block[:, 0].tolist(), [9.0, 9.0, 9.0], f'Should not write outside the column')
+
+    def test_bad_shape(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.RatioKernel.divide(np.ones(2), np.ones(3))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Unit Tests for the vectorized WaveKernel
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _reference(values, period, frequencies):
+    return np.stack([
+        f(2 * np.pi * k * values / period) for k in range(1, frequencies + 1) for f in (np.sin, np.cos)
+    ], axis=1)
+
+
+class TestWaveKernel(unittest.TestCase):
+    def test_recurrence(self):
+        values = np.random.default_rng(1).random(1000) * 1000
+        r = ft.WaveKernel.encode(values, 24, 6)
+        self.assertEqual(r.shape, (1000, 12), f'Unexpected shape {r.shape}')
+        self.assertTrue(np.allclose(r, _reference(values, 24, 6), atol=1e-9), f'Recurrence differs from reference')
+
+    def test_lookup_table(self):
+        values = np.array([0, 1, 2, 3, 4, 5, 6, 3, 3], dtype=np.int64)
+        r = ft.WaveKernel.encode(values, 7, 3)
+        self.assertTrue(np.allclose(r, _reference(values, 7, 3), atol=1e-9), f'Table differs from reference')
+
+    def test_out_slice(self):
+        values = np.array([1, 2, 3])
+        block = np.zeros((3, 8), dtype=np.float32)
+        r = ft.WaveKernel.encode(values, 7, 2, out=block[:, 2:6])
+        self.assertTrue(np.shares_memory(r, block), f'Should have written into the provided output')
+        self.assertTrue(np.allclose(block[:, 2:6], _reference(values, 7, 2), atol=1e-6))
+        self.assertEqual(np.count_nonzero(block[:, :2]) + np.count_nonzero(block[:, 6:]), 0, f'Wrote outside slice')
+
+    def test_bad_out_shape(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.WaveKernel.encode(np.array([1, 2]), 7, 2, out=np.zeros((2, 3)))
+
+    def test_bad_period(self):
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.WaveKernel.encode(np.array([1, 2]), 0, 2)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
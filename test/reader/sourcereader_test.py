@@ -0,0 +1,165 @@
+"""
+Unit Tests for the SourceReader
+(c) 2023 tsm
+"""
+import io
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import numpy as np
+import f3atur3s as ft
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+CSV = (
+    'id,amount,country,date,count,flag,unused\n'
+    '1,1.5,BE,2023-01-01,3,yes,x\n'
+    '2,,FR,2023-01-02,,0,y\n'
+    '3,3.25,,,5,true,z\n'
+    '4,4.0,"D,E",2023-01-04,6,no,w\n'
+)
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT_32)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING, default='UNKNOWN')
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE, '%Y-%m-%d')
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16, default=0)
+    fl = ft.FeatureSource('flag', ft.FEATURE_TYPE_BOOL)
+    fu = ft.FeatureSource('unused', ft.FEATURE_TYPE_STRING)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT_32, fa, None, 1.0, 0.0, 10.0)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    fw = ft.FeatureDateTimeFormat('date-day', ft.FEATURE_TYPE_INT_8, fd, '%d')
+    fr = ft.FeatureRatio('count-ratio', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    # Not in a model learning category, so the 'unused' column does not need to be read.
+    fk = ft.FeatureConcat('unused-x', ft.FEATURE_TYPE_STRING, fu, fu)
+    return ft.TensorDefinition('reader', [fs, oh, fw, fr, fl, fk])
+
+
+def _write_parquet(file: str):
+    # The same data as the CSV, with nulls for the empty values.
+    table = pyarrow.table({
+        'id': pyarrow.array([1, 2, 3, 4], type=pyarrow.int64()),
+        'amount': pyarrow.array([1.5, None, 3.25, 4.0], type=pyarrow.float64()),
+        'country': pyarrow.array(['BE', 'FR', None, 'D,E'], type=pyarrow.string()),
+        'date': pyarrow.array([date(2023, 1, 1), date(2023, 1, 2), None, date(2023, 1, 4)], type=pyarrow.date32()),
+        'count': pyarrow.array([3, None, 5, 6], type=pyarrow.int32()),
+        'flag': pyarrow.array([True, False, True, False]),
+        'unused': pyarrow.array(['x', 'y', 'z', 'w'])
+    })
+    pyarrow.parquet.write_table(table, file, row_group_size=2)
+
+
+class TestSourceReader(unittest.TestCase):
+    def test_read_csv(self):
+        r = ft.SourceReader(_definition(), batch_rows=3)
+        self.assertListEqual(sorted(s.name for s in r.sources), ['amount', 'count', 'country', 'date', 'flag'])
+        batches = list(r.read_csv(io.StringIO(CSV)))
+        self.assertListEqual([len(b['amount']) for b in batches], [3, 1], f'Should have been read in 2 batches')
+        self.assertNotIn('unused', batches[0], f'Unused columns should not be read')
+        b = batches[0]
+        self.assertEqual(b['amount'].dtype, np.float32)
+        self.assertTrue(np.isnan(b['amount'][1]), f'Missing float without default should be NaN')
+        self.assertListEqual(list(b['country']), ['BE', 'FR', 'UNKNOWN'], f'Default should have been filled')
+        self.assertEqual(b['date'].dtype, np.dtype('datetime64[D]'))
+        self.assertTrue(np.isnat(b['date'][2]))
+        self.assertEqual(b['count'].dtype, np.int16)
+        self.assertListEqual(list(b['count']), [3, 0, 5])
+        self.assertListEqual(list(b['flag']), [True, False, True])
+        self.assertEqual(batches[1]['country'][0], 'D,E', f'Quoted delimiter not handled')
+
+    def test_read_csv_file_and_execute(self):
+        td = _definition()
+        with tempfile.TemporaryDirectory() as d:
+            file = os.path.join(d, 'source.csv')
+            with open(file, 'w') as f:
+                f.write(CSV)
+            e = ft.BatchExecutor(td.subset(categories=[ft.LEARNING_CATEGORY_CONTINUOUS]))
+            reader = ft.SourceReader(td, categories=[ft.LEARNING_CATEGORY_CONTINUOUS])
+            self.assertListEqual(sorted(s.name for s in reader.sources), ['amount', 'count'])
+            out = [e.execute(b) for b in reader.read_csv(file)]
+        c = out[0][ft.LEARNING_CATEGORY_CONTINUOUS]
+        self.assertEqual(c.shape, (4, 2))
+        self.assertAlmostEqual(float(c[0, 0]), 0.15, places=5)
+
+    def test_missing_column(self):
+        r = ft.SourceReader(_definition())
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = list(r.read_csv(io.StringIO('amount,country\n1.0,BE\n')))
+
+    def test_missing_int_without_default(self):
+        fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.SourceReader.convert(fc, np.array(['1', '']))
+        with self.assertRaises(ft.FeatureRunTimeException):
+            _ = ft.SourceReader.convert(fc, np.array(['1', 'x']))
+
+    def test_convert_typed(self):
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT, default=-1.0)
+        r = ft.SourceReader.convert(fa, np.array([1.0, 2.0, np.nan]), np.array([False, False, True]))
+        self.assertListEqual(list(r), [1.0, 2.0, -1.0])
+        fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING, default='LONGER_DEFAULT')
+        r = ft.SourceReader.convert(fy, np.array(['BE', None], dtype=object))
+        self.assertListEqual(list(r), ['BE', 'LONGER_DEFAULT'], f'Default should not be truncated')
+
+    @unittest.skipUnless(pyarrow is not None, 'pyarrow is not installed')
+    def test_read_parquet(self):
+        r = ft.SourceReader(_definition(), batch_rows=3)
+        with tempfile.TemporaryDirectory() as d:
+            file = os.path.join(d, 'source.parquet')
+            _write_parquet(file)
+            self.assertEqual(ft.SourceReader.count_parquet(file), 4)
+            batches = list(r.read_parquet(file))
+        self.assertListEqual([len(b['amount']) for b in batches], [3, 1], f'Should have been read in 2 batches')
+        self.assertNotIn('unused', batches[0], f'Unused columns should not be read')
+        b = batches[0]
+        self.assertEqual(b['amount'].dtype, np.float32)
+        self.assertTrue(np.isnan(b['amount'][1]), f'Null float without default should be NaN')
+        self.assertListEqual(list(b['country']), ['BE', 'FR', 'UNKNOWN'], f'Default should have been filled')
+        self.assertEqual(b['date'].dtype, np.dtype('datetime64[D]'))
+        self.assertTrue(np.isnat(b['date'][2]), f'Null date without default should be NaT')
+        self.assertEqual(b['count'].dtype, np.int16)
+        self.assertListEqual(list(b['count']), [3, 0, 5], f'Null int should get the default')
+        self.assertListEqual(list(b['flag']), [True, False, True])
+        self.assertEqual(batches[1]['country'][0], 'D,E')
+
+    @unittest.skipUnless(pyarrow is not None, 'pyarrow is not installed')
+    def test_read_parquet_same_as_csv(self):
+        r = ft.SourceReader(_definition())
+        with tempfile.TemporaryDirectory() as d:
+            file = os.path.join(d, 'source.parquet')
+            _write_parquet(file)
+            parquet = list(r.read_parquet(file))[0]
+        csv = list(r.read_csv(io.StringIO(CSV)))[0]
+        for name, values in csv.items():
+            self.assertEqual(parquet[name].dtype, values.dtype, f'Dtype of {name} differs')
+            self.assertTrue(np.array_equal(parquet[name], values, equal_nan=values.dtype.kind in 'fmM'))
+
+    @unittest.skipUnless(pyarrow is not None, 'pyarrow is not installed')
+    def test_read_parquet_errors(self):
+        with tempfile.TemporaryDirectory() as d:
+            file = os.path.join(d, 'source.parquet')
+            _write_parquet(file)
+            fc = ft.FeatureSource('count', ft.FEATURE_TYPE_INT_16)
+            r = ft.SourceReader(ft.TensorDefinition('no-default', [fc]))
+            with self.assertRaises(ft.FeatureRunTimeException):
+                _ = list(r.read_parquet(file))
+            fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_FLOAT)
+            r = ft.SourceReader(ft.TensorDefinition('missing', [fm]))
+            with self.assertRaises(ft.FeatureRunTimeException):
+                _ = list(r.read_parquet(file))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
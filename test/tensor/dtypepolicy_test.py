@@ -0,0 +1,83 @@
+"""
+Unit Tests for the DtypePolicy classes
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    ff = ft.FeatureSource('fraud', ft.FEATURE_TYPE_INT_32)
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+    fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_32, fm)
+    fi.dictionary = {f'm{i}': i + 1 for i in range(200)}
+    fb = ft.FeatureBin('amount-bin', ft.FEATURE_TYPE_INT_64, fa, 4)
+    fb.bins = [0.0, 2.0, 6.0]
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_16, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    fl = ft.FeatureLabelBinary('fraud-label', ft.FEATURE_TYPE_INT_32, ff)
+    return ft.TensorDefinition('dtype', [fs, fi, fb, oh, fl])
+
+
+def _inputs():
+    return {
+        'amount': np.array([0.0, 9.0, 4.0]),
+        'merchant': np.array(['m1', 'm199', 'x']),
+        'country': np.array(['FR', 'BE', 'DE']),
+        'fraud': np.array([0, 1, 0])
+    }
+
+
+class TestDtypePolicy(unittest.TestCase):
+    def test_default(self):
+        d = ft.DTYPE_POLICY_DEFAULT.dtypes(_definition())
+        self.assertEqual(d[ft.LEARNING_CATEGORY_CONTINUOUS], np.float64)
+        self.assertEqual(d[ft.LEARNING_CATEGORY_CATEGORICAL], np.int64)
+        self.assertEqual(d[ft.LEARNING_CATEGORY_BINARY], np.int16)
+        self.assertEqual(d[ft.LEARNING_CATEGORY_LABEL], np.int32)
+
+    def test_compact(self):
+        td = _definition()
+        d = ft.DTYPE_POLICY_COMPACT.dtypes(td)
+        self.assertEqual(d[ft.LEARNING_CATEGORY_CONTINUOUS], np.float32)
+        # 200 merchants do not fit in an int8.
+        self.assertEqual(d[ft.LEARNING_CATEGORY_CATEGORICAL], np.int16)
+        self.assertEqual(ft.DTYPE_POLICY_COMPACT.feature_dtype(td.features[2]), np.int8)
+        self.assertEqual(d[ft.LEARNING_CATEGORY_BINARY], np.int8)
+        self.assertEqual(d[ft.LEARNING_CATEGORY_LABEL], np.int32, f'Labels should keep their type')
+        self.assertIs(ft.DTYPE_POLICIES['compact'], ft.DTYPE_POLICY_COMPACT)
+
+    def test_smallest_int(self):
+        self.assertEqual(ft.DtypePolicyCompact.smallest_int(127), np.int8)
+        self.assertEqual(ft.DtypePolicyCompact.smallest_int(128), np.int16)
+        self.assertEqual(ft.DtypePolicyCompact.smallest_int(70_000), np.int32)
+        self.assertEqual(ft.DtypePolicyCompact.smallest_int(2 ** 40), np.int64)
+
+    def test_not_ready(self):
+        fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+        fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_32, fm)
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = ft.DTYPE_POLICY_COMPACT.feature_dtype(fi)
+
+    def test_batch_executor(self):
+        td = _definition()
+        default = ft.BatchExecutor(td)
+        compact = ft.BatchExecutor(td, dtype_policy=ft.DTYPE_POLICY_COMPACT)
+        self.assertLess(compact.row_bytes, default.row_bytes)
+        d, c = default.execute(_inputs()), compact.execute(_inputs())
+        for lc in td.learning_categories:
+            self.assertEqual(c[lc].dtype, compact.dtypes[lc])
+            self.assertTrue(np.allclose(d[lc], c[lc]), f'Values should not change for {lc.name}')
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
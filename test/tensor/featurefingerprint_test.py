@@ -0,0 +1,120 @@
+"""
+Unit Tests for FeatureFingerprint
+(c) 2023 tsm
+"""
+import types
+import unittest
+import numpy as np
+import f3atur3s as ft
+
+
+def feature_expression(param: float):
+    return param * 2
+
+
+def feature_expression_other(param: float):
+    return param * 3
+
+
+def multiply_by(k):
+    return lambda param: param * k
+
+
+class Factor:
+    def __init__(self, k: float):
+        self.k = k
+
+
+def multiply_by_object(factor: Factor):
+    return lambda param: param * factor.k
+
+
+class TestFeatureFingerprint(unittest.TestCase):
+    def test_same_definition_same_fingerprint(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        f1 = ft.FeatureNormalizeScale('scale-1', ft.FEATURE_TYPE_FLOAT, fs)
+        f2 = ft.FeatureNormalizeScale('scale-2', ft.FEATURE_TYPE_FLOAT, fs)
+        self.assertEqual(
+            ft.FeatureFingerprint.feature(f1), ft.FeatureFingerprint.feature(f2), f'Names should not matter'
+        )
+
+    def test_source_name_in_fingerprint(self):
+        fs1 = ft.FeatureSource('Amount-1', ft.FEATURE_TYPE_FLOAT)
+        fs2 = ft.FeatureSource('Amount-2', ft.FEATURE_TYPE_FLOAT)
+        self.assertNotEqual(ft.FeatureFingerprint.feature(fs1), ft.FeatureFingerprint.feature(fs2))
+
+    def test_change_propagates_to_dependents(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        fb = ft.FeatureBin('bin', ft.FEATURE_TYPE_INT_16, fn, 10)
+        fp_n = ft.FeatureFingerprint.feature(fn)
+        fp_b = ft.FeatureFingerprint.feature(fb)
+        fn.minimum = 0.0
+        fn.maximum = 10.0
+        self.assertNotEqual(fp_n, ft.FeatureFingerprint.feature(fn), f'Inference attributes should be included')
+        self.assertNotEqual(fp_b, ft.FeatureFingerprint.feature(fb), f'Change should propagate to dependents')
+
+    def test_expression(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        f1 = ft.FeatureExpression('e1', ft.FEATURE_TYPE_FLOAT, feature_expression, [fs])
+        f2 = ft.FeatureExpression('e2', ft.FEATURE_TYPE_FLOAT, feature_expression, [fs])
+        f3 = ft.FeatureExpression('e3', ft.FEATURE_TYPE_FLOAT, feature_expression_other, [fs])
+        self.assertEqual(ft.FeatureFingerprint.feature(f1), ft.FeatureFingerprint.feature(f2))
+        self.assertNotEqual(ft.FeatureFingerprint.feature(f1), ft.FeatureFingerprint.feature(f3))
+
+    def test_expression_closure(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        f2 = ft.FeatureExpression('x2', ft.FEATURE_TYPE_FLOAT, multiply_by(2), [fs])
+        f3 = ft.FeatureExpression('x3', ft.FEATURE_TYPE_FLOAT, multiply_by(3), [fs])
+        f2b = ft.FeatureExpression('x2b', ft.FEATURE_TYPE_FLOAT, multiply_by(2), [fs])
+        self.assertNotEqual(
+            ft.FeatureFingerprint.feature(f2), ft.FeatureFingerprint.feature(f3), f'Captured values should be included'
+        )
+        self.assertEqual(ft.FeatureFingerprint.feature(f2), ft.FeatureFingerprint.feature(f2b))
+        ex = ft.BatchExecutor(ft.TensorDefinition('closure', [f2, f3, f2b]))
+        self.assertDictEqual(ex.plan.aliases, {'x2b': 'x2'})
+        out = ex.execute({'Amount': np.array([1.0, 2.0])})[ft.LEARNING_CATEGORY_CONTINUOUS]
+        self.assertListEqual(out.tolist(), [[2.0, 3.0, 2.0], [4.0, 6.0, 4.0]])
+
+    def test_expression_defaults(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn2 = types.FunctionType(feature_expression.__code__, feature_expression.__globals__, 'fn', (2.0,))
+        fn3 = types.FunctionType(feature_expression.__code__, feature_expression.__globals__, 'fn', (3.0,))
+        f2 = ft.FeatureExpression('x2', ft.FEATURE_TYPE_FLOAT, fn2, [fs])
+        f3 = ft.FeatureExpression('x3', ft.FEATURE_TYPE_FLOAT, fn3, [fs])
+        self.assertNotEqual(ft.FeatureFingerprint.feature(f2), ft.FeatureFingerprint.feature(f3))
+
+    def test_expression_not_fingerprintable(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        f1 = ft.FeatureExpression('o1', ft.FEATURE_TYPE_FLOAT, multiply_by_object(Factor(2)), [fs])
+        f2 = ft.FeatureExpression('o2', ft.FEATURE_TYPE_FLOAT, multiply_by_object(Factor(2)), [fs])
+        fn = ft.FeatureNormalizeScale('o1-scale', ft.FEATURE_TYPE_FLOAT, f1, None, 1.0, 0.0, 1.0)
+        self.assertNotEqual(
+            ft.FeatureFingerprint.feature(f1), ft.FeatureFingerprint.feature(f1), f'Should have a unique fingerprint'
+        )
+        self.assertNotEqual(ft.FeatureFingerprint.feature(fn), ft.FeatureFingerprint.feature(fn))
+        self.assertTrue(ft.FeatureFingerprint.is_unique(ft.FeatureFingerprint.feature(fn)), f'Should propagate')
+        self.assertFalse(ft.FeatureFingerprint.is_unique(ft.FeatureFingerprint.feature(fs)))
+        self.assertDictEqual(ft.TensorDefinitionPlan(ft.TensorDefinition('obj', [f1, f2])).aliases, {})
+
+    def test_features(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        fps = ft.FeatureFingerprint.features([fs, fn])
+        self.assertListEqual(list(fps.keys()), ['Amount', 'scale'])
+        self.assertEqual(fps['scale'], ft.FeatureFingerprint.feature(fn))
+
+    def test_source_arrays(self):
+        a = {'Amount': np.arange(10, dtype=np.float64)}
+        b = {'Amount': np.arange(10, dtype=np.float64)}
+        c = {'Amount': np.arange(10, dtype=np.float32)}
+        self.assertEqual(ft.FeatureFingerprint.source_arrays(a), ft.FeatureFingerprint.source_arrays(b))
+        self.assertNotEqual(ft.FeatureFingerprint.source_arrays(a), ft.FeatureFingerprint.source_arrays(c))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Unit Tests for the TensorDefinitionAnalysis
+(c) 2023 tsm
+"""
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fc = ft.FeatureSource('count', ft.FEATURE_TYPE_FLOAT)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fd = ft.FeatureSource('date', ft.FEATURE_TYPE_DATE_TIME, '%Y-%m-%d %H:%M:%S')
+    fs = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+    fr = ft.FeatureRatio('amount-per-count', ft.FEATURE_TYPE_FLOAT, fa, fc)
+    fs2 = ft.FeatureNormalizeScale('amount-scale-2', ft.FEATURE_TYPE_FLOAT, fa, None, 1.0, 0.0, 10.0)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    oh.expand_names = ['country__BE', 'country__FR']
+    # A string feature, it is built but it is not in any model learning category.
+    cat = ft.FeatureConcat('merchant-date', ft.FEATURE_TYPE_STRING, fm,
+                           ft.FeatureDateTimeFormat('date-ym', ft.FEATURE_TYPE_STRING, fd, '%Y-%m'))
+    return ft.TensorDefinition('analysis', [fs, fr, fs2, oh, cat])
+
+
+class TestTensorDefinitionAnalysis(unittest.TestCase):
+    def test_sources_and_dead(self):
+        a = ft.TensorDefinitionAnalysis(_definition())
+        self.assertListEqual([f.name for f in a.outputs], ['amount-scale', 'amount-per-count', 'amount-scale-2',
+                                                            'country-oh'])
+        self.assertListEqual(sorted(f.name for f in a.required_sources), ['amount', 'count', 'country'])
+        self.assertListEqual(sorted(f.name for f in a.unused_sources), ['date', 'merchant'])
+        self.assertListEqual(sorted(f.name for f in a.dead_features), ['date', 'date-ym', 'merchant', 'merchant-date'])
+        self.assertDictEqual(a.duplicate_features, {'amount-scale-2': 'amount-scale'})
+        self.assertGreater(a.dead_cost, 0.0)
+
+    def test_subset_of_outputs(self):
+        a = ft.TensorDefinitionAnalysis(_definition(), categories=[ft.LEARNING_CATEGORY_BINARY])
+        self.assertListEqual([f.name for f in a.outputs], ['country-oh'])
+        self.assertListEqual([f.name for f in a.required_sources], ['country'])
+        a = ft.TensorDefinitionAnalysis(_definition(), names=['amount-per-count'])
+        self.assertListEqual(sorted(f.name for f in a.required_sources), ['amount', 'count'])
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = ft.TensorDefinitionAnalysis(_definition(), names=['not-a-feature'])
+
+    def test_costs(self):
+        a = ft.TensorDefinitionAnalysis(_definition())
+        costs = a.output_costs
+        totals = [c.total for c in costs.values()]
+        self.assertListEqual(totals, sorted(totals, reverse=True), f'Costs should be sorted, most expensive first')
+        self.assertAlmostEqual(sum(c.amortized for c in costs.values()), a.total_cost)
+        # The alias costs nothing. The shared 'amount' source is not exclusive to 'amount-scale'.
+        self.assertEqual(a.cost(a.outputs[2]), 0.0)
+        self.assertAlmostEqual(costs['amount-scale'].exclusive, a.cost(a.outputs[0]))
+        self.assertAlmostEqual(costs['amount-per-count'].total, sum(
+            a.cost(f) for f in (a.outputs[1],) + tuple(a.outputs[1].embedded_features)
+        ))
+
+    def test_measured_costs(self):
+        td = _definition()
+        p = ft.FeatureProfiler()
+        e = ft.BatchExecutor(td, profiler=p)
+        _ = e.execute({
+            'amount': np.arange(10, dtype=np.float64), 'count': np.ones(10), 'merchant': np.array(['m'] * 10),
+            'country': np.array(['BE'] * 10), 'date': np.array(['2023-01-01 00:00:00'] * 10)
+        })
+        measured = p.cost_per_row()
+        self.assertNotIn('amount-scale-2', measured, f'Aliases are not built and should not have a measured cost')
+        a = ft.TensorDefinitionAnalysis(td, measured=measured)
+        self.assertAlmostEqual(a.cost(td.features[0]), measured['amount-scale'])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -78,6 +78,75 @@ class TestTensorCreate(unittest.TestCase):
             t.label_features(True)
             t.filter_features(ft.LEARNING_CATEGORY_CATEGORICAL, True)
 
+    def test_embedded_features(self):
+        f1 = ft.FeatureSource('test-feature-1', ft.FEATURE_TYPE_FLOAT)
+        f2 = ft.FeatureSource('test-feature-2', ft.FEATURE_TYPE_FLOAT)
+        f3 = ft.FeatureRatio('test-feature-3', ft.FEATURE_TYPE_FLOAT, f1, f2)
+        f4 = ft.FeatureNormalizeScale('test-feature-4', ft.FEATURE_TYPE_FLOAT, f3)
+        f5 = ft.FeatureNormalizeStandard('test-feature-5', ft.FEATURE_TYPE_FLOAT, f1)
+        t = ft.TensorDefinition('test-tensor', [f4, f5])
+        e = t.embedded_features
+        self.assertIsInstance(e, tuple, f'Embedded features should be a tuple')
+        self.assertListEqual([f.name for f in e], [f1.name, f2.name, f5.name, f3.name, f4.name])
+        self.assertIs(e, t.embedded_features, f'The closure should be cached')
+        self.assertTupleEqual(t.dependents(f1), (f5, f3, f4), f'Wrong dependents {t.dependents(f1)}')
+        self.assertTupleEqual(t.dependents(f3), (f4,), f'Wrong dependents {t.dependents(f3)}')
+        self.assertTupleEqual(t.dependents(f4), (), f'Top level feature should have no dependents')
+        self.assertTupleEqual(t.dependents(ft.FeatureSource('other', ft.FEATURE_TYPE_FLOAT)), ())
+        t.remove(f4)
+        self.assertListEqual([f.name for f in t.embedded_features], [f1.name, f5.name])
+        self.assertTupleEqual(t.dependents(f1), (f5,), f'Dependents should be updated after remove')
+
+    def test_features_copy(self):
+        f1 = ft.FeatureSource('test-feature-1', ft.FEATURE_TYPE_FLOAT)
+        f2 = ft.FeatureNormalizeScale('test-feature-2', ft.FEATURE_TYPE_FLOAT, f1)
+        f3 = ft.FeatureSource('test-feature-3', ft.FEATURE_TYPE_FLOAT)
+        features = [f2]
+        t = ft.TensorDefinition('test-tensor', features)
+        self.assertTupleEqual(t.embedded_features, (f1, f2))
+        features.append(f3)
+        t.features.append(f3)
+        self.assertListEqual(t.features, [f2], f'Changing the lists should not change the TensorDefinition')
+        self.assertTupleEqual(t.embedded_features, (f1, f2), f'Closure should still match the features')
+
+    def test_no_features(self):
+        t = ft.TensorDefinition('test-tensor')
+        self.assertEqual(len(t), 0, f'Tensor without features should have length 0')
+        self.assertListEqual(t.features, [])
+
+    def test_features_not_inference_ready(self):
+        f1 = ft.FeatureSource('test-feature-1', ft.FEATURE_TYPE_FLOAT)
+        f2 = ft.FeatureNormalizeScale('test-feature-2', ft.FEATURE_TYPE_FLOAT, f1)
+        t = ft.TensorDefinition('test-tensor', [f2])
+        self.assertListEqual(t.features_not_inference_ready(), [f2])
+        f2.minimum, f2.maximum = 0.0, 1.0
+        self.assertListEqual(t.features_not_inference_ready(), [])
+        self.assertTrue(t.inference_ready)
+
+    def test_subset(self):
+        f1 = ft.FeatureSource('test-feature-1', ft.FEATURE_TYPE_FLOAT)
+        f2 = ft.FeatureSource('test-feature-2', ft.FEATURE_TYPE_STRING)
+        f3 = ft.FeatureNormalizeScale('test-feature-3', ft.FEATURE_TYPE_FLOAT, f1)
+        f4 = ft.FeatureIndex('test-feature-4', ft.FEATURE_TYPE_INT_16, f2)
+        f5 = ft.FeatureSource('test-feature-5', ft.FEATURE_TYPE_INT_8)
+        f6 = ft.FeatureLabelBinary('test-feature-6', ft.FEATURE_TYPE_INT_8, f5)
+        t = ft.TensorDefinition('test-tensor', [f3, f4, f6])
+        s = t.subset(categories=[ft.LEARNING_CATEGORY_CONTINUOUS])
+        self.assertEqual(s.name, 'test-tensor-subset')
+        self.assertListEqual(s.features, [f3])
+        self.assertTupleEqual(s.embedded_features, (f1, f3), f'Only the needed features should be embedded')
+        s = t.subset(names=['test-feature-6'], categories=[ft.LEARNING_CATEGORY_CONTINUOUS], name='head')
+        self.assertEqual(s.name, 'head')
+        self.assertListEqual(s.features, [f3, f6], f'Order of the features should be kept')
+        self.assertNotIn(f2, s.embedded_features)
+        self.assertListEqual(t.features, [f3, f4, f6], f'Original should not be changed')
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = t.subset(names=['not-a-feature'])
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = t.subset(names=['test-feature-1'])
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = t.subset()
+
     def test_highest_precision(self):
         name_t = 'test-tensor'
         f1 = ft.FeatureSource('test-feature-1', ft.FEATURE_TYPE_STRING)
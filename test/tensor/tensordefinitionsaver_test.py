@@ -4,6 +4,7 @@ Unit Tests for FeatureBin Creation
 """
 import unittest
 import f3atur3s as ft
+import os
 import shutil
 
 SAVE_LOCATION = './data/save/'
@@ -43,6 +44,22 @@ class TestLoaderSaver(unittest.TestCase):
         with self.assertRaises(ft.TensorDefinitionException):
             _ = td2.shapes
 
+    def test_subset_save_load(self):
+        # Only the features needed for the subset should be saved.
+        location = SAVE_LOCATION + 'subset_case'
+        shutil.rmtree(location, ignore_errors=True)
+        f1 = ft.FeatureSource('f1', ft.FEATURE_TYPE_FLOAT)
+        f2 = ft.FeatureSource('f2', ft.FEATURE_TYPE_STRING)
+        f3 = ft.FeatureNormalizeScale('f3', ft.FEATURE_TYPE_FLOAT, f1, None, 1.0, 0.0, 1.0)
+        f4 = ft.FeatureOneHot('f4', ft.FEATURE_TYPE_INT_16, f2)
+        td = ft.TensorDefinition('test-td', [f3, f4]).subset(categories=[ft.LEARNING_CATEGORY_CONTINUOUS])
+        ft.TensorDefinitionSaver.save(td, location)
+        self.assertListEqual(sorted(os.listdir(os.path.join(location, 'features'))), ['f1.json', 'f3.json'])
+        td2 = ft.TensorDefinitionLoader.load(location)
+        shutil.rmtree(location, ignore_errors=True)
+        self.assertListEqual(td.features, td2.features, f'Features not the same')
+        self.assertTupleEqual(td.embedded_features, td2.embedded_features, f'Embedded Features not the same')
+
 
 def main():
     unittest.main()
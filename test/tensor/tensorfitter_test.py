@@ -0,0 +1,210 @@
+"""
+Unit Tests for the TensorDefinitionFitter
+(c) 2023 tsm
+"""
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import f3atur3s as ft
+from f3atur3s.common.exception import TensorDefinitionSaverException
+
+
+def _definition() -> ft.TensorDefinition:
+    fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+    fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+    fy = ft.FeatureSource('country', ft.FEATURE_TYPE_STRING)
+    fs = ft.FeatureNormalizeStandard('amount-std', ft.FEATURE_TYPE_FLOAT, fa)
+    fl = ft.FeatureNormalizeStandard('amount-log-std', ft.FEATURE_TYPE_FLOAT, fa, '10', 1.0)
+    fc = ft.FeatureNormalizeScale('amount-scale', ft.FEATURE_TYPE_FLOAT, fa)
+    fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_16, fm)
+    oh = ft.FeatureOneHot('country-oh', ft.FEATURE_TYPE_INT_8, fy)
+    return ft.TensorDefinition('fitter', [fs, fl, fc, fi, oh])
+
+
+def _window(amounts, merchants, countries):
+    return {
+        'amount': np.array(amounts, dtype=np.float64),
+        'merchant': np.array(merchants),
+        'country': np.array(countries)
+    }
+
+
+W1 = _window([1.0, 2.0, 3.0, np.nan], ['m2', 'm1', 'm2', 'm1'], ['FR', 'BE', 'FR', 'BE'])
+W2 = _window([10.0, 20.0], ['m3', 'm1'], ['DE', 'DE'])
+
+
+def _feature(td: ft.TensorDefinition, name: str) -> ft.Feature:
+    return [f for f in td.embedded_features if f.name == name][0]
+
+
+class TestTensorDefinitionFitter(unittest.TestCase):
+    def test_full_history(self):
+        td = _definition()
+        fitter = ft.TensorDefinitionFitter(td)
+        fitter.update(W1)
+        fitter.update(W2)
+        self.assertEqual(fitter.windows, 2)
+        self.assertTrue(td.inference_ready)
+        a = np.array([1.0, 2.0, 3.0, 10.0, 20.0])
+        fs, fl, fc = _feature(td, 'amount-std'), _feature(td, 'amount-log-std'), _feature(td, 'amount-scale')
+        self.assertAlmostEqual(fs.mean, float(np.mean(a)))
+        self.assertAlmostEqual(fs.stddev, float(np.std(a)))
+        self.assertAlmostEqual(fl.mean, float(np.mean(np.log10(a + 1.0))))
+        self.assertAlmostEqual(fl.stddev, float(np.std(np.log10(a + 1.0))))
+        self.assertEqual((fc.minimum, fc.maximum), (1.0, 20.0))
+        self.assertDictEqual(_feature(td, 'merchant-ix').dictionary, {'m1': 1, 'm2': 2, 'm3': 3})
+        self.assertListEqual(
+            _feature(td, 'country-oh').expand_names, ['country__BE', 'country__FR', 'country__DE'],
+            f'Existing names should keep their order, new names are added at the end'
+        )
+
+    def test_decay(self):
+        td = _definition()
+        fitter = ft.TensorDefinitionFitter(td, decay=0.5)
+        fitter.update(W1)
+        fitter.update(W2)
+        a, w = np.array([1.0, 2.0, 3.0, 10.0, 20.0]), np.array([0.5, 0.5, 0.5, 1.0, 1.0])
+        mean = float(np.average(a, weights=w))
+        fs = _feature(td, 'amount-std')
+        self.assertAlmostEqual(fs.mean, mean)
+        self.assertAlmostEqual(fs.stddev, float(np.sqrt(np.average((a - mean) ** 2, weights=w))))
+
+    def test_window(self):
+        td = _definition()
+        fitter = ft.TensorDefinitionFitter(td, window=1)
+        fitter.update(W1)
+        fitter.update(W2)
+        fs, fc = _feature(td, 'amount-std'), _feature(td, 'amount-scale')
+        self.assertAlmostEqual(fs.mean, 15.0)
+        self.assertEqual((fc.minimum, fc.maximum), (10.0, 20.0))
+        self.assertDictEqual(
+            _feature(td, 'merchant-ix').dictionary, {'m1': 1, 'm3': 2}, f'm2 should be forgotten, m3 re-uses its index'
+        )
+        self.assertListEqual(_feature(td, 'country-oh').expand_names, ['country__DE'])
+        fitter.update(W1)
+        self.assertDictEqual(_feature(td, 'merchant-ix').dictionary, {'m1': 1, 'm2': 2})
+
+    def test_min_count(self):
+        td = _definition()
+        fitter = ft.TensorDefinitionFitter(td, min_count=2)
+        fitter.update(W1)
+        self.assertDictEqual(_feature(td, 'merchant-ix').dictionary, {'m1': 1, 'm2': 2})
+        fitter.update(W2)
+        self.assertDictEqual(_feature(td, 'merchant-ix').dictionary, {'m1': 1, 'm2': 2})
+
+    def test_large_vocabulary(self):
+        fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+        td = ft.TensorDefinition('vocabulary', [ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_32, fm)])
+        fitter = ft.TensorDefinitionFitter(td, window=1)
+        n = 20_000
+        fitter.update({'merchant': np.array([f'm{i:05d}' for i in range(n)])})
+        fitter.update({'merchant': np.array([f'm{i:05d}' for i in range(n, 2 * n)])})
+        d = _feature(td, 'merchant-ix').dictionary
+        self.assertEqual(len(d), n, f'The first window should be forgotten')
+        self.assertListEqual(list(d.values()), list(range(1, n + 1)), f'New values should re-use the freed indexes')
+        self.assertEqual(d['m20000'], 1)
+        fitter_new = ft.TensorDefinitionFitter.from_json(td, fitter.as_json())
+        fitter_new.update({'merchant': np.array(['new'])})
+        self.assertDictEqual(_feature(td, 'merchant-ix').dictionary, {'new': 1})
+
+    def test_compact_index(self):
+        fm = ft.FeatureSource('merchant', ft.FEATURE_TYPE_STRING)
+        fi = ft.FeatureIndex('merchant-ix', ft.FEATURE_TYPE_INT_8, fm)
+        fitter = ft.TensorDefinitionFitter(ft.TensorDefinition('compact', [fi]), window=1)
+        fitter.update({'merchant': np.array(['a', 'b', 'c'])})
+        fitter.update({'merchant': np.array(['d'])})
+        self.assertDictEqual(fi.dictionary, {'d': 1})
+        self.assertEqual(max(fi.dictionary.values()), len(fi), f'Largest index should be the size of the dictionary')
+        fitter.update({'merchant': np.array(['a', 'b', 'c', 'd'])})
+        self.assertDictEqual(fi.dictionary, {'d': 1, 'a': 2, 'b': 3, 'c': 4}, f'Kept values should keep their index')
+        fitter.update({'merchant': np.array(['c', 'd'])})
+        self.assertDictEqual(fi.dictionary, {'d': 1, 'c': 2}, f'c should move to the index freed by a')
+        # Many values over the lifetime of the fitter do not overflow the type, only the values of the window count.
+        for i in range(10):
+            fitter.update({'merchant': np.array([f'v{i}-{j}' for j in range(100)])})
+        self.assertEqual(max(fi.dictionary.values()), 100)
+        with self.assertRaises(ft.TensorDefinitionException):
+            fitter.update({'merchant': np.array([f'v{j}' for j in range(200)])})
+
+    def test_only_needed_features(self):
+        calls = []
+
+        def expensive(x):
+            calls.append(1)
+            return x
+
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fc = ft.FeatureSource('count', ft.FEATURE_TYPE_FLOAT)
+        fr = ft.FeatureRatio('ratio', ft.FEATURE_TYPE_FLOAT, fa, fc)
+        fr2 = ft.FeatureRatio('ratio-2', ft.FEATURE_TYPE_FLOAT, fa, fc)
+        fs = ft.FeatureNormalizeScale('ratio-scale', ft.FEATURE_TYPE_FLOAT, fr2)
+        fe = ft.FeatureExpression('amount-expensive', ft.FEATURE_TYPE_FLOAT, expensive, [fa])
+        td = ft.TensorDefinition('needed', [fr, fs, fe])
+        fitter = ft.TensorDefinitionFitter(td)
+        fitter.update({'amount': np.array([1.0, 4.0]), 'count': np.array([1.0, 2.0])})
+        self.assertEqual(len(calls), 0, f'Features no fitted feature is built from should not be built')
+        self.assertEqual((fs.minimum, fs.maximum), (1.0, 2.0), f'Scale on an alias should be fitted')
+
+    def test_empty_window(self):
+        td = _definition()
+        fitter = ft.TensorDefinitionFitter(td, window=2)
+        fitter.update(W1)
+        fitter.update(_window([np.nan], ['m1'], ['BE']))
+        fc = _feature(td, 'amount-scale')
+        self.assertEqual((fc.minimum, fc.maximum), (1.0, 3.0), f'Empty window should not change the range')
+        j = json.dumps(fitter.as_json(), allow_nan=False)
+        fitter_new = ft.TensorDefinitionFitter.from_json(td, json.loads(j))
+        fitter_new.update(W2)
+        self.assertEqual((fc.minimum, fc.maximum), (10.0, 20.0))
+
+    def test_bad_parameters(self):
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = ft.TensorDefinitionFitter(_definition(), decay=0.5, window=2)
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = ft.TensorDefinitionFitter(_definition(), decay=0.0)
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = ft.TensorDefinitionFitter(_definition(), window=0)
+
+    def test_not_fittable(self):
+        fa = ft.FeatureSource('amount', ft.FEATURE_TYPE_FLOAT)
+        fb = ft.FeatureBin('amount-bin', ft.FEATURE_TYPE_INT_16, fa, 3)
+        fitter = ft.TensorDefinitionFitter(ft.TensorDefinition('bin', [fb]))
+        with self.assertRaises(ft.TensorDefinitionException):
+            fitter.update({'amount': np.array([1.0, 2.0])})
+
+    def test_save_load(self):
+        td = _definition()
+        fitter = ft.TensorDefinitionFitter(td, decay=0.9)
+        fitter.update(W1)
+        with tempfile.TemporaryDirectory() as d:
+            ft.TensorDefinitionSaver.save(td, os.path.join(d, 'td'), fitter=fitter)
+            td_new = ft.TensorDefinitionLoader.load(os.path.join(d, 'td'))
+            fitter_new = ft.TensorDefinitionLoader.load_fitter(td_new, os.path.join(d, 'td'))
+            ft.TensorDefinitionSaver.save(td, os.path.join(d, 'td-no-fitter'))
+            self.assertIsNone(ft.TensorDefinitionLoader.load_fitter(td, os.path.join(d, 'td-no-fitter')))
+        self.assertEqual(fitter_new.windows, 1)
+        self.assertEqual(fitter_new.decay, 0.9)
+        fitter.update(W2)
+        fitter_new.update(W2)
+        for name in ('amount-std', 'amount-log-std'):
+            self.assertAlmostEqual(_feature(td_new, name).mean, _feature(td, name).mean)
+            self.assertAlmostEqual(_feature(td_new, name).stddev, _feature(td, name).stddev)
+        self.assertDictEqual(_feature(td_new, 'merchant-ix').dictionary, _feature(td, 'merchant-ix').dictionary)
+        self.assertListEqual(_feature(td_new, 'country-oh').expand_names, _feature(td, 'country-oh').expand_names)
+
+    def test_save_other_definition(self):
+        fitter = ft.TensorDefinitionFitter(_definition())
+        with tempfile.TemporaryDirectory() as d:
+            with self.assertRaises(TensorDefinitionSaverException):
+                ft.TensorDefinitionSaver.save(_definition(), os.path.join(d, 'td'), fitter=fitter)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
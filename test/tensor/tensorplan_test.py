@@ -0,0 +1,77 @@
+"""
+Unit Tests for the TensorDefinitionPlan
+(c) 2023 tsm
+"""
+import unittest
+import f3atur3s as ft
+
+
+def feature_expression(param: str):
+    return param == 'DE'
+
+
+class TestTensorDefinitionPlan(unittest.TestCase):
+    def test_topological_order(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fs)
+        fb = ft.FeatureBin('bin', ft.FEATURE_TYPE_INT_16, fn, 10)
+        td = ft.TensorDefinition('plan', [fb])
+        plan = ft.TensorDefinitionPlan(td)
+        self.assertEqual(len(plan), 3, f'Expected 3 steps. Got {len(plan)}')
+        self.assertListEqual([s.feature for s in plan.steps], [fs, fn, fb], f'Steps not in order')
+        self.assertListEqual(plan.compute_features, [fs, fn, fb])
+        self.assertDictEqual(plan.aliases, {})
+
+    def test_common_sub_expression(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fc = ft.FeatureSource('Country', ft.FEATURE_TYPE_STRING)
+        fk = ft.FeatureSource('Card', ft.FEATURE_TYPE_STRING)
+        ff1 = ft.FeatureFilter('filter-1', ft.FEATURE_TYPE_BOOL, feature_expression, [fc])
+        ff2 = ft.FeatureFilter('filter-2', ft.FEATURE_TYPE_BOOL, feature_expression, [fc])
+        g1 = ft.FeatureGrouper(
+            'g1', ft.FEATURE_TYPE_FLOAT, fa, fk, ff1, ft.TIME_PERIOD_DAY, 1, ft.AGGREGATOR_SUM
+        )
+        g2 = ft.FeatureGrouper(
+            'g2', ft.FEATURE_TYPE_FLOAT, fa, fk, ff2, ft.TIME_PERIOD_DAY, 1, ft.AGGREGATOR_SUM
+        )
+        g3 = ft.FeatureGrouper(
+            'g3', ft.FEATURE_TYPE_FLOAT, fa, fk, ff2, ft.TIME_PERIOD_DAY, 2, ft.AGGREGATOR_SUM
+        )
+        td = ft.TensorDefinition('plan', [g1, g2, g3])
+        plan = ft.TensorDefinitionPlan(td)
+        self.assertDictEqual(plan.aliases, {'filter-2': 'filter-1', 'g2': 'g1'}, f'Aliases not correct')
+        self.assertEqual(plan.canonical(g2), g1, f'g2 should be built as g1')
+        self.assertEqual(plan.canonical(g3), g3, f'g3 has a different window, should not be an alias')
+        self.assertEqual(len(plan.compute_features), 6)
+        names = [f.name for f in plan.compute_features]
+        self.assertLess(names.index('filter-1'), names.index('g1'), f'Filter should be built before grouper')
+
+    def test_expression_whitespace(self):
+        fs = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fe1 = ft.FeatureExpression('e1', ft.FEATURE_TYPE_FLOAT, ft.Expression('Amount*2'), [fs])
+        fe2 = ft.FeatureExpression('e2', ft.FEATURE_TYPE_FLOAT, ft.Expression('Amount * 2'), [fs])
+        plan = ft.TensorDefinitionPlan(ft.TensorDefinition('plan', [fe1, fe2]))
+        self.assertDictEqual(plan.aliases, {'e2': 'e1'})
+
+    def test_dependencies(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fd = ft.FeatureSource('Count', ft.FEATURE_TYPE_FLOAT)
+        fr = ft.FeatureRatio('ratio', ft.FEATURE_TYPE_FLOAT, fa, fd)
+        fn = ft.FeatureNormalizeScale('scale', ft.FEATURE_TYPE_FLOAT, fr)
+        self.assertListEqual(ft.TensorDefinitionPlan.dependencies(fn), [fr])
+        self.assertListEqual(ft.TensorDefinitionPlan.dependencies(fr), [fa, fd])
+
+    def test_step_not_found(self):
+        fa = ft.FeatureSource('Amount', ft.FEATURE_TYPE_FLOAT)
+        fo = ft.FeatureSource('Other', ft.FEATURE_TYPE_FLOAT)
+        plan = ft.TensorDefinitionPlan(ft.TensorDefinition('plan', [fa]))
+        with self.assertRaises(ft.TensorDefinitionException):
+            _ = plan.step(fo)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()